@@ -128,4 +128,60 @@ SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
     'AUTH_HEADER_TYPES': ('Bearer',),
-}
\ No newline at end of file
+}
+
+# Pricing engine settings
+PRICING_BULK_UPDATE_CHUNK_SIZE = int(os.getenv('PRICING_BULK_UPDATE_CHUNK_SIZE', '1000'))
+
+# Forecast cache: 'local' (per-process LRU) or 'django' (uses FORECAST_CACHE_ALIAS)
+FORECAST_CACHE_BACKEND = os.getenv('FORECAST_CACHE_BACKEND', 'local')
+FORECAST_CACHE_ALIAS = os.getenv('FORECAST_CACHE_ALIAS', 'default')
+FORECAST_CACHE_MAX_ENTRIES = int(os.getenv('FORECAST_CACHE_MAX_ENTRIES', '50000'))
+FORECAST_CACHE_TIMEOUT = int(os.getenv('FORECAST_CACHE_TIMEOUT')) if os.getenv('FORECAST_CACHE_TIMEOUT') else None
+
+# Parallel forecasting: more than one worker forecasts large batches in a process pool
+FORECAST_PARALLEL_WORKERS = int(os.getenv('FORECAST_PARALLEL_WORKERS', '1'))
+FORECAST_PARALLEL_CHUNK_SIZE = int(os.getenv('FORECAST_PARALLEL_CHUNK_SIZE', '25000'))
+
+# Per-category ensemble weights written by `manage.py backtest_forecasts`, loaded at startup
+FORECAST_WEIGHTS_PATH = os.getenv('FORECAST_WEIGHTS_PATH', str(BASE_DIR / 'forecast_weights.json'))
+
+# Residual-bootstrap prediction intervals on forecasts
+FORECAST_INTERVAL_QUANTILES = tuple(float(q) for q in os.getenv('FORECAST_INTERVAL_QUANTILES', '0.05,0.95').split(','))
+FORECAST_BOOTSTRAP_RESAMPLES = int(os.getenv('FORECAST_BOOTSTRAP_RESAMPLES', '200'))
+FORECAST_BOOTSTRAP_SEED = int(os.getenv('FORECAST_BOOTSTRAP_SEED', '42'))
+FORECAST_BOOTSTRAP_BLOCK_ELEMENTS = int(os.getenv('FORECAST_BOOTSTRAP_BLOCK_ELEMENTS', '4000000'))
+
+# Robust anomaly flags on demand histories; winsorizing clips flagged points before forecasting
+FORECAST_ANOMALY_THRESHOLD = float(os.getenv('FORECAST_ANOMALY_THRESHOLD', '3.5'))
+FORECAST_WINSORIZE = os.getenv('FORECAST_WINSORIZE', 'False').lower() == 'true'
+
+# Limits on the stateless POST forecast/batch/ endpoint
+FORECAST_BATCH_MAX_SERIES = int(os.getenv('FORECAST_BATCH_MAX_SERIES', '10000'))
+FORECAST_BATCH_MAX_PERIODS = int(os.getenv('FORECAST_BATCH_MAX_PERIODS', '120'))
+
+# Per-product elasticity estimates, refit after the TTL (seconds) or when new price observations arrive.
+# 'django' shares them (and their eviction) across workers once ELASTICITY_CACHE_ALIAS is a shared
+# cache such as Redis or memcached; 'local' keeps a per-process LRU that other workers only refresh
+# after the TTL.
+ELASTICITY_CACHE_BACKEND = os.getenv('ELASTICITY_CACHE_BACKEND', 'django')
+ELASTICITY_CACHE_ALIAS = os.getenv('ELASTICITY_CACHE_ALIAS', 'default')
+ELASTICITY_CACHE_MAX_ENTRIES = int(os.getenv('ELASTICITY_CACHE_MAX_ENTRIES', '50000'))
+ELASTICITY_CACHE_TIMEOUT = int(os.getenv('ELASTICITY_CACHE_TIMEOUT', '600'))
+
+# Versioned ML pricing models written by `manage.py train_pricing_model`
+PRICING_MODEL_DIR = os.getenv('PRICING_MODEL_DIR', str(BASE_DIR / 'pricing_models'))
+
+# Largest product batch accepted by POST ab-testing/simulate/
+STRATEGY_SIMULATION_MAX_PRODUCTS = int(os.getenv('STRATEGY_SIMULATION_MAX_PRODUCTS', '10000'))
+
+# Seconds a worker trusts its compiled pricing strategies before checking the registry for edits
+STRATEGY_REGISTRY_TTL = float(os.getenv('STRATEGY_REGISTRY_TTL', '30'))
+
+# Live price experiments: largest event batch per ingest request, and how long
+# (seconds) a worker assigns arms from cached counters before reloading them
+EXPERIMENT_EVENTS_MAX_BATCH = int(os.getenv('EXPERIMENT_EVENTS_MAX_BATCH', '10000'))
+EXPERIMENT_STATS_TTL = float(os.getenv('EXPERIMENT_STATS_TTL', '1.0'))
+
+# Threads the pricing model's random forest fits and predicts with (-1 uses every core)
+PRICING_MODEL_JOBS = int(os.getenv('PRICING_MODEL_JOBS', '1'))
@@ -1,4 +1,9 @@
 from django.contrib import admin
-from .models import Product
+from .models import Product, PriceObservation, PricingExperiment, ExperimentArm, PricingStrategy, CategoryElasticityPrior
 
 admin.site.register(Product)
+admin.site.register(PriceObservation)
+admin.site.register(PricingExperiment)
+admin.site.register(ExperimentArm)
+admin.site.register(PricingStrategy)
+admin.site.register(CategoryElasticityPrior)
@@ -1,155 +1,140 @@
 import numpy as np
 # import pandas as pd  # Commented out to avoid dependency issues
 from decimal import Decimal
-# from sklearn.linear_model import LinearRegression
-# from sklearn.preprocessing import StandardScaler
-# from sklearn.ensemble import RandomForestRegressor
+from sklearn.preprocessing import StandardScaler
+from sklearn.ensemble import RandomForestRegressor
+from joblib import Parallel, delayed
 import json
-from typing import Dict, List, Tuple, Any
+import threading
+from typing import Dict, List, Optional, Tuple, Any
 import logging
+from django.conf import settings
+from django.db.models import Count
+from .models import Product
+from .elasticity import DEFAULT_ELASTICITY, fit_elasticities, estimate_elasticities, get_category_priors, fixed_prior
+from .cache import get_elasticity_cache
+from .strategies import StrategyTable, get_strategy_table
+from .features import (
+    float_column, category_vocabulary, catalog_vocabulary, product_feature_matrix, load_feature_matrix, price_ratios,
+)
 
-# Fallback implementations for when sklearn is not available
-class LinearRegression:
-    def __init__(self):
-        self.coef_ = [0]
-        self.intercept_ = 0
-    
-    def fit(self, X, y):
-        # Simple linear regression implementation
-        if len(X) > 0 and len(y) > 0:
-            X_mean = np.mean(X)
-            y_mean = np.mean(y)
-            numerator = np.sum((X - X_mean) * (y - y_mean))
-            denominator = np.sum((X - X_mean) ** 2)
-            if denominator != 0:
-                self.coef_[0] = numerator / denominator
-                self.intercept_ = y_mean - self.coef_[0] * X_mean
-        return self
+logger = logging.getLogger(__name__)
 
-class StandardScaler:
-    def __init__(self):
-        self.mean_ = 0
-        self.scale_ = 1
-    
-    def fit(self, X):
-        if len(X) > 0:
-            self.mean_ = np.mean(X)
-            self.scale_ = np.std(X)
-            if self.scale_ == 0:
-                self.scale_ = 1
-        return self
-    
-    def transform(self, X):
-        return (X - self.mean_) / self.scale_
-    
-    def fit_transform(self, X):
-        self.fit(X)
-        return self.transform(X)
+# Elasticity scenarios simulated by default, as multiples of each product's estimate
+DEFAULT_ELASTICITY_SCENARIOS = (0.5, 1.0, 1.5)
+MAX_ELASTICITY_SCENARIOS = 10
+# Largest multiplier a scenario may apply; scenarios must also be positive
+MAX_ELASTICITY_MULTIPLIER = 10.0
 
-class RandomForestRegressor:
-    def __init__(self, n_estimators=100, random_state=42):
-        self.n_estimators = n_estimators
-        self.random_state = random_state
-        self.is_trained = False
-    
-    def fit(self, X, y):
-        self.is_trained = True
-        return self
-    
-    def predict(self, X):
-        if self.is_trained and len(X) > 0:
-            # Simple fallback prediction
-            return np.mean(X, axis=1) if X.ndim > 1 else np.mean(X)
-        return np.array([0])
+# Strategy simulation outputs and the decimals they are reported with
+SIMULATION_METRICS = {'price': 2, 'demand': 0, 'revenue': 2, 'profit': 2, 'margin': 2, 'price_change': 1}
 
-logger = logging.getLogger(__name__)
+# Range of the ML confidence, which falls as the trees disagree on a product's price ratio
+MIN_ML_CONFIDENCE = 0.5
+MAX_ML_CONFIDENCE = 0.95
+
+ELASTICITY_RANGES = ['Very Elastic (< -2)', 'Elastic (-2 to -1)', 'Unit Elastic (-1 to -0.5)', 'Inelastic (-0.5 to 0)']
+
+# Lower edges of ELASTICITY_RANGES after the first, for np.digitize
+ELASTICITY_BIN_EDGES = np.array([-2.0, -1.0, -0.5])
+
+# Inventory statuses in stock-ratio order, 'unknown' last for products without forecast demand
+INVENTORY_STATUSES = ('low', 'medium', 'adequate', 'high', 'unknown')
+
+# Price multiplier applied for each inventory status
+INVENTORY_PRICE_ADJUSTMENTS = {
+    'low': 1.15,      # Increase price by 15% when stock is low
+    'medium': 1.05,   # Increase price by 5% when stock is medium
+    'adequate': 1.0,  # No adjustment
+    'high': 0.95,     # Decrease price by 5% when stock is high
+    'unknown': 1.0    # No adjustment if unknown
+}
 
 class PriceElasticityAnalyzer:
     """Analyzes price elasticity for products"""
     
-    def __init__(self):
-        self.elasticity_cache = {}
+    def __init__(self, cache=None):
+        self.elasticity_cache = cache if cache is not None else get_elasticity_cache()
     
     def calculate_elasticity(self, price_history: List[float], demand_history: List[float]) -> float:
         """Calculate price elasticity using log-log regression"""
-        if len(price_history) < 2 or len(demand_history) < 2:
-            return -1.5  # Default elasticity
-            
         try:
-            # Log transformation for elasticity calculation
-            log_prices = np.log(price_history)
-            log_demands = np.log(demand_history)
-            
-            # Linear regression on log-transformed data
-            model = LinearRegression()
-            model.fit(log_prices.reshape(-1, 1), log_demands)
-            
-            elasticity = model.coef_[0]
-            return float(elasticity)
+            prices = np.asarray(price_history, dtype=float)
+            demands = np.asarray(demand_history, dtype=float)
+            if prices.shape != demands.shape:
+                return DEFAULT_ELASTICITY
+            usable = (prices > 0) & (demands > 0)
+            elasticity = fit_elasticities([int(usable.sum())], prices[usable], demands[usable])[0][0]
+            return DEFAULT_ELASTICITY if np.isnan(elasticity) else float(elasticity)
         except Exception as e:
             logger.error(f"Error calculating elasticity: {e}")
-            return -1.5
+            return DEFAULT_ELASTICITY
+
+    def estimate_elasticities(self, product_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """Per-product estimates pooled towards their category, cached"""
+        return estimate_elasticities(product_ids, self.elasticity_cache)
+
+    def category_priors(self) -> Dict[str, Dict[str, Any]]:
+        """Pooled elasticity of every category"""
+        return get_category_priors(self.elasticity_cache)
     
-    def get_elasticity_heatmap(self, products: List[Dict]) -> Dict[str, Any]:
-        """Generate elasticity heatmap data for visualization"""
+    def get_elasticity_heatmap(self, category_counts: Optional[Dict[str, int]] = None,
+                               product_bins: bool = False) -> Dict[str, Any]:
+        """Generate elasticity heatmap data for visualization.
+
+        `category_counts` maps each category to its number of products and
+        defaults to one GROUP BY over the catalog; each category is joined
+        with its cached pooled elasticity. With `product_bins` every
+        category also gets a histogram of its products' own pooled
+        elasticities over the same ranges.
+        """
         heatmap_data = {
             'categories': [],
-            'elasticity_ranges': ['Very Elastic (< -2)', 'Elastic (-2 to -1)', 'Unit Elastic (-1 to -0.5)', 'Inelastic (-0.5 to 0)'],
+            'elasticity_ranges': ELASTICITY_RANGES,
             'data': []
         }
+        if category_counts is None:
+            category_counts = dict(
+                Product.objects.order_by('category').values('category')
+                .annotate(count=Count('id')).values_list('category', 'count')
+            )
         
-        category_elasticities = {}
+        # Each category's pooled prior, estimated from its products' price history
+        priors = self.category_priors()
+        categories = list(category_counts)
+        category_priors = [priors.get(category) or fixed_prior(category) for category in categories]
+        elasticities = np.array([prior['elasticity'] for prior in category_priors], dtype=float)
+        range_indices = np.digitize(elasticities, ELASTICITY_BIN_EDGES).tolist()
+        bins = self._product_bins(categories) if product_bins else None
         
-        # Generate realistic elasticity data for each category
-        category_elasticities = {}
-        
-        for product in products:
-            category = product.get('category', 'Unknown')
-            if category not in category_elasticities:
-                # Generate realistic elasticity based on category
-                if category == 'Electronics':
-                    elasticity = -2.1  # Very elastic
-                elif category == 'Fashion':
-                    elasticity = -1.8  # Elastic
-                elif category == 'Home':
-                    elasticity = -1.2  # Unit elastic
-                elif category == 'Fitness':
-                    elasticity = -1.5  # Elastic
-                elif category == 'Outdoor':
-                    elasticity = -1.3  # Unit elastic
-                elif category == 'Sustainable':
-                    elasticity = -0.8  # Inelastic
-                else:
-                    elasticity = -1.5  # Default elastic
-                
-                category_elasticities[category] = elasticity
-        
-        # Create heatmap data
-        for category, elasticity in category_elasticities.items():
+        for i, (category, prior) in enumerate(zip(categories, category_priors)):
             heatmap_data['categories'].append(category)
-            
-            # Categorize elasticity
-            if elasticity < -2:
-                range_idx = 0
-            elif elasticity < -1:
-                range_idx = 1
-            elif elasticity < -0.5:
-                range_idx = 2
-            else:
-                range_idx = 3
-            
-            # Count products in this category
-            product_count = sum(1 for p in products if p.get('category') == category)
-            
-            heatmap_data['data'].append({
+            entry = {
                 'category': category,
-                'elasticity': round(elasticity, 3),
-                'range_index': range_idx,
-                'product_count': product_count,
-                'insights': self._get_elasticity_insights(category, elasticity)
-            })
+                'elasticity': round(prior['elasticity'], 3),
+                'range_index': range_indices[i],
+                'product_count': int(category_counts[category]),
+                'estimated_products': prior['products'],
+                'prior_variance': prior['variance'],
+                'insights': self._get_elasticity_insights(category, prior['elasticity'])
+            }
+            if bins is not None:
+                entry['product_bins'] = bins[i]
+            heatmap_data['data'].append(entry)
         
         return heatmap_data
+
+    def _product_bins(self, categories: List[str]) -> List[List[int]]:
+        """Per-category counts of products in each elasticity range"""
+        catalog = list(Product.objects.values_list('id', 'category'))
+        estimates = self.estimate_elasticities([product_id for product_id, _ in catalog])
+        elasticities = np.array([estimates[product_id]['elasticity'] for product_id, _ in catalog], dtype=float)
+        index = {category: i for i, category in enumerate(categories)}
+        codes = np.array([index.get(category, -1) for _, category in catalog], dtype=np.int64)
+        known = codes >= 0
+        cells = codes[known] * len(ELASTICITY_RANGES) + np.digitize(elasticities[known], ELASTICITY_BIN_EDGES)
+        counts = np.bincount(cells, minlength=len(categories) * len(ELASTICITY_RANGES))
+        return counts.reshape(len(categories), len(ELASTICITY_RANGES)).tolist()
     
     def _get_elasticity_insights(self, category: str, elasticity: float) -> str:
         """Generate insights based on elasticity value"""
@@ -165,30 +150,41 @@ class PriceElasticityAnalyzer:
 class MLPriceOptimizer:
     """Machine Learning-based price optimizer"""
     
-    def __init__(self):
-        self.model = RandomForestRegressor(n_estimators=100, random_state=42)
+    # Sorted categories seen in training; a category's feature is its position, -1 if unseen
+    categories: Tuple[str, ...] = ()
+    
+    def __init__(self, n_jobs: Optional[int] = None):
+        if n_jobs is None:
+            n_jobs = getattr(settings, 'PRICING_MODEL_JOBS', 1)
+        self.model = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=n_jobs)
         self.scaler = StandardScaler()
         self.is_trained = False
     
     def extract_features(self, product: Dict) -> np.ndarray:
         """Extract features for ML model"""
-        try:
-            features = [
-                float(product.get('cost_price', 0)) if product.get('cost_price') is not None else 0.0,
-                float(product.get('selling_price', 0)) if product.get('selling_price') is not None else 0.0,
-                float(product.get('stock_available', 0)) if product.get('stock_available') is not None else 0.0,
-                float(product.get('units_sold', 0)) if product.get('units_sold') is not None else 0.0,
-                float(product.get('customer_rating', 0)) if product.get('customer_rating') is not None else 0.0,
-                # Category encoding (simplified)
-                hash(str(product.get('category', ''))) % 1000,
-                # Demand forecast
-                float(product.get('demand_forecast_value', 0)) if product.get('demand_forecast_value') is not None else 0.0
-            ]
-            return np.array(features).reshape(1, -1)
-        except (ValueError, TypeError) as e:
-            logger.error(f"Error extracting features: {e}")
-            # Return default features if extraction fails
-            return np.array([[0.0, 0.0, 0.0, 0.0, 0.0, 0, 0.0]]).reshape(1, -1)
+        return self.feature_matrix([product])
+    
+    def feature_matrix(self, products: List[Dict]) -> np.ndarray:
+        """Features of serialized products stacked into one float32 (products x features) matrix"""
+        return product_feature_matrix(products, self.categories)
+    
+    def load_features(self, queryset=None) -> Tuple[np.ndarray, np.ndarray]:
+        """Product ids and features read straight from the database, same encoding as feature_matrix"""
+        return load_feature_matrix(self.categories, queryset)
+    
+    def training_data(self, products: Optional[List[Dict]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Feature matrix and target price ratios (selling_price / cost_price).
+
+        Reads the Product table directly unless serialized `products` are
+        given, and fixes the category vocabulary the model is encoded with.
+        """
+        if products is None:
+            self.categories = catalog_vocabulary()
+            _, X = self.load_features()
+        else:
+            self.categories = category_vocabulary(str(product.get('category', '')) for product in products)
+            X = self.feature_matrix(products)
+        return X, price_ratios(X)
     
     def train_model(self, products: List[Dict]):
         """Train the ML model on historical data"""
@@ -196,66 +192,84 @@ class MLPriceOptimizer:
             logger.warning("Insufficient data for ML training")
             return
         
-        X = []
-        y = []
-        
-        for product in products:
-            try:
-                features = self.extract_features(product)
-                X.append(features.flatten())
-                
-                # Target: optimal price ratio (selling_price / cost_price)
-                cost = float(product.get('cost_price', 1)) if product.get('cost_price') is not None else 1.0
-                selling = float(product.get('selling_price', 1)) if product.get('selling_price') is not None else 1.0
-                if cost > 0:
-                    y.append(selling / cost)
-                else:
-                    y.append(1.0)  # Default ratio if cost is 0
-            except Exception as e:
-                logger.error(f"Error processing product for training: {e}")
-                continue
-        
+        X, y = self.training_data(products)
         if len(X) > 0 and len(y) > 0:
-            try:
-                X = np.array(X)
-                y = np.array(y)
-                
-                # Scale features
-                X_scaled = self.scaler.fit_transform(X)
-                
-                # Train model
-                self.model.fit(X_scaled, y)
-                self.is_trained = True
-                logger.info(f"ML model trained on {len(X)} samples")
-            except Exception as e:
-                logger.error(f"Error training ML model: {e}")
-                self.is_trained = False
+            self.fit(X, y)
         else:
             logger.warning("No valid data for ML training")
             self.is_trained = False
     
-    def predict_optimal_price(self, product: Dict) -> Tuple[float, float]:
-        """Predict optimal price using ML model"""
-        if not self.is_trained:
-            return float(product.get('selling_price', 0)), 0.0
+    def fit(self, X: np.ndarray, y: np.ndarray):
+        """Scale the features and fit the model"""
+        try:
+            X_scaled = self.scaler.fit_transform(X)
+            self.model.fit(X_scaled, y)
+            self.is_trained = True
+            logger.info(f"ML model trained on {len(X)} samples")
+        except Exception as e:
+            logger.error(f"Error training ML model: {e}")
+            self.is_trained = False
+        return self
+    
+    def predict_ratios(self, X: np.ndarray) -> np.ndarray:
+        """Predicted price ratios for a feature matrix"""
+        return self.predict_distribution(X)[0]
+    
+    def predict_distribution(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Mean and standard deviation of the trees' predicted price ratios.
+
+        Every tree scores the scaled matrix once, spread over the forest's
+        n_jobs threads as in its own predict, and only running sums are
+        kept. The mean is the forest's prediction and the spread between
+        trees is its uncertainty.
+        """
+        X_scaled = self.scaler.transform(X)
+        total = np.zeros(len(X))
+        squares = np.zeros(len(X))
+        lock = threading.Lock()
         
+        def accumulate(tree):
+            prediction = tree.predict(X_scaled)
+            with lock:
+                np.add(total, prediction, out=total)
+                np.add(squares, prediction ** 2, out=squares)
+        
+        trees = self.model.estimators_
+        Parallel(n_jobs=self.model.n_jobs, prefer='threads')(delayed(accumulate)(tree) for tree in trees)
+        mean = total / len(trees)
+        return mean, np.sqrt(np.maximum(squares / len(trees) - mean ** 2, 0.0))
+    
+    def predict_optimal_prices(self, X: np.ndarray, cost_prices: np.ndarray,
+                               current_prices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Optimal prices and confidences for a whole feature matrix with one predict call.
+
+        An untrained model or a failed prediction keeps the current prices
+        with zero confidence.
+        """
+        current_prices = np.asarray(current_prices, dtype=float)
+        if not self.is_trained or not len(X):
+            return current_prices, np.zeros(len(current_prices))
         try:
-            features = self.extract_features(product)
-            features_scaled = self.scaler.transform(features)
-            
-            predicted_ratio = self.model.predict(features_scaled)[0]
-            cost_price = float(product.get('cost_price', 0)) if product.get('cost_price') is not None else 0.0
-            optimal_price = cost_price * predicted_ratio
-            
-            # Calculate confidence (simplified)
-            confidence = min(0.95, max(0.5, 0.7 + 0.2 * np.random.random()))
-            
-            return optimal_price, confidence
+            ratios, spread = self.predict_distribution(X)
         except Exception as e:
-            logger.error(f"Error predicting optimal price: {e}")
-            # Fallback to current price
-            current_price = float(product.get('selling_price', 0)) if product.get('selling_price') is not None else 0.0
-            return current_price, 0.0
+            logger.error(f"Error predicting optimal prices: {e}")
+            return current_prices, np.zeros(len(current_prices))
+        optimal_prices = np.asarray(cost_prices, dtype=float) * ratios
+        
+        # Confidence falls with the trees' relative disagreement on the price ratio
+        with np.errstate(divide='ignore', invalid='ignore'):
+            relative_spread = np.where(ratios != 0, spread / np.abs(ratios), np.inf)
+        confidences = np.clip(1.0 - relative_spread, MIN_ML_CONFIDENCE, MAX_ML_CONFIDENCE)
+        return optimal_prices, confidences
+    
+    def predict_optimal_price(self, product: Dict) -> Tuple[float, float]:
+        """Predict optimal price using ML model"""
+        prices, confidences = self.predict_optimal_prices(
+            self.extract_features(product),
+            float_column([product], 'cost_price', 0.0),
+            float_column([product], 'selling_price', 0.0),
+        )
+        return float(prices[0]), float(confidences[0])
 
 class InventoryAwareOptimizer:
     """Inventory-aware price optimization"""
@@ -290,33 +304,37 @@ class InventoryAwareOptimizer:
             logger.error(f"Error determining inventory status: {e}")
             return 'unknown'
     
+    def inventory_status_codes(self, stock: np.ndarray, demand: np.ndarray) -> np.ndarray:
+        """get_inventory_status for arrays, as indices into INVENTORY_STATUSES"""
+        stock = np.asarray(stock, dtype=float)
+        demand = np.asarray(demand, dtype=float)
+        thresholds = [self.stock_thresholds['low'], self.stock_thresholds['medium'], self.stock_thresholds['high']]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratios = stock / demand
+        codes = np.digitize(ratios, thresholds)
+        codes[~((demand > 0) & np.isfinite(ratios))] = INVENTORY_STATUSES.index('unknown')
+        return codes
+    
     def adjust_price_for_inventory(self, base_price: float, inventory_status: str, 
                                  current_demand: float, elasticity: float) -> float:
         """Adjust price based on inventory levels"""
-        adjustments = {
-            'low': 1.15,      # Increase price by 15% when stock is low
-            'medium': 1.05,   # Increase price by 5% when stock is medium
-            'adequate': 1.0,  # No adjustment
-            'high': 0.95,     # Decrease price by 5% when stock is high
-            'unknown': 1.0    # No adjustment if unknown
-        }
-        
-        adjustment_factor = adjustments.get(inventory_status, 1.0)
+        adjustment_factor = INVENTORY_PRICE_ADJUSTMENTS.get(inventory_status, 1.0)
         adjusted_price = base_price * adjustment_factor
         
         return adjusted_price
+    
+    def adjust_prices_for_inventory(self, base_prices: np.ndarray, status_codes: np.ndarray) -> np.ndarray:
+        """adjust_price_for_inventory for arrays of prices and status codes"""
+        factors = np.array([INVENTORY_PRICE_ADJUSTMENTS[status] for status in INVENTORY_STATUSES])
+        return np.asarray(base_prices, dtype=float) * factors[status_codes]
 
 class ABTestingSimulator:
     """A/B Testing simulator for pricing strategies"""
     
-    def __init__(self):
-        self.strategies = {
-            'penetration': {'price_factor': 0.9, 'description': 'Low price to gain market share'},
-            'skimming': {'price_factor': 1.3, 'description': 'High price for premium positioning'},
-            'competitive': {'price_factor': 1.0, 'description': 'Match competitor pricing'},
-            'cost_plus': {'price_factor': 1.2, 'description': 'Cost plus 20% margin'},
-            'value_based': {'price_factor': 1.1, 'description': 'Price based on perceived value'}
-        }
+    def __init__(self, table: Optional[StrategyTable] = None):
+        # Strategies come from the PricingStrategy registry, compiled once per worker
+        self.table = get_strategy_table() if table is None else table
+        self.strategies = {strategy['name']: strategy for strategy in self.table.strategies}
     
     def simulate_strategy(self, product: Dict, strategy_name: str, 
                          elasticity: float = -1.5) -> Dict[str, Any]:
@@ -330,7 +348,8 @@ class ABTestingSimulator:
         current_demand = float(product.get('demand_forecast_value', 100))
         
         # Calculate strategy price
-        strategy_price = cost_price * strategy['price_factor']
+        prices = self.table.prices(np.array([cost_price]), np.array([current_price]))
+        strategy_price = float(prices[0, self.table.names.index(strategy_name)])
         
         # Calculate demand change based on elasticity
         price_change_ratio = strategy_price / current_price
@@ -355,16 +374,118 @@ class ABTestingSimulator:
     
     def compare_strategies(self, product: Dict, elasticity: float = -1.5) -> List[Dict]:
         """Compare all pricing strategies"""
+        return self.compare_strategies_batch([product], [elasticity])[0]
+    
+    def compare_strategies_batch(self, products: List[Dict], elasticities: List[float]) -> List[List[Dict]]:
+        """compare_strategies for many products, simulated together"""
+        return self.compare_strategy_matrix(
+            float_column(products, 'cost_price', 0.0),
+            float_column(products, 'selling_price', 0.0),
+            float_column(products, 'demand_forecast_value', 100.0),
+            elasticities,
+        )
+    
+    def compare_strategy_matrix(self, cost_prices: np.ndarray, current_prices: np.ndarray,
+                                demands: np.ndarray, elasticities: np.ndarray) -> List[List[Dict]]:
+        """compare_strategies results for every product from one simulate_grid call.
+
+        Each product's strategies are ranked by profit with a stable sort.
+        Products without a positive cost and current price get no strategies.
+        """
+        grid = self.simulate_grid(cost_prices, current_prices, demands, np.asarray(elasticities, dtype=float)[:, None])
+        order = np.argsort(-grid['profit'][:, :, 0], axis=1, kind='stable')
+        columns = [np.take_along_axis(grid[metric][:, :, 0], order, axis=1).tolist() for metric in SIMULATION_METRICS]
+        names = list(self.strategies)
+        ranked = np.array(names)[order].tolist()
+        
         results = []
+        for i, is_valid in enumerate(grid['valid'].tolist()):
+            if not is_valid:
+                results.append([])
+                continue
+            results.append([
+                {
+                    'strategy': name,
+                    'description': self.strategies[name]['description'],
+                    'price': round(price, 2),
+                    'demand': round(units, 0),
+                    'revenue': round(revenue, 2),
+                    'profit': round(profit, 2),
+                    'margin': round(margin, 2),
+                    'price_change': round(change, 1)
+                }
+                for name, price, units, revenue, profit, margin, change in zip(ranked[i], *(column[i] for column in columns))
+            ])
+        return results
+    
+    def simulate_grid(self, cost_prices: np.ndarray, current_prices: np.ndarray,
+                      demands: np.ndarray, elasticities: np.ndarray) -> Dict[str, np.ndarray]:
+        """Every strategy for every product under every elasticity scenario, in one broadcast.
+
+        Strategy prices come from the compiled table as one (products x
+        strategies) array, so the registry's size only widens the arrays.
+
+        `elasticities` is (products x scenarios). Each of SIMULATION_METRICS
+        comes back as a (products x strategies x scenarios) array; `valid`
+        flags the products with a positive cost and current price, the only
+        rows whose values are meaningful.
+        """
+        cost = np.asarray(cost_prices, dtype=float)[:, None, None]
+        current = np.asarray(current_prices, dtype=float)[:, None, None]
+        base_demand = np.asarray(demands, dtype=float)[:, None, None]
+        elasticities = np.asarray(elasticities, dtype=float).reshape(len(cost), 1, -1)
         
-        for strategy_name in self.strategies.keys():
-            result = self.simulate_strategy(product, strategy_name, elasticity)
-            if result:
-                results.append(result)
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            prices = self.table.prices(cost[:, 0, 0], current[:, 0, 0])[:, :, None]
+            demand = base_demand * (prices / current) ** elasticities
+            grid = {
+                'price': prices,
+                'demand': demand,
+                'revenue': prices * demand,
+                'profit': (prices - cost) * demand,
+                'margin': ((prices - cost) / prices) * 100,
+                'price_change': ((prices - current) / current) * 100,
+            }
+        grid = {metric: np.broadcast_to(values, demand.shape) for metric, values in grid.items()}
+        grid['valid'] = (cost[:, 0, 0] > 0) & (current[:, 0, 0] > 0)
+        return grid
+    
+    def top_strategies(self, profit: np.ndarray, k: int) -> np.ndarray:
+        """Strategy indices of the k most profitable strategies along axis 1, best first.
+
+        argpartition picks the k in linear time and only those are sorted.
+        """
+        count = profit.shape[1]
+        k = max(1, min(k, count))
+        key = np.where(np.isnan(profit), np.inf, -profit)
+        if k < count:
+            top = np.argpartition(key, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(count)[None, :, None], profit.shape)
+        order = np.argsort(np.take_along_axis(key, top, axis=1), axis=1, kind='stable')
+        return np.take_along_axis(top, order, axis=1)
+    
+    def simulate_columns(self, product_ids: List[int], cost_prices: np.ndarray, current_prices: np.ndarray,
+                         demands: np.ndarray, elasticities: np.ndarray,
+                         top_k: Optional[int] = None) -> Dict[str, Any]:
+        """Columnar simulation response: one nested (products x top_k x scenarios) list per metric.
+
+        `strategy` holds indices into `strategies`. Products that cannot be
+        simulated are listed under `skipped` instead of producing rows.
+        """
+        grid = self.simulate_grid(cost_prices, current_prices, demands, elasticities)
+        rows = np.flatnonzero(grid['valid'])
+        top = self.top_strategies(grid['profit'][rows], top_k or len(self.strategies))
         
-        # Sort by profit
-        results.sort(key=lambda x: x['profit'], reverse=True)
-        return results
+        columns = {
+            'strategies': list(self.strategies),
+            'product_ids': np.asarray(product_ids)[rows].tolist(),
+            'skipped': np.asarray(product_ids)[~grid['valid']].tolist(),
+            'strategy': top.tolist(),
+        }
+        for metric, decimals in SIMULATION_METRICS.items():
+            columns[metric] = np.round(np.take_along_axis(grid[metric][rows], top, axis=1), decimals).tolist()
+        return columns
 
 class JustificationEngine:
     """Provides transparent explanations for pricing recommendations"""
@@ -381,16 +502,21 @@ class JustificationEngine:
     
     def generate_justification(self, product: Dict, recommended_price: float, 
                              factors_used: List[str]) -> Dict[str, Any]:
-        """Generate comprehensive justification for pricing recommendation"""
+        """Generate comprehensive justification for pricing recommendation.
+
+        Without a positive current price there is no percentage change:
+        price_change_percent is None and the direction compares the prices.
+        """
         current_price = float(product.get('selling_price', 0))
         cost_price = float(product.get('cost_price', 0))
-        price_change = ((recommended_price - current_price) / current_price) * 100
+        price_change = ((recommended_price - current_price) / current_price) * 100 if current_price > 0 else None
+        difference = recommended_price - current_price
         
         justification = {
             'recommended_price': round(recommended_price, 2),
             'current_price': round(current_price, 2),
-            'price_change_percent': round(price_change, 1),
-            'price_change_direction': 'increase' if price_change > 0 else 'decrease' if price_change < 0 else 'no_change',
+            'price_change_percent': round(price_change, 1) if price_change is not None else None,
+            'price_change_direction': 'increase' if difference > 0 else 'decrease' if difference < 0 else 'no_change',
             'factors': [],
             'summary': '',
             'confidence': 0.85
@@ -425,6 +551,8 @@ class JustificationEngine:
     def _generate_summary(self, justification: Dict) -> str:
         """Generate human-readable summary"""
         direction = justification['price_change_direction']
+        if justification['price_change_percent'] is None:
+            return f"Recommended price of ${justification['recommended_price']}; there is no current price to compare with."
         change = abs(justification['price_change_percent'])
         
         if direction == 'no_change':
@@ -435,58 +563,87 @@ class JustificationEngine:
             return f"Recommended price decrease of {change}% to ${justification['recommended_price']} to improve market competitiveness."
 
 # Main optimization function that combines all components
-def advanced_optimize_price(product: Dict) -> Dict[str, Any]:
-    """Advanced price optimization using multiple algorithms"""
+def advanced_optimize_price(product: Dict, ml_optimizer: Optional[MLPriceOptimizer] = None) -> Dict[str, Any]:
+    """Advanced price optimization using multiple algorithms.
+
+    `ml_optimizer` is a trained optimizer, normally the stored model; an
+    untrained one is used when it is missing, keeping the current price.
+    """
+    return advanced_optimize_prices([product], ml_optimizer)[0]
+
+def advanced_optimize_prices(products: List[Dict], ml_optimizer: Optional[MLPriceOptimizer] = None,
+                             features: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+    """advanced_optimize_price for many products in one pass.
+
+    The products' features form one matrix scored by a single predict
+    call, and inventory adjustment and strategy simulation run on arrays,
+    so the cost grows with the matrix instead of with per-product engine
+    objects. Only the response dicts are built product by product.
+    `features` is the products' matrix when already loaded with
+    `ml_optimizer.load_features`, in the same order.
+    """
+    if not products:
+        return []
     
     # Initialize components
     elasticity_analyzer = PriceElasticityAnalyzer()
-    ml_optimizer = MLPriceOptimizer()
+    if ml_optimizer is None:
+        ml_optimizer = MLPriceOptimizer()
     inventory_optimizer = InventoryAwareOptimizer()
     ab_simulator = ABTestingSimulator()
     justification_engine = JustificationEngine()
     
     # Get product data
-    cost_price = float(product.get('cost_price', 0))
-    current_price = float(product.get('selling_price', 0))
+    cost_prices = float_column(products, 'cost_price', 0.0)
+    current_prices = float_column(products, 'selling_price', 0.0)
+    demands = float_column(products, 'demand_forecast_value', 100.0)
     
-    # Calculate elasticity (simplified - in real app would use historical data)
-    elasticity = -1.5  # Default elasticity
+    # Elasticities estimated from the products' stored price/quantity history
+    default = {'elasticity': DEFAULT_ELASTICITY, 'source': 'default', 'shrinkage_weight': 0.0}
+    product_ids = [int(product['id']) for product in products if product.get('id') is not None]
+    known = elasticity_analyzer.estimate_elasticities(product_ids) if product_ids else {}
+    estimates = [known[int(product['id'])] if product.get('id') is not None else default for product in products]
+    elasticities = np.array([estimate['elasticity'] for estimate in estimates], dtype=float)
     
     # Get inventory status
-    inventory_status = inventory_optimizer.get_inventory_status(product)
+    status_codes = inventory_optimizer.inventory_status_codes(float_column(products, 'stock_available', 0.0), demands)
     
     # ML-based price prediction
-    ml_price, ml_confidence = ml_optimizer.predict_optimal_price(product)
-    
-    # Inventory-aware adjustment
-    inventory_adjusted_price = inventory_optimizer.adjust_price_for_inventory(
-        ml_price, inventory_status, float(product.get('demand_forecast_value', 100)), elasticity
-    )
+    if features is None:
+        features = ml_optimizer.feature_matrix(products)
+    ml_prices, ml_confidences = ml_optimizer.predict_optimal_prices(features, cost_prices, current_prices)
     
-    # Final recommended price
-    recommended_price = inventory_adjusted_price
+    # Inventory-aware adjustment gives the final recommended price
+    recommended_prices = inventory_optimizer.adjust_prices_for_inventory(ml_prices, status_codes)
     
     # Generate A/B testing results
-    ab_results = ab_simulator.compare_strategies(product, elasticity)
+    ab_results = ab_simulator.compare_strategy_matrix(cost_prices, current_prices, demands, elasticities)
     
-    # Generate justification
     factors_used = ['cost_based', 'demand_elasticity', 'inventory_levels']
-    justification = justification_engine.generate_justification(
-        product, recommended_price, factors_used
-    )
-    
-    return {
-        'recommended_price': round(recommended_price, 2),
-        'current_price': round(current_price, 2),
-        'elasticity': elasticity,
-        'inventory_status': inventory_status,
-        'ml_confidence': round(ml_confidence, 3),
-        'ab_testing_results': ab_results,
-        'justification': justification,
-        'optimization_factors': {
-            'cost_price': cost_price,
-            'demand_forecast': product.get('demand_forecast_value', 0),
-            'stock_level': product.get('stock_available', 0),
-            'customer_rating': product.get('customer_rating', 0)
-        }
-    } 
\ No newline at end of file
+    results = []
+    for product, estimate, code, recommended_price, current_price, cost_price, ml_confidence, strategies in zip(
+        products, estimates, status_codes.tolist(), recommended_prices.tolist(), current_prices.tolist(),
+        cost_prices.tolist(), ml_confidences.tolist(), ab_results
+    ):
+        # Generate justification
+        justification = justification_engine.generate_justification(
+            product, recommended_price, factors_used
+        )
+        results.append({
+            'recommended_price': round(recommended_price, 2),
+            'current_price': round(current_price, 2),
+            'elasticity': estimate['elasticity'],
+            'elasticity_source': estimate['source'],
+            'elasticity_shrinkage_weight': estimate['shrinkage_weight'],
+            'inventory_status': INVENTORY_STATUSES[code],
+            'ml_confidence': round(ml_confidence, 3),
+            'ab_testing_results': strategies,
+            'justification': justification,
+            'optimization_factors': {
+                'cost_price': cost_price,
+                'demand_forecast': product.get('demand_forecast_value', 0),
+                'stock_level': product.get('stock_available', 0),
+                'customer_rating': product.get('customer_rating', 0)
+            }
+        })
+    return results
@@ -3,29 +3,46 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.core.exceptions import ValidationError
+from django.conf import settings
 import logging
-from .models import Product
+import numpy as np
+from django.db import IntegrityError, transaction
+from .models import Product, PricingExperiment, ExperimentArm
 from .serializers import ProductListSerializer
 from .advanced_optimization import (
     PriceElasticityAnalyzer,
-    MLPriceOptimizer,
     ABTestingSimulator,
-    advanced_optimize_price
+    InventoryAwareOptimizer,
+    advanced_optimize_price,
+    advanced_optimize_prices,
+    DEFAULT_ELASTICITY_SCENARIOS,
+    MAX_ELASTICITY_SCENARIOS,
+    MAX_ELASTICITY_MULTIPLIER,
+    INVENTORY_STATUSES
 )
+from .features import load_price_columns
+from .inventory import inventory_status_counts, products_with_status
+from .model_store import get_pricing_model, model_summary
+from .experiments import parse_events, record_events, get_sampler, invalidate_sampler, experiment_summary
 
 logger = logging.getLogger(__name__)
 
+# Products listed per inventory status by default, and at most, in inventory-analysis/
+DEFAULT_INVENTORY_LIST_LIMIT = 100
+MAX_INVENTORY_LIST_LIMIT = 1000
+
+# Decisions one assignment request may ask for
+MAX_ASSIGNMENTS_PER_REQUEST = 1000
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def elasticity_heatmap_view(request):
     """Get elasticity heatmap data for all products"""
     try:
-        products = Product.objects.all()
-        serializer = ProductListSerializer(products, many=True)
-        product_data = serializer.data
-        
+        # Counted per category in SQL; ?products=true adds per-product range histograms
+        product_bins = request.query_params.get('products', '').lower() in ('1', 'true', 'yes')
         analyzer = PriceElasticityAnalyzer()
-        heatmap_data = analyzer.get_elasticity_heatmap(product_data)
+        heatmap_data = analyzer.get_elasticity_heatmap(product_bins=product_bins)
         
         return Response({
             'success': True,
@@ -60,21 +77,15 @@ def ml_optimize_price_view(request):
                 'error': 'Product not found'
             }, status=status.HTTP_404_NOT_FOUND)
         
-        # Get all products for ML training
-        all_products = Product.objects.all()
-        all_serializer = ProductListSerializer(all_products, many=True)
-        all_product_data = all_serializer.data
-        
-        # Train ML model
-        ml_optimizer = MLPriceOptimizer()
-        ml_optimizer.train_model(all_product_data)
+        # Stored model, loaded once per worker; trained out-of-band by `manage.py train_pricing_model`
+        ml_optimizer, manifest = get_pricing_model()
         
         # Get optimization for specific product
         product_serializer = ProductListSerializer(product)
         product_data = product_serializer.data
         
         # Ensure the ML model is trained before optimization
-        if not ml_optimizer.is_trained:
+        if ml_optimizer is None or not ml_optimizer.is_trained:
             # Fallback optimization if ML training fails
             cost_price = float(product_data.get('cost_price', 0))
             current_price = float(product_data.get('selling_price', 0))
@@ -123,11 +134,12 @@ def ml_optimize_price_view(request):
                 }
             }
         else:
-            optimization_result = advanced_optimize_price(product_data)
+            optimization_result = advanced_optimize_price(product_data, ml_optimizer)
         
         return Response({
             'success': True,
             'data': optimization_result,
+            'model': model_summary(manifest),
             'message': 'ML price optimization completed successfully'
         })
         
@@ -164,10 +176,11 @@ def ab_testing_simulator_view(request):
         product_data = product_serializer.data
         
         simulator = ABTestingSimulator()
+        elasticity = PriceElasticityAnalyzer().estimate_elasticities([product.id])[product.id]['elasticity']
         
         if strategy_name:
             # Simulate specific strategy
-            result = simulator.simulate_strategy(product_data, strategy_name)
+            result = simulator.simulate_strategy(product_data, strategy_name, elasticity)
             if not result:
                 return Response({
                     'success': False,
@@ -181,7 +194,7 @@ def ab_testing_simulator_view(request):
             })
         else:
             # Compare all strategies
-            results = simulator.compare_strategies(product_data)
+            results = simulator.compare_strategies(product_data, elasticity)
             
             return Response({
                 'success': True,
@@ -206,80 +219,131 @@ def ab_testing_simulator_view(request):
             'error': 'Failed to simulate A/B testing'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def strategy_simulation_view(request):
+    """Simulate every pricing strategy for many products under several elasticity scenarios"""
+    try:
+        product_ids = request.data.get('product_ids', [])
+        scenarios = request.data.get('scenarios', list(DEFAULT_ELASTICITY_SCENARIOS))
+        top_k = request.data.get('top_k')
+        max_products = getattr(settings, 'STRATEGY_SIMULATION_MAX_PRODUCTS', 10000)
+        
+        if not isinstance(product_ids, list) or not product_ids:
+            return Response({
+                'success': False,
+                'error': 'Product IDs are required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if not all(isinstance(product_id, int) and not isinstance(product_id, bool) for product_id in product_ids):
+            return Response({
+                'success': False,
+                'error': 'product_ids must be a list of integers'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if len(product_ids) > max_products:
+            return Response({
+                'success': False,
+                'error': f'At most {max_products} products per request'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if (not isinstance(scenarios, list) or not 1 <= len(scenarios) <= MAX_ELASTICITY_SCENARIOS
+                or not all(isinstance(s, (int, float)) and not isinstance(s, bool) for s in scenarios)):
+            return Response({
+                'success': False,
+                'error': f'scenarios must be a list of 1 to {MAX_ELASTICITY_SCENARIOS} elasticity multipliers'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if not all(0 < s <= MAX_ELASTICITY_MULTIPLIER for s in scenarios):
+            return Response({
+                'success': False,
+                'error': f'scenarios must be greater than 0 and at most {MAX_ELASTICITY_MULTIPLIER:g}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if top_k is not None and (isinstance(top_k, bool) or not isinstance(top_k, int) or top_k < 1):
+            return Response({
+                'success': False,
+                'error': 'top_k must be a positive integer'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        ids, cost_prices, current_prices, demands = load_price_columns(Product.objects.filter(id__in=product_ids))
+        if not len(ids):
+            return Response({
+                'success': False,
+                'error': 'No valid products found'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        # Each scenario scales the product's own pooled elasticity estimate
+        estimates = PriceElasticityAnalyzer().estimate_elasticities(ids.tolist())
+        base = np.array([estimates[product_id]['elasticity'] for product_id in ids.tolist()])
+        elasticities = base[:, None] * np.asarray(scenarios, dtype=float)[None, :]
+        
+        data = ABTestingSimulator().simulate_columns(ids, cost_prices, current_prices, demands, elasticities, top_k)
+        valid = np.isin(ids, data['product_ids'])
+        data['scenarios'] = scenarios
+        data['elasticity'] = np.round(elasticities[valid], 3).tolist()
+        
+        return Response({
+            'success': True,
+            'data': data,
+            'message': f'Simulated {len(data["strategies"])} strategies for {len(data["product_ids"])} products'
+        })
+        
+    except Exception as e:
+        logger.error(f"Error in strategy simulation: {str(e)}")
+        return Response({
+            'success': False,
+            'error': 'Failed to simulate strategies'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def inventory_analysis_view(request):
-    """Get inventory analysis for all products"""
+    """Get inventory analysis for all products.
+
+    Counts come from one GROUP BY over the stored inventory_status and
+    each status lists its `?limit=` most urgent products through the
+    status index; `?status=` restricts the lists to one status.
+    """
     try:
-        products = Product.objects.all()
-        serializer = ProductListSerializer(products, many=True)
-        product_data = serializer.data
+        selected = request.query_params.get('status')
+        if selected is not None and selected not in INVENTORY_STATUSES:
+            return Response({
+                'success': False,
+                'error': f"status must be one of {', '.join(INVENTORY_STATUSES)}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = int(request.query_params.get('limit', DEFAULT_INVENTORY_LIST_LIMIT))
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= MAX_INVENTORY_LIST_LIMIT:
+            return Response({
+                'success': False,
+                'error': f'limit must be an integer between 1 and {MAX_INVENTORY_LIST_LIMIT}'
+            }, status=status.HTTP_400_BAD_REQUEST)
         
+        counts = inventory_status_counts()
+        listed = [selected] if selected else INVENTORY_STATUSES
         inventory_analysis = {
-            'total_products': len(product_data),
-            'inventory_status': {
-                'low': 0,
-                'medium': 0,
-                'adequate': 0,
-                'high': 0,
-                'unknown': 0
-            },
+            'total_products': sum(counts.values()),
+            'inventory_status': counts,
             'products_by_status': {
-                'low': [],
-                'medium': [],
-                'adequate': [],
-                'high': [],
-                'unknown': []
+                inventory_status: products_with_status(inventory_status, limit) for inventory_status in listed
             },
+            'limit': limit,
             'recommendations': []
         }
         
-        from .advanced_optimization import InventoryAwareOptimizer
-        inventory_optimizer = InventoryAwareOptimizer()
-        
-        for product in product_data:
-            # Use demand_forecast_value as demand forecast if available, otherwise use units_sold
-            demand_forecast = product.get('demand_forecast_value', product.get('units_sold', 100))
-            # Ensure demand_forecast is numeric
-            try:
-                demand_forecast = float(demand_forecast) if demand_forecast is not None else 100
-            except (ValueError, TypeError):
-                demand_forecast = 100
-            
-            # Ensure stock_available is numeric
-            try:
-                stock_available = float(product['stock_available']) if product['stock_available'] is not None else 0
-            except (ValueError, TypeError):
-                stock_available = 0
-            
-            status = inventory_optimizer.get_inventory_status(product)
-            inventory_analysis['inventory_status'][status] += 1
-            inventory_analysis['products_by_status'][status].append({
-                'id': product['id'],
-                'name': product['name'],
-                'category': product['category'],
-                'stock': stock_available,
-                'demand': demand_forecast,
-                'stock_ratio': round(stock_available / max(demand_forecast, 1), 2)
-            })
-        
         # Generate recommendations
-        low_stock_products = inventory_analysis['products_by_status']['low']
-        if low_stock_products:
+        if counts['low']:
             inventory_analysis['recommendations'].append({
                 'type': 'low_stock',
-                'message': f'{len(low_stock_products)} products have low stock levels',
+                'message': f"{counts['low']} products have low stock levels",
                 'action': 'Consider increasing prices or restocking',
-                'products': low_stock_products[:5]  # Top 5
+                'products': products_with_status('low', 5)  # Top 5
             })
         
-        high_stock_products = inventory_analysis['products_by_status']['high']
-        if high_stock_products:
+        if counts['high']:
             inventory_analysis['recommendations'].append({
                 'type': 'high_stock',
-                'message': f'{len(high_stock_products)} products have excess stock',
+                'message': f"{counts['high']} products have excess stock",
                 'action': 'Consider promotional pricing or bundling',
-                'products': high_stock_products[:5]  # Top 5
+                'products': products_with_status('high', 5)  # Top 5
             })
         
         return Response({
@@ -309,30 +373,26 @@ def batch_optimization_view(request):
                 'error': 'Product IDs are required'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        products = Product.objects.filter(id__in=product_ids)
+        products = Product.objects.filter(id__in=product_ids).order_by('id')
         if not products.exists():
             return Response({
                 'success': False,
                 'error': 'No valid products found'
             }, status=status.HTTP_404_NOT_FOUND)
         
-        serializer = ProductListSerializer(products, many=True)
-        product_data = serializer.data
-        
         results = []
         
+        manifest = None
         if optimization_type == 'ml':
-            # Train ML model on all products first
-            all_products = Product.objects.all()
-            all_serializer = ProductListSerializer(all_products, many=True)
-            all_product_data = all_serializer.data
-            
-            ml_optimizer = MLPriceOptimizer()
-            ml_optimizer.train_model(all_product_data)
+            product_data = ProductListSerializer(products, many=True).data
+            ml_optimizer, manifest = get_pricing_model()
             
-            # Optimize each product
-            for product in product_data:
-                optimization_result = advanced_optimize_price(product)
+            # One feature matrix, read from the database in product_data's order, and one predict call
+            features = None
+            if ml_optimizer is not None and ml_optimizer.is_trained:
+                features = ml_optimizer.load_features(products)[1]
+            optimizations = advanced_optimize_prices(product_data, ml_optimizer, features)
+            for product, optimization_result in zip(product_data, optimizations):
                 results.append({
                     'product_id': product['id'],
                     'product_name': product['name'],
@@ -340,9 +400,12 @@ def batch_optimization_view(request):
                 })
         
         elif optimization_type == 'ab_testing':
+            product_data = ProductListSerializer(products, many=True).data
             simulator = ABTestingSimulator()
-            for product in product_data:
-                ab_results = simulator.compare_strategies(product)
+            estimates = PriceElasticityAnalyzer().estimate_elasticities([product['id'] for product in product_data])
+            elasticities = [estimates[product['id']]['elasticity'] for product in product_data]
+            strategies = simulator.compare_strategies_batch(product_data, elasticities)
+            for product, ab_results in zip(product_data, strategies):
                 results.append({
                     'product_id': product['id'],
                     'product_name': product['name'],
@@ -351,20 +414,18 @@ def batch_optimization_view(request):
                 })
         
         elif optimization_type == 'inventory':
-            from .advanced_optimization import InventoryAwareOptimizer
-            inventory_optimizer = InventoryAwareOptimizer()
+            # The stored status replaces serializing and classifying every product
+            rows = list(products.values_list('id', 'name', 'selling_price', 'inventory_status'))
+            codes = np.array([INVENTORY_STATUSES.index(row[3]) for row in rows], dtype=np.int64)
+            current_prices = np.array([float(row[2]) for row in rows])
+            adjusted_prices = InventoryAwareOptimizer().adjust_prices_for_inventory(current_prices, codes)
             
-            for product in product_data:
-                status = inventory_optimizer.get_inventory_status(product)
-                current_price = float(product['selling_price'])
-                adjusted_price = inventory_optimizer.adjust_price_for_inventory(
-                    current_price, status, float(product.get('demand_forecast_value', 100)), -1.5
-                )
-                
+            for (product_id, name, _, inventory_status), current_price, adjusted_price in zip(
+                    rows, current_prices.tolist(), adjusted_prices.tolist()):
                 results.append({
-                    'product_id': product['id'],
-                    'product_name': product['name'],
-                    'inventory_status': status,
+                    'product_id': product_id,
+                    'product_name': name,
+                    'inventory_status': inventory_status,
                     'current_price': current_price,
                     'recommended_price': round(adjusted_price, 2),
                     'price_change': round(((adjusted_price - current_price) / current_price) * 100, 1)
@@ -375,7 +436,8 @@ def batch_optimization_view(request):
             'data': {
                 'optimization_type': optimization_type,
                 'products_processed': len(results),
-                'results': results
+                'results': results,
+                'model': model_summary(manifest)
             },
             'message': f'Batch {optimization_type} optimization completed successfully'
         })
@@ -415,18 +477,14 @@ def optimization_dashboard_view(request):
             category_products = [p for p in product_data if p['category'] == category]
             categories[category]['avg_margin'] = sum(float(p.get('profit_margin', 0)) for p in category_products) / len(category_products)
         
-        # Get elasticity heatmap
+        # Get elasticity heatmap from the category counts above
         analyzer = PriceElasticityAnalyzer()
-        heatmap_data = analyzer.get_elasticity_heatmap(product_data)
-        
-        # Get inventory analysis
-        from .advanced_optimization import InventoryAwareOptimizer
-        inventory_optimizer = InventoryAwareOptimizer()
-        inventory_status = {'low': 0, 'medium': 0, 'adequate': 0, 'high': 0}
+        heatmap_data = analyzer.get_elasticity_heatmap(
+            {category: values['count'] for category, values in categories.items()}
+        )
         
-        for product in product_data:
-            status = inventory_optimizer.get_inventory_status(product)
-            inventory_status[status] += 1
+        # Inventory status counts from one GROUP BY over the stored column
+        inventory_status = inventory_status_counts()
         
         dashboard_data = {
             'overview': {
@@ -457,4 +515,216 @@ def optimization_dashboard_view(request):
         return Response({
             'success': False,
             'error': 'Failed to generate optimization dashboard'
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR) 
\ No newline at end of file
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR) 
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def create_experiment_view(request):
+    """Create a running price experiment with its arms"""
+    try:
+        name = request.data.get('name')
+        product_id = request.data.get('product_id')
+        arms = request.data.get('arms')
+        
+        # Limits of the columns the experiment is stored in
+        max_name_length = PricingExperiment._meta.get_field('name').max_length
+        max_arm_name_length = ExperimentArm._meta.get_field('name').max_length
+        price_field = ExperimentArm._meta.get_field('price')
+        max_price = 10 ** (price_field.max_digits - price_field.decimal_places)
+        
+        if not isinstance(name, str) or not name.strip():
+            return Response({
+                'success': False,
+                'error': 'Experiment name is required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if len(name.strip()) > max_name_length:
+            return Response({
+                'success': False,
+                'error': f'Experiment name must be at most {max_name_length} characters'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if product_id is not None and (isinstance(product_id, bool) or not isinstance(product_id, int)):
+            return Response({
+                'success': False,
+                'error': 'product_id must be an integer'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(arms, list) or len(arms) < 2:
+            return Response({
+                'success': False,
+                'error': 'At least two arms are required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        for arm in arms:
+            price = arm.get('price') if isinstance(arm, dict) else None
+            if (not isinstance(arm, dict) or not isinstance(arm.get('name'), str) or not arm['name']
+                    or len(arm['name']) > max_arm_name_length
+                    or isinstance(price, bool) or not isinstance(price, (int, float))
+                    or not 0 < round(price, 2) < max_price):
+                return Response({
+                    'success': False,
+                    'error': (f'Each arm needs a name of at most {max_arm_name_length} characters '
+                              f'and a positive price below {max_price}')
+                }, status=status.HTTP_400_BAD_REQUEST)
+        if len({arm['name'] for arm in arms}) != len(arms):
+            return Response({
+                'success': False,
+                'error': 'Arm names must be unique'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if product_id is not None and not Product.objects.filter(id=product_id).exists():
+            return Response({
+                'success': False,
+                'error': 'Product not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        try:
+            with transaction.atomic():
+                experiment = PricingExperiment.objects.create(name=name.strip(), product_id=product_id)
+                ExperimentArm.objects.bulk_create([
+                    ExperimentArm(experiment=experiment, name=arm['name'], price=round(float(arm['price']), 2))
+                    for arm in arms
+                ])
+        except IntegrityError:
+            return Response({
+                'success': False,
+                'error': f'Experiment {name.strip()!r} already exists'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        experiment.refresh_from_db()
+        return Response({
+            'success': True,
+            'data': experiment_summary(experiment),
+            'message': 'Experiment created successfully'
+        }, status=status.HTTP_201_CREATED)
+        
+    except Exception as e:
+        logger.error(f"Error creating experiment: {str(e)}")
+        return Response({
+            'success': False,
+            'error': 'Failed to create experiment'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def experiment_detail_view(request, pk):
+    """Experiment results: per-arm counters, conversion and probability of being best"""
+    try:
+        experiment = PricingExperiment.objects.filter(pk=pk).first()
+        if experiment is None:
+            return Response({
+                'success': False,
+                'error': 'Experiment not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        return Response({
+            'success': True,
+            'data': experiment_summary(experiment)
+        })
+        
+    except Exception as e:
+        logger.error(f"Error loading experiment {pk}: {str(e)}")
+        return Response({
+            'success': False,
+            'error': 'Failed to load experiment'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def experiment_events_view(request, pk):
+    """Ingest a batch of exposure and purchase events"""
+    try:
+        events = request.data.get('events')
+        max_events = getattr(settings, 'EXPERIMENT_EVENTS_MAX_BATCH', 10000)
+        if not isinstance(events, list) or not events:
+            return Response({
+                'success': False,
+                'error': 'events must be a non-empty list'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if len(events) > max_events:
+            return Response({
+                'success': False,
+                'error': f'At most {max_events} events per request'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        experiment_status = PricingExperiment.objects.filter(pk=pk).values_list('status', flat=True).first()
+        if experiment_status is None:
+            return Response({
+                'success': False,
+                'error': 'Experiment not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+        # A stopped experiment's results are final
+        if experiment_status != 'running':
+            return Response({
+                'success': False,
+                'error': 'Experiment is not running'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        arms = {}
+        for arm in ExperimentArm.objects.filter(experiment_id=pk):
+            arms.setdefault(arm.name, arm)
+            arms[str(arm.pk)] = arm
+        
+        rows, errors = parse_events(events, arms)
+        if errors:
+            return Response({
+                'success': False,
+                'error': 'Invalid events',
+                'details': errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        totals = record_events(rows)
+        invalidate_sampler(pk)
+        
+        return Response({
+            'success': True,
+            'data': {
+                'ingested': len(rows),
+                'arms': {str(arm_id): total for arm_id, total in totals.items()}
+            },
+            'message': f'Ingested {len(rows)} events'
+        }, status=status.HTTP_201_CREATED)
+        
+    except Exception as e:
+        logger.error(f"Error ingesting experiment events: {str(e)}")
+        return Response({
+            'success': False,
+            'error': 'Failed to ingest events'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def experiment_assign_view(request, pk):
+    """Assign arms by Thompson sampling over the cached counters (?count= for several decisions)"""
+    try:
+        try:
+            count = int(request.query_params.get('count', 1))
+        except ValueError:
+            count = 0
+        if not 1 <= count <= MAX_ASSIGNMENTS_PER_REQUEST:
+            return Response({
+                'success': False,
+                'error': f'count must be an integer between 1 and {MAX_ASSIGNMENTS_PER_REQUEST}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        sampler = get_sampler(pk)
+        if sampler is None:
+            return Response({
+                'success': False,
+                'error': 'No running experiment with arms found'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        chosen = sampler.choose(count).tolist()
+        return Response({
+            'success': True,
+            'data': {
+                'experiment_id': pk,
+                'assignments': [
+                    {'arm_id': sampler.arm_ids[i], 'arm': sampler.names[i], 'price': float(sampler.prices[i])}
+                    for i in chosen
+                ]
+            }
+        })
+        
+    except Exception as e:
+        logger.error(f"Error assigning experiment {pk} arms: {str(e)}")
+        return Response({
+            'success': False,
+            'error': 'Failed to assign arms'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -3,3 +3,8 @@ from django.apps import AppConfig
 class ProductsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'products'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .forecasts import get_ensemble_weights
+        get_ensemble_weights()
@@ -0,0 +1,114 @@
+import json
+import time
+import logging
+import numpy as np
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from .forecasts import BatchForecaster, ENSEMBLE_METHODS
+
+logger = logging.getLogger(__name__)
+
+BACKTEST_METHODS = ENSEMBLE_METHODS + ('ensemble',)
+DEFAULT_ORIGINS = 10
+MIN_TRAIN_PERIODS = 2
+
+# Categories with fewer evaluated forecasts keep the default weights
+MIN_CATEGORY_SAMPLES = 30
+
+# Floor on the per-method MSE so a perfect fit cannot take all the weight by division by zero
+MIN_METHOD_MSE = 1e-6
+
+def rolling_origin_backtest(forecaster: BatchForecaster, categories: List[str], origins: int = DEFAULT_ORIGINS,
+                            min_history: int = MIN_TRAIN_PERIODS,
+                            weights: Optional[np.ndarray] = None) -> Dict[str, Any]:
+    """One-step-ahead errors of every method from the last `origins` forecast origins.
+
+    At origin h each history loses its last h observations, every method
+    forecasts the next one for the whole catalog in one batched pass, and
+    the errors are accumulated per category with bincount. Only rows with
+    at least `min_history` observations left are scored. `weights` is the
+    optional (products x methods) ensemble weight matrix to evaluate.
+    MAPE skips zero actuals.
+    """
+    start = time.perf_counter()
+    labels, codes = np.unique(np.asarray(categories, dtype=str), return_inverse=True)
+    codes = codes.ravel()
+    shape = (len(BACKTEST_METHODS), len(labels))
+    squared = np.zeros(shape)
+    percentage = np.zeros(shape)
+    counts = np.zeros(len(labels))
+    percentage_counts = np.zeros(len(labels))
+
+    for origin in range(1, origins + 1):
+        rows = np.flatnonzero(forecaster.lengths - origin >= min_history)
+        if not rows.size:
+            break
+        train, actual = forecaster.holdout(origin, rows)
+        columns = train.ensemble_forecast(weights=weights[rows] if weights is not None else None)
+
+        row_codes = codes[rows]
+        nonzero = actual != 0
+        counts += np.bincount(row_codes, minlength=len(labels))
+        percentage_counts += np.bincount(row_codes[nonzero], minlength=len(labels))
+        for m, method in enumerate(BACKTEST_METHODS):
+            error = columns[method] - actual
+            squared[m] += np.bincount(row_codes, weights=error ** 2, minlength=len(labels))
+            percentage[m] += np.bincount(
+                row_codes[nonzero], weights=np.abs(error[nonzero] / actual[nonzero]), minlength=len(labels)
+            )
+
+    def summarize(sq, pct, n, pct_n):
+        return {
+            method: {
+                'rmse': round(float(np.sqrt(sq[m] / n)), 4) if n else None,
+                'mape': round(float(pct[m] / pct_n * 100), 4) if pct_n else None,
+            }
+            for m, method in enumerate(BACKTEST_METHODS)
+        }
+
+    report = {
+        'origins': origins,
+        'samples': int(counts.sum()),
+        'overall': summarize(squared.sum(axis=1), percentage.sum(axis=1), counts.sum(), percentage_counts.sum()),
+        'categories': {
+            str(label): dict(
+                summarize(squared[:, c], percentage[:, c], counts[c], percentage_counts[c]),
+                samples=int(counts[c]),
+            )
+            for c, label in enumerate(labels)
+        },
+    }
+    report['elapsed_seconds'] = round(time.perf_counter() - start, 4)
+    logger.info(f"Backtested {len(forecaster)} series over {origins} origins in {report['elapsed_seconds']}s")
+    return report
+
+def learn_ensemble_weights(report: Dict[str, Any],
+                           min_samples: int = MIN_CATEGORY_SAMPLES) -> Dict[str, Dict[str, float]]:
+    """Inverse-MSE ensemble weights per category from a backtest report.
+
+    Each method's weight is proportional to 1 / MSE over the category's
+    backtest forecasts. Categories with too few samples are left out and
+    keep the default weights.
+    """
+    weights = {}
+    for category, metrics in report['categories'].items():
+        if metrics['samples'] < min_samples:
+            continue
+        inverse = np.array([
+            1.0 / max(metrics[method]['rmse'] ** 2, MIN_METHOD_MSE) for method in ENSEMBLE_METHODS
+        ])
+        inverse /= inverse.sum()
+        weights[category] = {method: round(float(w), 4) for method, w in zip(ENSEMBLE_METHODS, inverse)}
+    return weights
+
+def save_ensemble_weights(path, weights: Dict[str, Dict[str, float]], report: Dict[str, Any]):
+    """Write learned weights and the backtest metrics they came from"""
+    payload = {
+        'generated_at': datetime.now(timezone.utc).isoformat(),
+        'origins': report['origins'],
+        'samples': report['samples'],
+        'categories': weights,
+        'metrics': {'overall': report['overall'], 'categories': report['categories']},
+    }
+    with open(path, 'w') as handle:
+        json.dump(payload, handle, indent=2, sort_keys=True)
@@ -0,0 +1,211 @@
+import json
+import time
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+class LocalLRUCache:
+    """Thread-safe in-process LRU cache with an optional per-entry timeout"""
+
+    def __init__(self, max_entries: int = 10000, timeout: Optional[float] = None):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        found = {}
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                value, expires_at = entry
+                if expires_at is not None and expires_at <= now:
+                    del self._entries[key]
+                    continue
+                self._entries.move_to_end(key)
+                found[key] = value
+        return found
+
+    def set_many(self, mapping: Dict[str, Any], timeout: Optional[float] = None):
+        timeout = self.timeout if timeout is None else timeout
+        expires_at = time.monotonic() + timeout if timeout is not None else None
+        with self._lock:
+            for key, value in mapping.items():
+                self._entries[key] = (value, expires_at)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete_many(self, keys: Iterable[str]):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+class DjangoCacheBackend:
+    """Adapter over a configured Django cache alias (shared across workers)"""
+
+    def __init__(self, alias: str = 'default', timeout: Optional[float] = None):
+        self.cache = caches[alias]
+        self.timeout = timeout
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        return self.cache.get_many(list(keys))
+
+    def set_many(self, mapping: Dict[str, Any], timeout: Optional[float] = None):
+        self.cache.set_many(mapping, timeout=self.timeout if timeout is None else timeout)
+
+    def delete_many(self, keys: Iterable[str]):
+        self.cache.delete_many(list(keys))
+
+    def clear(self):
+        # Clears the whole alias, so point the setting at a dedicated cache
+        self.cache.clear()
+
+    def __len__(self):
+        return 0
+
+def _ordered(value: Any) -> Any:
+    """Dicts as [key, value] pairs in insertion order, so the order reaches the hash"""
+    if isinstance(value, dict):
+        return [[str(key), _ordered(item)] for key, item in value.items()]
+    if isinstance(value, (list, tuple)):
+        return [_ordered(item) for item in value]
+    return value
+
+class ForecastCache:
+    """Forecast results keyed by a content hash of the history.
+
+    Entries are shared by every product with the same history and
+    parameters. Each product also keeps an index of the keys it populated so
+    that saving or deleting it can evict them.
+    """
+
+    def __init__(self, backend, prefix: str = 'forecast'):
+        self.backend = backend
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def make_key(self, history: Any, **params) -> str:
+        """Key of a history and forecast parameters.
+
+        The history is hashed in insertion order rather than with sorted
+        keys, so distinct stored histories never share a key; only the
+        parameters are sorted.
+        """
+        payload = json.dumps([_ordered(history), sorted(params.items())], default=str)
+        digest = hashlib.sha256(payload.encode('utf-8')).hexdigest()
+        return f"{self.prefix}:{digest}"
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        found = self.backend.get_many(set(keys))
+        hits = sum(1 for key in keys if key in found)
+        with self._lock:
+            self.hits += hits
+            self.misses += len(keys) - hits
+        return found
+
+    def set_many(self, mapping: Dict[str, Any], product_ids: Optional[Dict[str, int]] = None):
+        self.backend.set_many(mapping)
+        if not product_ids:
+            return
+
+        # Record which keys each product populated, for invalidation
+        index = {}
+        for key, product_id in product_ids.items():
+            if product_id is not None and key in mapping:
+                index.setdefault(self._index_key(product_id), set()).add(key)
+        existing = self.backend.get_many(index.keys())
+        for index_key, keys in index.items():
+            keys.update(existing.get(index_key, ()))
+        self.backend.set_many({index_key: sorted(keys) for index_key, keys in index.items()}, timeout=None)
+
+    def invalidate_product(self, product_id: int):
+        index_key = self._index_key(product_id)
+        keys = self.backend.get_many([index_key]).get(index_key, [])
+        self.backend.delete_many(list(keys) + [index_key])
+        if keys:
+            logger.debug(f"Invalidated {len(keys)} cached forecasts for product {product_id}")
+
+    def clear(self):
+        self.backend.clear()
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+            'entries': len(self.backend),
+        }
+
+    def _index_key(self, product_id: int) -> str:
+        return f"{self.prefix}:product:{product_id}"
+
+_forecast_cache = None
+_forecast_cache_lock = threading.Lock()
+
+def build_cache_backend(backend: str, max_entries: int, timeout: Optional[float], alias: str = 'default'):
+    """Build a 'local' (in-process LRU) or 'django' cache backend"""
+    if backend == 'django':
+        return DjangoCacheBackend(alias, timeout)
+    if backend != 'local':
+        raise ValueError(f"Unknown cache backend '{backend}', expected 'local' or 'django'")
+    return LocalLRUCache(max_entries, timeout)
+
+def get_forecast_cache() -> ForecastCache:
+    """Process-wide forecast cache configured from settings"""
+    global _forecast_cache
+    if _forecast_cache is None:
+        with _forecast_cache_lock:
+            if _forecast_cache is None:
+                backend = build_cache_backend(
+                    getattr(settings, 'FORECAST_CACHE_BACKEND', 'local'),
+                    getattr(settings, 'FORECAST_CACHE_MAX_ENTRIES', 50000),
+                    getattr(settings, 'FORECAST_CACHE_TIMEOUT', None),
+                    getattr(settings, 'FORECAST_CACHE_ALIAS', 'default'),
+                )
+                _forecast_cache = ForecastCache(backend)
+    return _forecast_cache
+
+_elasticity_cache = None
+
+def get_elasticity_cache():
+    """Cache of per-product elasticity estimates, entries expiring after a TTL.
+
+    The Django backend is the default so that evicting a product's estimate
+    reaches every worker sharing the cache alias.
+    """
+    global _elasticity_cache
+    if _elasticity_cache is None:
+        with _forecast_cache_lock:
+            if _elasticity_cache is None:
+                _elasticity_cache = build_cache_backend(
+                    getattr(settings, 'ELASTICITY_CACHE_BACKEND', 'django'),
+                    getattr(settings, 'ELASTICITY_CACHE_MAX_ENTRIES', 50000),
+                    getattr(settings, 'ELASTICITY_CACHE_TIMEOUT', 600),
+                    getattr(settings, 'ELASTICITY_CACHE_ALIAS', 'default'),
+                )
+    return _elasticity_cache
@@ -0,0 +1,79 @@
+import logging
+import numpy as np
+from typing import List, Optional, Tuple
+from .models import DemandObservation
+from .forecasts import BatchForecaster, parse_series
+
+logger = logging.getLogger(__name__)
+
+# Above this many ids it is cheaper to scan every series than to bind an IN list
+DEMAND_ID_FILTER_LIMIT = 900
+
+def sync_demand_observations(product) -> None:
+    """Mirror a product's demand_forecast blob into DemandObservation rows.
+
+    Only the difference is written: new periods are inserted, changed
+    quantities updated and vanished periods deleted.
+    """
+    periods, quantities = parse_series(product.demand_forecast)
+    wanted = {int(period): quantity for period, quantity in zip(periods, quantities)}
+    existing = {
+        observation.period: observation
+        for observation in DemandObservation.objects.filter(product_id=product.pk)
+    }
+
+    stale = [observation.pk for period, observation in existing.items() if period not in wanted]
+    created = []
+    changed = []
+    for period, quantity in wanted.items():
+        observation = existing.get(period)
+        if observation is None:
+            created.append(DemandObservation(product_id=product.pk, period=period, quantity=quantity))
+        elif observation.quantity != quantity:
+            observation.quantity = quantity
+            changed.append(observation)
+
+    if stale:
+        DemandObservation.objects.filter(pk__in=stale).delete()
+    if created:
+        DemandObservation.objects.bulk_create(created)
+    if changed:
+        DemandObservation.objects.bulk_update(changed, ['quantity'])
+
+def load_demand_series(product_ids: List[int], start_period: Optional[int] = None,
+                       end_period: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Demand series for the given products as flat (lengths, periods, quantities) arrays.
+
+    All observations come back from one query ordered by (product, period)
+    and are aligned to `product_ids`; products without observations get a
+    zero length. Optional bounds filter the periods in SQL.
+    """
+    requested = np.asarray(product_ids, dtype=np.int64)
+    queryset = DemandObservation.objects.all()
+    if len(requested) <= DEMAND_ID_FILTER_LIMIT:
+        queryset = queryset.filter(product_id__in=requested.tolist())
+    if start_period is not None:
+        queryset = queryset.filter(period__gte=start_period)
+    if end_period is not None:
+        queryset = queryset.filter(period__lte=end_period)
+
+    rows = np.array(
+        list(queryset.order_by('product_id', 'period').values_list('product_id', 'period', 'quantity')),
+        dtype=float
+    ).reshape(-1, 3)
+    owners = rows[:, 0].astype(np.int64)
+
+    # Locate each requested product's run of rows and gather them in order
+    left = np.searchsorted(owners, requested, side='left')
+    right = np.searchsorted(owners, requested, side='right')
+    lengths = right - left
+    total = int(lengths.sum())
+    offsets = np.cumsum(lengths) - lengths
+    index = np.repeat(left - offsets, lengths) + np.arange(total)
+    return lengths, rows[index, 1], rows[index, 2]
+
+def load_batch_forecaster(product_ids: List[int], start_period: Optional[int] = None,
+                          end_period: Optional[int] = None) -> BatchForecaster:
+    """BatchForecaster over the normalized demand table, rows aligned to product_ids"""
+    lengths, periods, quantities = load_demand_series(product_ids, start_period, end_period)
+    return BatchForecaster.from_arrays(lengths, periods, quantities)
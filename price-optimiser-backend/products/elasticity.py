@@ -0,0 +1,263 @@
+import logging
+import numpy as np
+from typing import Any, Dict, Iterable, List, Tuple
+from django.db import transaction
+from .models import Product, PriceObservation, CategoryElasticityPrior
+from .cache import get_elasticity_cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ELASTICITY = -1.5
+MIN_ELASTICITY_OBSERVATIONS = 3
+
+# Log prices varying less than this carry no information about the slope
+MIN_LOG_PRICE_VARIANCE = 1e-10
+
+# Above this many ids it is cheaper to scan every series than to bind an IN list
+PRICE_ID_FILTER_LIMIT = 900
+PRICE_OBSERVATION_BATCH_SIZE = 2000
+
+# Prior elasticity of categories with too few estimated products to pool
+CATEGORY_PRIOR_ELASTICITIES = {
+    'Electronics': -2.1,  # Very elastic
+    'Fashion': -1.8,  # Elastic
+    'Home': -1.2,  # Unit elastic
+    'Fitness': -1.5,  # Elastic
+    'Outdoor': -1.3,  # Unit elastic
+    'Sustainable': -0.8,  # Inelastic
+}
+MIN_CATEGORY_PRODUCTS = 2
+
+# Between-product variance of elasticities within a category: assumed when a
+# category cannot be estimated, and the floor when it can (keeps weights above 0)
+DEFAULT_PRIOR_VARIANCE = 0.25
+MIN_PRIOR_VARIANCE = 0.01
+PRIORS_CACHE_KEY = 'elasticity:priors'
+
+def fit_elasticities(lengths: np.ndarray, prices: np.ndarray,
+                     quantities: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Log-log regression of quantity on price for every product at once.
+
+    `lengths[i]` consecutive entries of `prices`/`quantities` belong to
+    product i. All groups are fitted together from per-group centered sums
+    (bincount over the stacked arrays), so the slope, its standard error
+    and R^2 come out as arrays. Products with fewer than
+    MIN_ELASTICITY_OBSERVATIONS points or no price variation get NaN; the
+    standard error also needs a third point.
+    """
+    lengths = np.asarray(lengths, dtype=np.int64)
+    n = len(lengths)
+    groups = np.repeat(np.arange(n), lengths)
+    x = np.log(np.asarray(prices, dtype=float))
+    y = np.log(np.asarray(quantities, dtype=float))
+    counts = np.maximum(lengths, 1)
+
+    dx = x - (np.bincount(groups, weights=x, minlength=n) / counts)[groups]
+    dy = y - (np.bincount(groups, weights=y, minlength=n) / counts)[groups]
+    sxx = np.bincount(groups, weights=dx * dx, minlength=n)
+    sxy = np.bincount(groups, weights=dx * dy, minlength=n)
+    syy = np.bincount(groups, weights=dy * dy, minlength=n)
+
+    fit = (lengths >= MIN_ELASTICITY_OBSERVATIONS) & (sxx > MIN_LOG_PRICE_VARIANCE * counts)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        slope = np.where(fit, sxy / sxx, np.nan)
+        residual = np.maximum(syy - slope * sxy, 0.0)
+        std_error = np.where(fit & (lengths > 2), np.sqrt(residual / (lengths - 2) / sxx), np.nan)
+        r_squared = np.where(fit, np.where(syy > 0, 1.0 - residual / syy, 1.0), np.nan)
+    return slope, std_error, r_squared
+
+def load_price_series(product_ids: List[int]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Positive price/quantity observations as flat (lengths, prices, quantities) arrays.
+
+    One query ordered by product; rows are aligned to `product_ids` and
+    products without observations get a zero length.
+    """
+    requested = np.asarray(product_ids, dtype=np.int64)
+    queryset = PriceObservation.objects.filter(price__gt=0, quantity__gt=0)
+    if len(requested) <= PRICE_ID_FILTER_LIMIT:
+        queryset = queryset.filter(product_id__in=requested.tolist())
+
+    rows = np.array(
+        list(queryset.order_by('product_id', 'period').values_list('product_id', 'price', 'quantity')),
+        dtype=float
+    ).reshape(-1, 3)
+    owners = rows[:, 0].astype(np.int64)
+
+    left = np.searchsorted(owners, requested, side='left')
+    lengths = np.searchsorted(owners, requested, side='right') - left
+    total = int(lengths.sum())
+    index = np.repeat(left - (np.cumsum(lengths) - lengths), lengths) + np.arange(total)
+    return lengths, rows[index, 1], rows[index, 2]
+
+def category_priors(categories: List[str], slope: np.ndarray, std_error: np.ndarray) -> Dict[str, Dict[str, Any]]:
+    """Empirical-Bayes prior (mean and variance of true elasticities) of every category.
+
+    Method of moments over the category's fitted products: the prior mean
+    is the average estimate and the prior variance the spread of the
+    estimates minus their average sampling variance. Categories with fewer
+    than MIN_CATEGORY_PRODUCTS fitted products keep the fixed prior.
+    """
+    labels, codes = np.unique(np.asarray(categories, dtype=str), return_inverse=True)
+    codes = codes.ravel()
+    fitted = ~np.isnan(slope) & ~np.isnan(std_error)
+    k = len(labels)
+    owners = codes[fitted]
+    counts = np.bincount(owners, minlength=k)
+    mean = np.bincount(owners, weights=slope[fitted], minlength=k) / np.maximum(counts, 1)
+    spread = np.bincount(owners, weights=(slope[fitted] - mean[owners]) ** 2, minlength=k) / np.maximum(counts - 1, 1)
+    noise = np.bincount(owners, weights=std_error[fitted] ** 2, minlength=k) / np.maximum(counts, 1)
+    variance = np.maximum(spread - noise, MIN_PRIOR_VARIANCE)
+
+    priors = {}
+    for c, label in enumerate(labels.tolist()):
+        if counts[c] >= MIN_CATEGORY_PRODUCTS:
+            priors[label] = {'elasticity': round(float(mean[c]), 4), 'variance': round(float(variance[c]), 6),
+                             'products': int(counts[c]), 'source': 'estimated'}
+        else:
+            priors[label] = fixed_prior(label, int(counts[c]))
+    return priors
+
+def fixed_prior(category: str, products: int = 0) -> Dict[str, Any]:
+    """Prior of a category that the data cannot estimate"""
+    return {'elasticity': CATEGORY_PRIOR_ELASTICITIES.get(category, DEFAULT_ELASTICITY),
+            'variance': DEFAULT_PRIOR_VARIANCE, 'products': products, 'source': 'default'}
+
+def shrink_elasticities(slope: np.ndarray, std_error: np.ndarray, prior_mean: np.ndarray,
+                        prior_variance: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Posterior-mean elasticities and the weight each product puts on its own fit.
+
+    The weight is prior variance / (prior variance + sampling variance), so
+    a product with many informative price changes keeps its own estimate
+    and a sparse one moves towards its category. Products without a fit
+    get the category mean and a weight of zero.
+    """
+    own = ~np.isnan(slope) & ~np.isnan(std_error)
+    sampling = np.where(own, std_error, 0.0) ** 2
+    weight = np.where(own, prior_variance / (prior_variance + sampling), 0.0)
+    pooled = np.where(own, weight * np.where(own, slope, 0.0) + (1 - weight) * prior_mean, prior_mean)
+    return pooled, weight
+
+def refresh_category_priors(cache=None) -> Dict[str, Dict[str, Any]]:
+    """Refit every product in one pass and store the recomputed category priors.
+
+    This is the only place priors are fitted; it runs out of band through
+    `manage.py refresh_elasticity_priors` so no request pays for a
+    catalog-wide refit.
+    """
+    cache = cache if cache is not None else get_elasticity_cache()
+    catalog = list(Product.objects.order_by('id').values_list('id', 'category'))
+    product_ids = [product_id for product_id, _ in catalog]
+    slope, std_error, _ = fit_elasticities(*load_price_series(product_ids))
+    priors = category_priors([category for _, category in catalog], slope, std_error)
+
+    with transaction.atomic():
+        CategoryElasticityPrior.objects.exclude(category__in=list(priors)).delete()
+        CategoryElasticityPrior.objects.bulk_create(
+            [CategoryElasticityPrior(category=category, **prior) for category, prior in priors.items()],
+            update_conflicts=True, unique_fields=['category'],
+            update_fields=['elasticity', 'variance', 'products', 'source', 'updated_at']
+        )
+    cache.set_many({PRIORS_CACHE_KEY: priors})
+    logger.info(f"Refreshed elasticity priors for {len(priors)} categories over {len(catalog)} products")
+    return priors
+
+def load_category_priors() -> Dict[str, Dict[str, Any]]:
+    """Stored category priors, from one query"""
+    return {
+        category: {'elasticity': elasticity, 'variance': variance, 'products': products, 'source': source}
+        for category, elasticity, variance, products, source in CategoryElasticityPrior.objects.values_list(
+            'category', 'elasticity', 'variance', 'products', 'source'
+        )
+    }
+
+def get_category_priors(cache=None) -> Dict[str, Dict[str, Any]]:
+    """Category priors as last stored by refresh_category_priors, cached.
+
+    Requests only read the stored priors, never refit them. Before the
+    first refresh there are none and every category uses its fixed prior.
+    """
+    cache = cache if cache is not None else get_elasticity_cache()
+    priors = cache.get_many([PRIORS_CACHE_KEY]).get(PRIORS_CACHE_KEY)
+    if priors is None:
+        priors = load_category_priors()
+        cache.set_many({PRIORS_CACHE_KEY: priors})
+    return priors
+
+def estimate_elasticities(product_ids: List[int], cache=None) -> Dict[int, Dict[str, Any]]:
+    """Category-pooled elasticity of every product, from the cache or one batched fit.
+
+    Each product's own log-log estimate is shrunk towards its category's
+    prior; 'shrinkage_weight' is the share of the result that comes from
+    the product's own data. Source is 'estimated' for products with their
+    own fit, 'category' for those falling back to an estimated category
+    and 'default' otherwise. Fresh estimates are cached until their TTL
+    runs out or new observations for the product arrive.
+    """
+    cache = cache if cache is not None else get_elasticity_cache()
+    priors = get_category_priors(cache)
+    product_ids = list(dict.fromkeys(int(product_id) for product_id in product_ids))
+    keys = {product_id: elasticity_key(product_id) for product_id in product_ids}
+    cached = cache.get_many(keys.values())
+    estimates = {product_id: cached[key] for product_id, key in keys.items() if key in cached}
+
+    missing = [product_id for product_id in product_ids if product_id not in estimates]
+    if missing:
+        categories = {}
+        for offset in range(0, len(missing), PRICE_ID_FILTER_LIMIT):
+            chunk = missing[offset:offset + PRICE_ID_FILTER_LIMIT]
+            categories.update(Product.objects.filter(id__in=chunk).values_list('id', 'category'))
+        category_list = [categories.get(product_id) for product_id in missing]
+        prior = [priors.get(category) or fixed_prior(category) for category in category_list]
+
+        lengths, prices, quantities = load_price_series(missing)
+        slope, std_error, r_squared = fit_elasticities(lengths, prices, quantities)
+        pooled, weight = shrink_elasticities(
+            slope, std_error,
+            np.array([p['elasticity'] for p in prior], dtype=float),
+            np.array([p['variance'] for p in prior], dtype=float)
+        )
+
+        fresh = {}
+        for i, product_id in enumerate(missing):
+            own = weight[i] > 0
+            fresh[product_id] = {
+                'elasticity': round(float(pooled[i]), 4),
+                'product_elasticity': round(float(slope[i]), 4) if own else None,
+                'category_elasticity': prior[i]['elasticity'],
+                'shrinkage_weight': round(float(weight[i]), 4),
+                'std_error': round(float(std_error[i]), 4) if own else None,
+                'r_squared': round(float(r_squared[i]), 4) if own else None,
+                'observations': int(lengths[i]),
+                'source': 'estimated' if own else ('category' if prior[i]['source'] == 'estimated' else 'default'),
+            }
+        cache.set_many({keys[product_id]: estimate for product_id, estimate in fresh.items()})
+        estimates.update(fresh)
+    return estimates
+
+def record_price_observations(observations: Iterable[Tuple[int, int, float, float]]) -> int:
+    """Upsert (product_id, period, price, quantity) rows and drop the affected estimates"""
+    rows = [
+        PriceObservation(product_id=product_id, period=int(period), price=float(price), quantity=float(quantity))
+        for product_id, period, price, quantity in observations
+    ]
+    if not rows:
+        return 0
+    PriceObservation.objects.bulk_create(
+        rows, batch_size=PRICE_OBSERVATION_BATCH_SIZE, update_conflicts=True,
+        unique_fields=['product', 'period'], update_fields=['price', 'quantity']
+    )
+    invalidate_elasticities({row.product_id for row in rows})
+    return len(rows)
+
+def invalidate_elasticities(product_ids: Iterable[int], cache=None):
+    """Forget cached estimates so the next request refits them.
+
+    Category priors are a catalog-wide aggregate and are only recomputed
+    by refresh_category_priors.
+    """
+    cache = cache if cache is not None else get_elasticity_cache()
+    cache.delete_many([elasticity_key(product_id) for product_id in product_ids])
+
+def elasticity_key(product_id: int) -> str:
+    """Cache key of a product's estimate"""
+    return f"elasticity:{product_id}"
@@ -0,0 +1,177 @@
+import time
+import logging
+import threading
+import numpy as np
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from .models import ExperimentArm, ExperimentEvent, PricingExperiment
+
+logger = logging.getLogger(__name__)
+
+EVENT_TYPES = ('exposure', 'purchase')
+
+# Rows per INSERT when appending events
+EVENT_INSERT_BATCH_SIZE = 2000
+
+# Posterior draws used to estimate each arm's probability of being best
+WIN_PROBABILITY_DRAWS = 10000
+
+def parse_events(events: Any, arms: Dict[str, ExperimentArm]) -> Tuple[List[ExperimentEvent], List[Dict[str, Any]]]:
+    """Validate raw events against an experiment's arms.
+
+    Each event names its arm by id or name and has a `type` of exposure
+    or purchase; purchases may carry `revenue` and default to the arm's
+    price. Returns the unsaved rows and a list of {index, error}.
+    """
+    rows = []
+    errors = []
+    for index, event in enumerate(events):
+        if not isinstance(event, dict):
+            errors.append({'index': index, 'error': 'Event must be an object'})
+            continue
+        arm = arms.get(str(event.get('arm')))
+        if arm is None:
+            errors.append({'index': index, 'error': f"Unknown arm {event.get('arm')!r}"})
+            continue
+        event_type = event.get('type')
+        if event_type not in EVENT_TYPES:
+            errors.append({'index': index, 'error': f"type must be one of {', '.join(EVENT_TYPES)}"})
+            continue
+        revenue = 0.0
+        if event_type == 'purchase':
+            revenue = event.get('revenue', float(arm.price))
+            if isinstance(revenue, bool) or not isinstance(revenue, (int, float)) or revenue < 0:
+                errors.append({'index': index, 'error': 'revenue must be a non-negative number'})
+                continue
+        rows.append(ExperimentEvent(arm_id=arm.pk, event_type=event_type, revenue=float(revenue)))
+    return rows, errors
+
+def record_events(rows: List[ExperimentEvent]) -> Dict[int, Dict[str, float]]:
+    """Append events with bulk_create and fold them into the arms' counters.
+
+    Events are totalled per arm in memory, so the counters take one
+    atomic F() update per touched arm whatever the batch size; the log
+    and the counters are written in the same transaction.
+    """
+    totals = defaultdict(lambda: {'exposures': 0, 'purchases': 0, 'revenue': 0.0})
+    for row in rows:
+        total = totals[row.arm_id]
+        if row.event_type == 'exposure':
+            total['exposures'] += 1
+        else:
+            total['purchases'] += 1
+            total['revenue'] += row.revenue
+
+    with transaction.atomic():
+        ExperimentEvent.objects.bulk_create(rows, batch_size=EVENT_INSERT_BATCH_SIZE)
+        for arm_id, total in totals.items():
+            ExperimentArm.objects.filter(pk=arm_id).update(
+                exposures=F('exposures') + total['exposures'],
+                purchases=F('purchases') + total['purchases'],
+                revenue=F('revenue') + total['revenue'],
+            )
+    return dict(totals)
+
+class ThompsonSampler:
+    """Thompson sampling over the arms' Beta conversion posteriors.
+
+    Each arm's conversion rate has a Beta(1 + purchases, 1 + exposures -
+    purchases) posterior. A decision draws one rate per arm, weights it by
+    the arm's price and picks the highest, so traffic shifts towards the
+    arm with the best expected revenue per exposure.
+    """
+
+    def __init__(self, arm_ids: List[int], names: List[str], prices: np.ndarray,
+                 exposures: np.ndarray, purchases: np.ndarray, seed: Optional[int] = None):
+        self.arm_ids = list(arm_ids)
+        self.names = list(names)
+        self.prices = np.asarray(prices, dtype=float)
+        purchases = np.asarray(purchases, dtype=float)
+        self.alpha = 1.0 + purchases
+        self.beta = 1.0 + np.maximum(np.asarray(exposures, dtype=float) - purchases, 0.0)
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+
+    def _draw(self, count: int) -> np.ndarray:
+        with self._lock:
+            rates = self._rng.beta(self.alpha, self.beta, size=(count, len(self.arm_ids)))
+        return rates * self.prices
+
+    def choose(self, count: int = 1) -> np.ndarray:
+        """Arm indices for `count` independent decisions"""
+        return self._draw(count).argmax(axis=1)
+
+    def win_probabilities(self, draws: int = WIN_PROBABILITY_DRAWS) -> np.ndarray:
+        """Share of posterior draws in which each arm has the best revenue per exposure"""
+        winners = self._draw(draws).argmax(axis=1)
+        return np.bincount(winners, minlength=len(self.arm_ids)) / draws
+
+_samplers: Dict[int, Tuple[Optional[ThompsonSampler], float]] = {}
+_samplers_lock = threading.Lock()
+
+def load_sampler(experiment_id: int, seed: Optional[int] = None) -> Optional[ThompsonSampler]:
+    """Sampler over the experiment's current counters, None unless it is running with arms"""
+    rows = list(
+        ExperimentArm.objects.filter(experiment_id=experiment_id, experiment__status='running')
+        .order_by('id').values_list('id', 'name', 'price', 'exposures', 'purchases')
+    )
+    if not rows:
+        return None
+    arm_ids, names, prices, exposures, purchases = zip(*rows)
+    return ThompsonSampler(arm_ids, names, np.array(prices, dtype=float),
+                           np.array(exposures, dtype=float), np.array(purchases, dtype=float), seed)
+
+def get_sampler(experiment_id: int) -> Optional[ThompsonSampler]:
+    """Cached sampler of an experiment, rebuilt from the counters every EXPERIMENT_STATS_TTL seconds.
+
+    Assignments in between need no query, only a vectorized Beta draw.
+    """
+    ttl = getattr(settings, 'EXPERIMENT_STATS_TTL', 1.0)
+    now = time.monotonic()
+    cached = _samplers.get(experiment_id)
+    if cached is not None and now - cached[1] < ttl:
+        return cached[0]
+    sampler = load_sampler(experiment_id)
+    with _samplers_lock:
+        _samplers[experiment_id] = (sampler, now)
+    return sampler
+
+def invalidate_sampler(experiment_id: int):
+    """Make this process's next assignment reload the experiment's counters"""
+    with _samplers_lock:
+        _samplers.pop(experiment_id, None)
+
+def experiment_summary(experiment: PricingExperiment) -> Dict[str, Any]:
+    """Experiment with each arm's counters, conversion rate and probability of being best"""
+    arms = list(experiment.arms.order_by('id'))
+    win = np.zeros(len(arms))
+    if arms:
+        sampler = ThompsonSampler(
+            [arm.pk for arm in arms], [arm.name for arm in arms], [float(arm.price) for arm in arms],
+            [arm.exposures for arm in arms], [arm.purchases for arm in arms], seed=experiment.pk,
+        )
+        win = sampler.win_probabilities()
+    return {
+        'id': experiment.pk,
+        'name': experiment.name,
+        'product_id': experiment.product_id,
+        'status': experiment.status,
+        'created_at': experiment.created_at,
+        'arms': [
+            {
+                'id': arm.pk,
+                'name': arm.name,
+                'price': float(arm.price),
+                'exposures': arm.exposures,
+                'purchases': arm.purchases,
+                'revenue': round(arm.revenue, 2),
+                'conversion_rate': round(arm.purchases / arm.exposures, 4) if arm.exposures else None,
+                'revenue_per_exposure': round(arm.revenue / arm.exposures, 4) if arm.exposures else None,
+                'win_probability': round(float(probability), 4),
+            }
+            for arm, probability in zip(arms, win)
+        ],
+    }
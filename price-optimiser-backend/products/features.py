@@ -0,0 +1,123 @@
+import numpy as np
+from itertools import islice
+from typing import Dict, Iterable, List, Sequence, Tuple
+from django.db.models import Case, FloatField, IntegerField, OuterRef, Subquery, Value, When
+from django.db.models.functions import Cast, Coalesce
+from .models import Product, DemandObservation
+
+# Columns of the pricing feature matrix, in order
+FEATURE_COLUMNS = (
+    'cost_price', 'selling_price', 'stock_available', 'units_sold',
+    'customer_rating', 'category', 'demand_forecast_value',
+)
+FEATURE_DTYPE = np.float32
+
+# Code of categories missing from a model's vocabulary
+UNKNOWN_CATEGORY = -1
+
+# Rows converted to numpy at a time while streaming the feature query
+FEATURE_CHUNK_SIZE = 50000
+
+def float_column(products: List[Dict], key: str, default: float) -> np.ndarray:
+    """One numeric field of every product as a float array, `default` where missing or unparsable"""
+    values = np.full(len(products), default, dtype=float)
+    for i, product in enumerate(products):
+        value = product.get(key)
+        if value is None:
+            continue
+        try:
+            values[i] = float(value)
+        except (TypeError, ValueError):
+            pass
+    return values
+
+def category_vocabulary(categories: Iterable[str]) -> Tuple[str, ...]:
+    """Sorted distinct categories; a category's code is its position"""
+    return tuple(sorted(set(categories)))
+
+def catalog_vocabulary(queryset=None) -> Tuple[str, ...]:
+    """Category vocabulary of a product queryset, from one DISTINCT query"""
+    queryset = Product.objects.all() if queryset is None else queryset
+    return category_vocabulary(queryset.order_by().values_list('category', flat=True).distinct())
+
+def encode_categories(categories: Sequence[str], vocabulary: Sequence[str]) -> np.ndarray:
+    """Vocabulary codes of the given categories, UNKNOWN_CATEGORY for unseen ones"""
+    index = {category: code for code, category in enumerate(vocabulary)}
+    return np.array([index.get(str(category), UNKNOWN_CATEGORY) for category in categories], dtype=FEATURE_DTYPE)
+
+def product_feature_matrix(products: List[Dict], vocabulary: Sequence[str]) -> np.ndarray:
+    """Feature matrix of serialized product dicts, identical to load_feature_matrix for the same rows.
+
+    Demand is the serializer's demand_forecast_value, the quantity of the
+    latest integer period, which is what latest_demand reads from the
+    demand table.
+    """
+    X = np.empty((len(products), len(FEATURE_COLUMNS)), dtype=FEATURE_DTYPE)
+    for j, column in enumerate(FEATURE_COLUMNS):
+        if column == 'category':
+            X[:, j] = encode_categories([product.get('category', '') for product in products], vocabulary)
+        else:
+            X[:, j] = float_column(products, column, 0.0)
+    return X
+
+def latest_demand():
+    """Latest demand period of each product, 0 without history, as a correlated subquery on (product, period)"""
+    latest = DemandObservation.objects.filter(product=OuterRef('pk')).order_by('-period').values('quantity')[:1]
+    return Coalesce(Subquery(latest, output_field=FloatField()), Value(0.0))
+
+def load_feature_matrix(vocabulary: Sequence[str], queryset=None) -> Tuple[np.ndarray, np.ndarray]:
+    """Product ids and their float32 feature matrix, streamed from one values_list query.
+
+    Prices and rating are cast to float in SQL, the category becomes its
+    vocabulary code through a CASE expression and the latest demand period
+    comes from a correlated subquery on the (product, period) index. Every
+    row therefore arrives as a tuple of numbers, converted to numpy a chunk
+    at a time. Rows follow the queryset's ordering, by id when unordered.
+    """
+    queryset = Product.objects.all() if queryset is None else queryset
+    if not queryset.ordered:
+        queryset = queryset.order_by('id')
+
+    category_code = Case(
+        *[When(category=category, then=Value(code)) for code, category in enumerate(vocabulary)],
+        default=Value(UNKNOWN_CATEGORY),
+        output_field=IntegerField(),
+    )
+    rows = queryset.annotate(
+        feature_cost_price=Cast('cost_price', FloatField()),
+        feature_selling_price=Cast('selling_price', FloatField()),
+        feature_customer_rating=Coalesce(Cast('customer_rating', FloatField()), Value(0.0)),
+        feature_category=category_code,
+        feature_demand=latest_demand(),
+    ).values_list(
+        'id', 'feature_cost_price', 'feature_selling_price', 'stock_available', 'units_sold',
+        'feature_customer_rating', 'feature_category', 'feature_demand',
+    ).iterator(chunk_size=FEATURE_CHUNK_SIZE)
+
+    width = len(FEATURE_COLUMNS) + 1
+    chunks = [np.empty((0, width))]
+    while True:
+        chunk = list(islice(rows, FEATURE_CHUNK_SIZE))
+        if not chunk:
+            break
+        chunks.append(np.array(chunk, dtype=float).reshape(-1, width))
+    data = np.concatenate(chunks)
+    return data[:, 0].astype(np.int64), data[:, 1:].astype(FEATURE_DTYPE)
+
+def load_price_columns(queryset=None) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Ids, cost prices, selling prices and latest demand of a queryset's products, by id, from one query"""
+    queryset = Product.objects.all() if queryset is None else queryset
+    rows = queryset.order_by('id').annotate(
+        column_cost_price=Cast('cost_price', FloatField()),
+        column_selling_price=Cast('selling_price', FloatField()),
+        column_demand=latest_demand(),
+    ).values_list('id', 'column_cost_price', 'column_selling_price', 'column_demand')
+    data = np.array(list(rows), dtype=float).reshape(-1, 4)
+    return data[:, 0].astype(np.int64), data[:, 1], data[:, 2], data[:, 3]
+
+def price_ratios(X: np.ndarray) -> np.ndarray:
+    """Training target selling_price / cost_price, 1.0 where the cost is not positive"""
+    cost = X[:, FEATURE_COLUMNS.index('cost_price')].astype(float)
+    selling = X[:, FEATURE_COLUMNS.index('selling_price')].astype(float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(cost > 0, selling / cost, 1.0)
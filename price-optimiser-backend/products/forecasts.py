@@ -1,169 +1,935 @@
 import numpy as np
 import ast
-from typing import Dict, List, Tuple, Optional
+import math
+import json
+import hashlib
+import threading
+from typing import Any, Dict, List, Tuple, Optional
 import logging
+from concurrent.futures import ProcessPoolExecutor
+from django.conf import settings
+from .cache import get_forecast_cache
 
 logger = logging.getLogger(__name__)
 
+ENSEMBLE_WEIGHTS = {'linear': 0.25, 'exponential': 0.35, 'moving_average': 0.25, 'seasonal': 0.15}
+ENSEMBLE_METHODS = tuple(ENSEMBLE_WEIGHTS)
+HOLT_ALPHA = 0.3
+HOLT_BETA = 0.2
+
+# Keeps product_id__in lookups under SQLite's bound-parameter limit
+HOLT_STATE_QUERY_CHUNK = 900
+
+# Bump when the forecasting maths changes so stale cache entries are ignored
+FORECAST_CACHE_VERSION = 2
+
+# Parallel mode is opt-in: one worker means forecasting in-process
+DEFAULT_FORECAST_WORKERS = 1
+DEFAULT_FORECAST_CHUNK_SIZE = 25000
+
+# Longest forecast path the API will compute
+MAX_FORECAST_HORIZON = 36
+
+# Largest demand quantity, in absolute value, the API accepts in a posted history
+MAX_FORECAST_QUANTITY = 1e12
+
+# Residual-bootstrap prediction intervals
+DEFAULT_INTERVAL_QUANTILES = (0.05, 0.95)
+DEFAULT_BOOTSTRAP_RESAMPLES = 200
+DEFAULT_BOOTSTRAP_SEED = 42
+DEFAULT_BOOTSTRAP_BLOCK_ELEMENTS = 4000000
+
+# Robust anomaly detection: modified z-score cutoff, shortest history scanned,
+# and the scale floor as a fraction of the typical level (exact trends have zero MAD)
+DEFAULT_ANOMALY_THRESHOLD = 3.5
+MIN_ANOMALY_PERIODS = 6
+MIN_ANOMALY_SCALE = 0.01
+MAD_TO_SIGMA = 1.4826
+
 class AdvancedDemandForecaster:
     """Advanced demand forecasting with multiple algorithms"""
-    
-    def __init__(self):
-        self.forecast_cache = {}
-    
+
+    def __init__(self, cache=None, workers: Optional[int] = None, chunk_size: Optional[int] = None,
+                 category_weights: Optional[Dict[str, Dict[str, float]]] = None):
+        self.forecast_cache = cache if cache is not None else get_forecast_cache()
+        self.category_weights = category_weights if category_weights is not None else get_ensemble_weights()
+        if workers is None:
+            workers = getattr(settings, 'FORECAST_PARALLEL_WORKERS', DEFAULT_FORECAST_WORKERS)
+        if chunk_size is None:
+            chunk_size = getattr(settings, 'FORECAST_PARALLEL_CHUNK_SIZE', DEFAULT_FORECAST_CHUNK_SIZE)
+        self.workers = max(int(workers), 1)
+        self.chunk_size = max(int(chunk_size), 1)
+
+        self.interval_quantiles = tuple(
+            float(q) for q in getattr(settings, 'FORECAST_INTERVAL_QUANTILES', DEFAULT_INTERVAL_QUANTILES)
+        )
+        if len(self.interval_quantiles) != 2 or not 0 < self.interval_quantiles[0] < self.interval_quantiles[1] < 1:
+            raise ValueError(f"Interval quantiles must be two increasing values in (0, 1), got {self.interval_quantiles}")
+        self.bootstrap_resamples = int(getattr(settings, 'FORECAST_BOOTSTRAP_RESAMPLES', DEFAULT_BOOTSTRAP_RESAMPLES))
+        self.bootstrap_seed = int(getattr(settings, 'FORECAST_BOOTSTRAP_SEED', DEFAULT_BOOTSTRAP_SEED))
+        self.bootstrap_block_elements = int(
+            getattr(settings, 'FORECAST_BOOTSTRAP_BLOCK_ELEMENTS', DEFAULT_BOOTSTRAP_BLOCK_ELEMENTS)
+        )
+        self.anomaly_threshold = float(getattr(settings, 'FORECAST_ANOMALY_THRESHOLD', DEFAULT_ANOMALY_THRESHOLD))
+        self.winsorize = bool(getattr(settings, 'FORECAST_WINSORIZE', False))
+
     def simple_linear_forecast(self, historical_years: Dict) -> int:
         """Linear regression forecast"""
-        if isinstance(historical_years, str):
-            try:
-                historical_years = ast.literal_eval(historical_years)
-            except Exception:
-                return 0
-
-        if not isinstance(historical_years, dict) or len(historical_years) < 2:
-            return self._get_last_value(historical_years)
-
-        years = np.array([int(year) for year in historical_years.keys()])
-        values = np.array([historical_years[year] for year in historical_years.keys()])
-        
-        slope, intercept = np.polyfit(years, values, 1)
-        next_year = years.max() + 1
-        forecast = intercept + slope * next_year
-        return max(int(forecast), 0)
-    
-    def exponential_smoothing_forecast(self, historical_years: Dict, alpha: float = 0.3) -> int:
+        return int(BatchForecaster([historical_years]).linear_forecast()[0])
+
+    def exponential_smoothing_forecast(self, historical_years: Dict, alpha: float = HOLT_ALPHA) -> int:
         """Exponential smoothing forecast with trend adjustment"""
-        if isinstance(historical_years, str):
-            try:
-                historical_years = ast.literal_eval(historical_years)
-            except Exception:
-                return 0
-
-        if not isinstance(historical_years, dict) or len(historical_years) < 2:
-            return self._get_last_value(historical_years)
-
-        years = sorted([int(year) for year in historical_years.keys()])
-        values = [historical_years[str(year)] for year in years]
-        
-        # Initialize
-        s = [values[0]]  # Level
-        b = [values[1] - values[0]]  # Trend
-        
-        # Apply exponential smoothing with trend
-        for i in range(1, len(values)):
-            s_new = alpha * values[i] + (1 - alpha) * (s[i-1] + b[i-1])
-            b_new = 0.2 * (s_new - s[i-1]) + 0.8 * b[i-1]
-            s.append(s_new)
-            b.append(b_new)
-        
-        # Forecast next period
-        forecast = s[-1] + b[-1]
-        return max(int(forecast), 0)
-    
+        return int(BatchForecaster([historical_years]).exponential_smoothing_forecast(alpha)[0])
+
     def moving_average_forecast(self, historical_years: Dict, window: int = 3) -> int:
         """Moving average forecast with trend projection"""
-        if isinstance(historical_years, str):
-            try:
-                historical_years = ast.literal_eval(historical_years)
-            except Exception:
-                return 0
-
-        if not isinstance(historical_years, dict) or len(historical_years) < window:
-            return self._get_last_value(historical_years)
-
-        years = sorted([int(year) for year in historical_years.keys()])
-        values = [historical_years[str(year)] for year in years]
-        
-        # Calculate moving average
-        ma_values = []
-        for i in range(window - 1, len(values)):
-            ma_values.append(np.mean(values[i-window+1:i+1]))
-        
-        if len(ma_values) < 2:
-            return int(ma_values[-1]) if ma_values else 0
-        
-        # Calculate trend from moving averages
-        ma_trend = (ma_values[-1] - ma_values[0]) / len(ma_values)
-        
-        # Project forward
-        forecast = ma_values[-1] + ma_trend
-        return max(int(forecast), 0)
-    
+        return int(BatchForecaster([historical_years]).moving_average_forecast(window)[0])
+
     def seasonal_decomposition_forecast(self, historical_years: Dict) -> int:
         """Seasonal decomposition forecast (simplified)"""
-        if isinstance(historical_years, str):
-            try:
-                historical_years = ast.literal_eval(historical_years)
-            except Exception:
-                return 0
-
-        if not isinstance(historical_years, dict) or len(historical_years) < 4:
-            return self._get_last_value(historical_years)
-
-        years = sorted([int(year) for year in historical_years.keys()])
-        values = [historical_years[str(year)] for year in years]
-        
-        # Calculate trend using linear regression
-        x = np.arange(len(values))
-        slope, intercept = np.polyfit(x, values, 1)
-        trend = [intercept + slope * i for i in x]
-        
-        # Calculate seasonal component (simplified)
-        detrended = [values[i] - trend[i] for i in range(len(values))]
-        seasonal = np.mean(detrended) if detrended else 0
-        
-        # Forecast
-        next_trend = intercept + slope * len(values)
-        forecast = next_trend + seasonal
-        return max(int(forecast), 0)
-    
+        return int(BatchForecaster([historical_years]).seasonal_decomposition_forecast()[0])
+
     def ensemble_forecast(self, historical_years: Dict) -> Dict[str, int]:
         """Ensemble forecast combining multiple methods"""
-        forecasts = {}
-        
-        # Linear forecast
-        forecasts['linear'] = self.simple_linear_forecast(historical_years)
-        
-        # Exponential smoothing
-        forecasts['exponential'] = self.exponential_smoothing_forecast(historical_years)
-        
-        # Moving average
-        forecasts['moving_average'] = self.moving_average_forecast(historical_years)
-        
-        # Seasonal decomposition
-        forecasts['seasonal'] = self.seasonal_decomposition_forecast(historical_years)
-        
-        # Weighted ensemble (give more weight to recent methods)
-        weights = {'linear': 0.25, 'exponential': 0.35, 'moving_average': 0.25, 'seasonal': 0.15}
-        ensemble_forecast = sum(forecasts[method] * weights[method] for method in forecasts)
-        
-        forecasts['ensemble'] = max(int(ensemble_forecast), 0)
-        forecasts['confidence'] = self._calculate_confidence(forecasts)
-        
+        return BatchForecaster([historical_years]).results()[0]
+
+    def forecast_path(self, historical_years: Dict, horizon: int) -> Dict[str, List[int]]:
+        """Forecasts 1..horizon periods ahead for every method and the ensemble"""
+        paths = BatchForecaster([historical_years]).ensemble_path(horizon)
+        return {method: path[0].tolist() for method, path in paths.items()}
+
+    def batch_ensemble_forecast(self, histories: List[Dict]) -> List[Dict[str, int]]:
+        """Ensemble forecasts for many histories in vectorized passes"""
+        return ensemble_records(self.ensemble_columns(BatchForecaster(histories)))
+
+    def ensemble_columns(self, forecaster: 'BatchForecaster', holt_state: Optional[Tuple] = None,
+                         weights: Optional[np.ndarray] = None, horizon: int = 1) -> Dict[str, np.ndarray]:
+        """Ensemble columns for a batch, spread over worker processes when enabled"""
+        if self.workers > 1 and len(forecaster) > self.chunk_size:
+            return parallel_ensemble_forecast(forecaster, self.workers, self.chunk_size, holt_state, weights, horizon)
+        return forecaster.ensemble_forecast(holt_state, weights, horizon)
+
+    def weights_for(self, category: Optional[str]) -> Dict[str, float]:
+        """Ensemble weights of a category, or the defaults when it has none"""
+        return self.category_weights.get(category, ENSEMBLE_WEIGHTS)
+
+    def weight_matrix(self, categories: Optional[List[str]]) -> Optional[np.ndarray]:
+        """Per-row (products x methods) ensemble weights, None for the defaults"""
+        if categories is None:
+            return None
+        rows = {}
+        for category in set(categories):
+            weights = self.weights_for(category)
+            rows[category] = [weights[method] for method in ENSEMBLE_METHODS]
+        return np.array([rows[category] for category in categories], dtype=float).reshape(-1, len(ENSEMBLE_METHODS))
+
+    def forecast_catalog(self, histories: List, product_ids: Optional[List[int]] = None,
+                         categories: Optional[List[str]] = None, horizon: int = 1) -> List[Dict[str, Any]]:
+        """Cached forecast records for many stored histories"""
+        return self.forecast_batch(BatchForecaster(histories), product_ids, categories, horizon)
+
+    def forecast_batch(self, forecaster: 'BatchForecaster', product_ids: Optional[List[int]] = None,
+                       categories: Optional[List[str]] = None, horizon: int = 1) -> List[Dict[str, Any]]:
+        """Cached forecast records for every row of a loaded batch.
+
+        Each record holds the ensemble forecast plus growth rate and
+        volatility. Records are looked up by a fingerprint of the series
+        and the method parameters; only the misses are forecast, in one
+        batched pass, and then written back. `categories` selects each
+        row's learned ensemble weights. With `horizon` above 1 records also
+        carry a 'path' of every method's forecasts 1..horizon periods ahead.
+        Records list the periods flagged as anomalies; with winsorizing on,
+        the forecasts are made from the clipped histories.
+        """
+        if not 1 <= horizon <= MAX_FORECAST_HORIZON:
+            raise ValueError(f"Horizon must be between 1 and {MAX_FORECAST_HORIZON}, got {horizon}")
+        keys = self.cache_keys(forecaster, categories, horizon)
+        cached = self.forecast_cache.get_many(keys)
+
+        missing = [i for i, key in enumerate(keys) if key not in cached]
+        if missing:
+            subset = forecaster.subset(missing)
+            holt_state = None
+            if product_ids is not None and not self.winsorize:
+                holt_state = load_holt_states([product_ids[i] for i in missing], subset)
+            records = self.forecast_records(
+                subset, holt_state, [categories[i] for i in missing] if categories is not None else None, horizon
+            )
+            fresh = {keys[i]: record for i, record in zip(missing, records)}
+            owners = {keys[i]: product_ids[i] for i in missing} if product_ids is not None else {}
+            self.forecast_cache.set_many(fresh, owners)
+            cached.update(fresh)
+
+        return [cached[key] for key in keys]
+
+    def forecast_records(self, forecaster: 'BatchForecaster', holt_state: Optional[Tuple] = None,
+                         categories: Optional[List[str]] = None, horizon: int = 1) -> List[Dict[str, Any]]:
+        """Uncached forecast records for every row of a batch, computed in one pass"""
+        if not 1 <= horizon <= MAX_FORECAST_HORIZON:
+            raise ValueError(f"Horizon must be between 1 and {MAX_FORECAST_HORIZON}, got {horizon}")
+        anomalies = forecaster.anomaly_periods(self.anomaly_threshold)
+        growth_rates, volatilities = forecaster.trend_statistics()
+        if self.winsorize:
+            # Stored Holt states track the raw histories, so the clipped ones are replayed
+            forecaster = forecaster.winsorized(self.anomaly_threshold)
+            holt_state = None
+        columns = self.ensemble_columns(forecaster, holt_state, self.weight_matrix(categories), horizon)
+        interval_low, interval_high = forecaster.prediction_intervals(
+            columns['ensemble'], self.interval_quantiles, self.bootstrap_resamples,
+            self.bootstrap_seed, self.bootstrap_block_elements
+        )
+        interval_low = [None if np.isnan(value) else int(value) for value in interval_low.tolist()]
+        interval_high = [None if np.isnan(value) else int(value) for value in interval_high.tolist()]
+        paths = forecast_paths(forecaster, columns) if horizon > 1 else None
+
+        records = []
+        for j, forecast in enumerate(ensemble_records(columns)):
+            record = {
+                'forecast': forecast,
+                'growth_rate': float(growth_rates[j]),
+                'volatility': float(volatilities[j]),
+                'interval_low': interval_low[j],
+                'interval_high': interval_high[j],
+                'anomalies': anomalies[j],
+            }
+            if paths is not None:
+                record['path'] = paths[j]
+            records.append(record)
+        return records
+
+    def cache_keys(self, forecaster: 'BatchForecaster', categories: Optional[List[str]] = None,
+                   horizon: int = 1) -> List[str]:
+        """Cache key of every row: series fingerprint, fallback and parameters"""
+        if categories is None:
+            categories = [None] * len(forecaster)
+        params = {category: self._cache_params(category, horizon) for category in set(categories)}
+        return [
+            self.forecast_cache.make_key([fingerprint, fallback], **params[category])
+            for fingerprint, fallback, category in zip(
+                forecaster.fingerprints(), forecaster.fallback.tolist(), categories
+            )
+        ]
+
+    def _cache_params(self, category: Optional[str] = None, horizon: int = 1) -> Dict[str, Any]:
+        """Everything besides the history that determines a forecast record"""
+        return {
+            'version': FORECAST_CACHE_VERSION,
+            'weights': self.weights_for(category),
+            'intervals': [self.interval_quantiles, self.bootstrap_resamples, self.bootstrap_seed],
+            'horizon': horizon,
+            'anomalies': [self.anomaly_threshold, self.winsorize],
+        }
+
+class BatchForecaster:
+    """Vectorized ensemble forecasting over many demand histories at once.
+
+    Histories are parsed once into right-aligned (products x periods)
+    matrices: the most recent observation of every product sits in the last
+    column and `mask` marks the cells that hold data. Each method then runs
+    as a handful of array operations over the whole catalog.
+    """
+
+    def __init__(self, histories: List):
+        self.histories = []
+        lengths = []
+        periods = []
+        values = []
+        fallbacks = []
+        for historical_years in histories:
+            parsed, years, series, fallback = _parse_history(historical_years)
+            self.histories.append(parsed)
+            lengths.append(len(years))
+            periods.extend(years)
+            values.extend(series)
+            fallbacks.append(fallback)
+        self._load(np.array(lengths, dtype=np.int64), np.array(periods, dtype=float),
+                   np.array(values, dtype=float), np.array(fallbacks, dtype=np.int64))
+
+    @classmethod
+    def from_arrays(cls, lengths: np.ndarray, periods: np.ndarray, quantities: np.ndarray,
+                    fallback: Optional[np.ndarray] = None, width: Optional[int] = None) -> 'BatchForecaster':
+        """Build from flat series arrays, each product's periods in ascending order.
+
+        `lengths[i]` consecutive entries of `periods`/`quantities` belong to
+        product i. Short histories fall back to their latest quantity.
+        `width` pads the matrices beyond the longest history.
+        """
+        lengths = np.asarray(lengths, dtype=np.int64)
+        quantities = np.asarray(quantities, dtype=float)
+        if fallback is None:
+            fallback = np.zeros(len(lengths), dtype=np.int64)
+            filled = lengths > 0
+            fallback[filled] = np.trunc(quantities[np.cumsum(lengths)[filled] - 1])
+        forecaster = cls.__new__(cls)
+        forecaster.histories = None
+        forecaster._load(lengths, np.asarray(periods, dtype=float), quantities,
+                         np.asarray(fallback).astype(np.int64), width)
+        return forecaster
+
+    def _load(self, lengths: np.ndarray, periods: np.ndarray, values: np.ndarray, fallback: np.ndarray,
+              width: Optional[int] = None):
+        """Scatter flat per-product series into the right-aligned padded matrices"""
+        n = len(lengths)
+        self.lengths = lengths
+        self.periods = int(lengths.max()) if n else 0
+        if width is not None:
+            self.periods = max(self.periods, int(width))
+        self.fallback = fallback.reshape(n)
+        self._fingerprints = None
+
+        self.values = np.zeros((n, self.periods))
+        self.years = np.zeros((n, self.periods))
+        self.mask = np.zeros((n, self.periods), dtype=bool)
+
+        total = int(lengths.sum())
+        if total:
+            rows = np.repeat(np.arange(n), lengths)
+            offsets = np.repeat(np.cumsum(lengths) - lengths, lengths)
+            cols = self.periods - np.repeat(lengths, lengths) + (np.arange(total) - offsets)
+            self.values[rows, cols] = values
+            self.years[rows, cols] = periods
+            self.mask[rows, cols] = True
+
+        # Column where each product's history begins
+        self.start = self.periods - self.lengths
+
+    def subset(self, rows: List[int]) -> 'BatchForecaster':
+        """A batch holding only the given rows, in the given order"""
+        rows = np.asarray(rows, dtype=np.int64)
+        flat = self.mask[rows]
+        forecaster = self.__class__.__new__(self.__class__)
+        forecaster.histories = [self.histories[i] for i in rows] if self.histories is not None else None
+        forecaster._load(self.lengths[rows], self.years[rows][flat], self.values[rows][flat], self.fallback[rows])
+        if self._fingerprints is not None:
+            forecaster._fingerprints = [self._fingerprints[i] for i in rows]
+        return forecaster
+
+    def holdout(self, periods: int, rows: Optional[np.ndarray] = None) -> Tuple['BatchForecaster', np.ndarray]:
+        """The given rows with their last `periods` observations held out.
+
+        Returns the truncated batch and, per row, the first held-out value,
+        which is what a one-step forecast from that origin should predict.
+        """
+        rows = np.arange(len(self)) if rows is None else np.asarray(rows, dtype=np.int64)
+        keep = self.periods - periods
+        mask = self.mask[rows, :keep]
+        truncated = BatchForecaster.from_arrays(
+            np.maximum(self.lengths[rows] - periods, 0), self.years[rows, :keep][mask], self.values[rows, :keep][mask]
+        )
+        return truncated, self.values[rows, keep]
+
+    def fingerprints(self) -> List[str]:
+        """Content fingerprint of every row's (period, value) series"""
+        if self._fingerprints is None:
+            self._fingerprints = [
+                series_fingerprint(self.years[i, start:], self.values[i, start:])
+                for i, start in enumerate(self.start.tolist())
+            ]
+        return self._fingerprints
+
+    def history(self, i: int) -> Dict:
+        """Row i as a {period: value} dict, like Product.demand_forecast"""
+        if self.histories is not None:
+            return self.histories[i]
+        start = self.start[i]
+        return {
+            str(int(period)): int(value) if value.is_integer() else value
+            for period, value in zip(self.years[i, start:].tolist(), self.values[i, start:].tolist())
+        }
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def linear_forecast(self) -> np.ndarray:
+        """Linear regression on calendar years, projected one year ahead"""
+        return self.linear_path(1)[:, 0]
+
+    def linear_path(self, horizon: int) -> np.ndarray:
+        """Linear regression on calendar years, projected 1..horizon years ahead"""
+        fit = self.lengths >= 2
+        slope, intercept = self._line_fit(self.years)
+        with np.errstate(invalid='ignore'):
+            if self.periods:
+                forecast = intercept[:, None] + slope[:, None] * (self.years[:, -1, None] + self._steps(horizon))
+            else:
+                forecast = np.repeat(intercept[:, None], horizon, axis=1)
+        return self._finish(forecast, fit)
+
+    def exponential_smoothing_forecast(self, alpha: float = HOLT_ALPHA, beta: float = HOLT_BETA,
+                                       state: Optional[Tuple] = None) -> np.ndarray:
+        """Holt level/trend smoothing projected one period ahead.
+
+        `state` is an optional (level, trend, known) triple of stored
+        end-of-history states; rows marked known skip the replay.
+        """
+        return self.exponential_smoothing_path(1, alpha, beta, state)[:, 0]
+
+    def exponential_smoothing_path(self, horizon: int, alpha: float = HOLT_ALPHA, beta: float = HOLT_BETA,
+                                   state: Optional[Tuple] = None) -> np.ndarray:
+        """Holt level plus h times the trend, for h = 1..horizon"""
+        fit = self.lengths >= 2
+        level, trend = self.holt_state(alpha, beta, state)
+        return self._finish(level[:, None] + trend[:, None] * self._steps(horizon), fit)
+
+    def holt_state(self, alpha: float = HOLT_ALPHA, beta: float = HOLT_BETA,
+                   state: Optional[Tuple] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """End-of-history Holt level and trend, stepped column by column for all products"""
+        fit = self.lengths >= 2
+        level, trend = self._holt_initial_state()
+        replay = fit
+        if state is not None:
+            known_level, known_trend, known = state
+            replay = fit & ~known
+        for t in range(self.periods):
+            active = replay & (t > self.start)
+            if not active.any():
+                continue
+            new_level = alpha * self.values[:, t] + (1 - alpha) * (level + trend)
+            new_trend = beta * (new_level - level) + (1 - beta) * trend
+            level = np.where(active, new_level, level)
+            trend = np.where(active, new_trend, trend)
+        if state is not None:
+            level = np.where(known, known_level, level)
+            trend = np.where(known, known_trend, trend)
+        return level, trend
+
+    def moving_average_forecast(self, window: int = 3) -> np.ndarray:
+        """Moving average of the last window, plus the trend across all windows"""
+        return self.moving_average_path(1, window)[:, 0]
+
+    def moving_average_path(self, horizon: int, window: int = 3) -> np.ndarray:
+        """Moving average of the last window, plus h steps of the per-window trend"""
+        fit = self.lengths >= window
+        forecast = np.zeros((len(self), horizon))
+        if fit.any():
+            rows = np.flatnonzero(fit)
+            first_cols = self.start[rows, None] + np.arange(window)
+            first = np.mean(self.values[rows[:, None], first_cols], axis=1)
+            last = np.mean(self.values[rows, self.periods - window:], axis=1)
+            windows = self.lengths[rows] - window + 1
+
+            # A single window has no trend and is reported as-is (not clamped)
+            single = windows < 2
+            step = (last - first) / np.maximum(windows, 1)
+            projected = np.maximum(np.trunc(last[:, None] + step[:, None] * self._steps(horizon)), 0)
+            forecast[rows] = np.where(single[:, None], np.trunc(last)[:, None], projected)
+        return np.where(fit[:, None], forecast, self.fallback[:, None]).astype(np.int64)
+
+    def seasonal_decomposition_forecast(self) -> np.ndarray:
+        """Linear trend over positions plus the mean detrended component"""
+        return self.seasonal_decomposition_path(1)[:, 0]
+
+    def seasonal_decomposition_path(self, horizon: int) -> np.ndarray:
+        """Trend over positions extended 1..horizon positions, plus the mean detrended component"""
+        fit = self.lengths >= 4
+        positions = (np.arange(self.periods) - self.start[:, None]).astype(float)
+        slope, intercept = self._line_fit(positions)
+        residuals = np.where(self.mask, self.values - (intercept[:, None] + slope[:, None] * positions), 0.0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            seasonal = residuals.sum(axis=1) / self.lengths
+        ahead = self.lengths[:, None] + np.arange(horizon)
+        forecast = intercept[:, None] + slope[:, None] * ahead + seasonal[:, None]
+        return self._finish(forecast, fit)
+
+    def ensemble_path(self, horizon: int, holt_state: Optional[Tuple] = None,
+                      weights: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """(products x horizon) forecasts of every method and the weighted ensemble"""
+        paths = {
+            'linear': self.linear_path(horizon),
+            'exponential': self.exponential_smoothing_path(horizon, state=holt_state),
+            'moving_average': self.moving_average_path(horizon),
+            'seasonal': self.seasonal_decomposition_path(horizon),
+        }
+
+        ensemble = np.zeros((len(self), horizon))
+        for j, method in enumerate(ENSEMBLE_METHODS):
+            weight = ENSEMBLE_WEIGHTS[method] if weights is None else weights[:, j, None]
+            ensemble = ensemble + paths[method] * weight
+        paths['ensemble'] = np.maximum(np.trunc(ensemble), 0).astype(np.int64)
+        return paths
+
+    def ensemble_forecast(self, holt_state: Optional[Tuple] = None, weights: Optional[np.ndarray] = None,
+                          horizon: int = 1) -> Dict[str, np.ndarray]:
+        """All methods plus the weighted ensemble and confidence, as columns.
+
+        `weights` is an optional (products x methods) matrix in
+        ENSEMBLE_METHODS order; the default weights apply otherwise. With
+        `horizon` above 1 the full paths are added as '<method>_path'
+        (products x horizon) columns.
+        """
+        paths = self.ensemble_path(horizon, holt_state, weights)
+        forecasts = {method: path[:, 0] for method, path in paths.items()}
+
+        # Agreement is measured across linear, exponential and moving average
+        agreement = np.column_stack([
+            forecasts['linear'], forecasts['exponential'], forecasts['moving_average']
+        ])
+        mean_val = np.mean(agreement, axis=1)
+        std_val = np.std(agreement, axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cv = std_val / mean_val
+        forecasts['confidence'] = np.where(mean_val == 0, 0.5, np.clip(1 - cv, 0.1, 0.95))
+
+        if horizon > 1:
+            forecasts.update({f'{method}_path': path for method, path in paths.items()})
         return forecasts
-    
-    def _get_last_value(self, historical_years) -> int:
-        """Get the last known value as fallback"""
-        if isinstance(historical_years, dict) and historical_years:
-            return int(list(historical_years.values())[-1])
-        return 0
-    
-    def _calculate_confidence(self, forecasts: Dict[str, int]) -> float:
-        """Calculate confidence based on forecast agreement"""
-        values = list(forecasts.values())[:-2]  # Exclude ensemble and confidence
-        if not values:
-            return 0.5
-        
-        # Calculate coefficient of variation
-        mean_val = np.mean(values)
-        std_val = np.std(values)
-        
-        if mean_val == 0:
-            return 0.5
-        
-        cv = std_val / mean_val
-        # Convert to confidence (lower CV = higher confidence)
-        confidence = max(0.1, min(0.95, 1 - cv))
-        return round(confidence, 2)
+
+    def results(self, holt_state: Optional[Tuple] = None) -> List[Dict[str, int]]:
+        """Per-product ensemble dicts, shaped like AdvancedDemandForecaster.ensemble_forecast"""
+        return ensemble_records(self.ensemble_forecast(holt_state))
+
+    def prediction_intervals(self, center: np.ndarray, quantiles: Tuple[float, float] = DEFAULT_INTERVAL_QUANTILES,
+                             resamples: int = DEFAULT_BOOTSTRAP_RESAMPLES, seed: int = DEFAULT_BOOTSTRAP_SEED,
+                             block_elements: int = DEFAULT_BOOTSTRAP_BLOCK_ELEMENTS) -> Tuple[np.ndarray, np.ndarray]:
+        """Residual-bootstrap prediction interval around each row's `center` forecast.
+
+        Every resample redraws the (inflated) residuals of the linear trend
+        fit, refits the trend and adds a redrawn next-period error. The
+        refit is closed form, so a resample's deviation from the point
+        forecast is a fixed weighted sum of the drawn residuals, and the
+        quantiles of those deviations are added to `center`.
+
+        Draws are seeded and indexed by history position, so which residuals
+        a resample picks depends only on the history length and an interval
+        depends only on its own series, never on the rest of the batch.
+        Consecutive histories of one length also share their weights, so
+        all their deviations come from a single matrix product. Rows are
+        processed in blocks holding at most `block_elements` deviations.
+        Rows with fewer than three observations get NaN.
+        """
+        n = len(self)
+        low = np.full(n, np.nan)
+        high = np.full(n, np.nan)
+        rows = np.flatnonzero(self.lengths >= 3)
+        if not rows.size or resamples < 1:
+            return low, high
+
+        # Left-align the fitted rows: position k of a history sits in column k
+        lengths = self.lengths[rows]
+        width = int(lengths.max())
+        valid = np.arange(width) < lengths[:, None]
+        cols = np.minimum(self.start[rows, None] + np.arange(width), self.periods - 1)
+        x = np.where(valid, self.years[rows[:, None], cols], 0.0)
+        y = np.where(valid, self.values[rows[:, None], cols], 0.0)
+        x_mean = x.sum(axis=1) / lengths
+        dx = np.where(valid, x - x_mean[:, None], 0.0)
+        dy = np.where(valid, y - (y.sum(axis=1) / lengths)[:, None], 0.0)
+        sxx = (dx * dx).sum(axis=1)
+        slope = (dx * dy).sum(axis=1) / sxx
+        residuals = np.where(valid, dy - slope[:, None] * dx, 0.0) * np.sqrt(lengths / (lengths - 2))[:, None]
+
+        # Sensitivity of the refitted one-step forecast to each residual
+        x_next = x[np.arange(len(rows)), lengths - 1] + 1
+        sensitivity = 1.0 / lengths[:, None] + dx * ((x_next - x_mean) / sxx)[:, None]
+        consecutive = (np.where(valid[:, 1:], np.diff(x, axis=1), 1.0) == 1.0).all(axis=1)
+
+        # Drawn column by column so position k's draws do not depend on the batch width
+        draws = np.random.default_rng(seed).random((width + 1, resamples)).T
+        resample_index = np.arange(resamples)
+        block = max(1, block_elements // resamples)
+
+        order = np.argsort(lengths, kind='stable')
+        sizes, counts = np.unique(lengths[order], return_counts=True)
+        for size, members in zip(sizes.tolist(), np.split(order, np.cumsum(counts)[:-1])):
+            picks = (draws[:, :size] * size).astype(np.int64)
+            future = (draws[:, size] * size).astype(np.int64)
+
+            # weights[j, b]: how much residual j moves resample b, shared by consecutive histories
+            positions = np.arange(size, dtype=float)
+            offsets = positions - positions.mean()
+            shared = 1.0 / size + offsets * (size - positions.mean()) / (offsets * offsets).sum()
+            weights = np.zeros((size, resamples))
+            np.add.at(weights, (picks.ravel(), np.repeat(resample_index, size)), np.tile(shared, resamples))
+            np.add.at(weights, (future, resample_index), 1.0)
+
+            for first in range(0, len(members), block):
+                chunk = members[first:first + block]
+                drawn = residuals[chunk, :size]
+                deviations = drawn @ weights
+                gapped = np.flatnonzero(~consecutive[chunk])
+                if gapped.size:
+                    # Histories with gaps weight each draw by their own sensitivities
+                    gapped_drawn = drawn[gapped]
+                    own = gapped_drawn[:, future]
+                    for k in range(size):
+                        own += sensitivity[chunk[gapped], k, None] * gapped_drawn[:, picks[:, k]]
+                    deviations[gapped] = own
+
+                lower, upper = np.round(np.quantile(deviations, quantiles, axis=1), 6)
+                targets = rows[chunk]
+                low[targets] = np.maximum(np.floor(center[targets] + lower), 0)
+                high[targets] = np.maximum(np.ceil(center[targets] + upper), 0)
+        return low, high
+
+    def trend_statistics(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Growth rate (first to last) and volatility (CV), both in percent"""
+        n = len(self)
+        growth_rate = np.zeros(n)
+        volatility = np.zeros(n)
+        rows = np.flatnonzero(self.lengths >= 2)
+        if rows.size:
+            first = self.values[rows, self.start[rows]]
+            last = self.values[rows, -1]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                growth_rate[rows] = np.where(first > 0, (last - first) / first * 100, 0)
+
+            counts = self.lengths[rows]
+            mean = np.where(self.mask[rows], self.values[rows], 0.0).sum(axis=1) / counts
+            deviations = np.where(self.mask[rows], self.values[rows] - mean[:, None], 0.0)
+            std = np.sqrt((deviations ** 2).sum(axis=1) / counts)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                volatility[rows] = np.where(mean > 0, std / mean * 100, 0)
+        return growth_rate, volatility
+
+    def anomaly_bounds(self, threshold: float = DEFAULT_ANOMALY_THRESHOLD) -> Tuple[np.ndarray, np.ndarray]:
+        """Per-cell (low, high) limits outside which an observation is anomalous.
+
+        Each history is detrended robustly: the slope is the median of the
+        slopes between observations half the history apart, and the
+        intercept the median of what is left, so a few outliers cannot drag
+        the line towards themselves. The limits sit `threshold` robust
+        standard deviations (1.4826 x MAD of the residuals, corrected for
+        the fitted line) either side of it. Histories shorter than
+        MIN_ANOMALY_PERIODS get infinite limits.
+        """
+        n = len(self)
+        low = np.full((n, self.periods), -np.inf)
+        high = np.full((n, self.periods), np.inf)
+        rows = np.flatnonzero(self.lengths >= MIN_ANOMALY_PERIODS)
+        if not rows.size:
+            return low, high
+
+        mask = self.mask[rows]
+        years = self.years[rows]
+        values = self.values[rows]
+        counts = self.lengths[rows]
+
+        # Pair position k with position k + half, counting from each history's start
+        half = counts // 2
+        pairs = np.arange(self.periods - 1) < (counts - half)[:, None]
+        first = np.minimum(self.start[rows, None] + np.arange(self.periods - 1), self.periods - 1)
+        second = np.minimum(first + half[:, None], self.periods - 1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            slopes = (np.take_along_axis(values, second, axis=1) - np.take_along_axis(values, first, axis=1)) / (
+                np.take_along_axis(years, second, axis=1) - np.take_along_axis(years, first, axis=1)
+            )
+        slope = _masked_median(slopes, pairs)
+        intercept = _masked_median(values - slope[:, None] * years, mask)
+        trend = intercept[:, None] + slope[:, None] * years
+
+        scale = MAD_TO_SIGMA * _masked_median(np.abs(values - trend), mask) * counts / (counts - 2)
+        floor = MIN_ANOMALY_SCALE * _masked_median(np.abs(values), mask)
+        limit = threshold * np.maximum(np.maximum(scale, floor), np.finfo(float).eps)[:, None]
+        low[rows] = np.where(mask, trend - limit, -np.inf)
+        high[rows] = np.where(mask, trend + limit, np.inf)
+        return low, high
+
+    def anomalies(self, threshold: float = DEFAULT_ANOMALY_THRESHOLD) -> np.ndarray:
+        """(products x periods) mask of the observations flagged as anomalous"""
+        low, high = self.anomaly_bounds(threshold)
+        return self.mask & ((self.values < low) | (self.values > high))
+
+    def anomaly_periods(self, threshold: float = DEFAULT_ANOMALY_THRESHOLD) -> List[List[int]]:
+        """Flagged periods of every row, oldest first"""
+        rows, cols = np.nonzero(self.anomalies(threshold))
+        counts = np.bincount(rows, minlength=len(self))
+        return [flagged.tolist() for flagged in np.split(self.years[rows, cols].astype(np.int64), np.cumsum(counts)[:-1])]
+
+    def winsorized(self, threshold: float = DEFAULT_ANOMALY_THRESHOLD) -> 'BatchForecaster':
+        """A copy of the batch with anomalous observations clipped to their limits"""
+        low, high = self.anomaly_bounds(threshold)
+        forecaster = self.__class__.__new__(self.__class__)
+        forecaster.__dict__.update(self.__dict__)
+        forecaster.histories = None
+        forecaster._fingerprints = None
+        forecaster.values = np.where(self.mask, np.clip(self.values, low, high), 0.0)
+        return forecaster
+
+    def _line_fit(self, x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Least-squares line through the masked values, using centered sums"""
+        counts = np.maximum(self.lengths, 1)
+        x = np.where(self.mask, x, 0.0)
+        x_mean = x.sum(axis=1) / counts
+        y_mean = self.values.sum(axis=1) / counts
+        dx = np.where(self.mask, x - x_mean[:, None], 0.0)
+        dy = np.where(self.mask, self.values - y_mean[:, None], 0.0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            slope = (dx * dy).sum(axis=1) / (dx * dx).sum(axis=1)
+        return slope, y_mean - slope * x_mean
+
+    def _holt_initial_state(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Level = first value, trend = first difference"""
+        if self.periods < 2:
+            zeros = np.zeros(len(self))
+            return zeros, zeros.copy()
+        first_col = np.minimum(self.start, self.periods - 2)
+        rows = np.arange(len(self))
+        level = self.values[rows, first_col]
+        trend = self.values[rows, first_col + 1] - level
+        return level, trend
+
+    def _finish(self, forecast: np.ndarray, fit: np.ndarray) -> np.ndarray:
+        """Truncate (products x horizon) paths to non-negative ints; short histories repeat the last value"""
+        fit = fit[:, None]
+        with np.errstate(invalid='ignore'):
+            forecast = np.maximum(np.trunc(np.where(fit, forecast, 0.0)), 0)
+        return np.where(fit, forecast, self.fallback[:, None]).astype(np.int64)
+
+    @staticmethod
+    def _steps(horizon: int) -> np.ndarray:
+        """Steps ahead 1..horizon"""
+        return np.arange(1, horizon + 1)
+
+def ensemble_records(columns: Dict[str, np.ndarray]) -> List[Dict[str, int]]:
+    """Turn ensemble columns into one dict per product"""
+    confidence = [round(value, 2) for value in columns['confidence'].tolist()]
+    listed = {method: columns[method].tolist() for method in ('linear', 'exponential', 'moving_average',
+                                                              'seasonal', 'ensemble')}
+    return [
+        {
+            'linear': listed['linear'][i],
+            'exponential': listed['exponential'][i],
+            'moving_average': listed['moving_average'][i],
+            'seasonal': listed['seasonal'][i],
+            'ensemble': listed['ensemble'][i],
+            'confidence': confidence[i],
+        }
+        for i in range(len(confidence))
+    ]
+
+def forecast_paths(forecaster: 'BatchForecaster', columns: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+    """Per-product forecast paths from '<method>_path' columns, with the periods they cover"""
+    listed = {method: columns[f'{method}_path'].tolist() for method in ENSEMBLE_METHODS + ('ensemble',)}
+    horizon = columns['ensemble_path'].shape[1]
+    last_periods = forecaster.years[:, -1].tolist() if forecaster.periods else [0.0] * len(forecaster)
+    paths = []
+    for i, (length, last) in enumerate(zip(forecaster.lengths.tolist(), last_periods)):
+        path = {method: values[i] for method, values in listed.items()}
+        path['periods'] = [int(last) + step for step in range(1, horizon + 1)] if length else None
+        paths.append(path)
+    return paths
+
+def parallel_ensemble_forecast(forecaster: 'BatchForecaster', workers: int, chunk_size: int,
+                               holt_state: Optional[Tuple] = None, weights: Optional[np.ndarray] = None,
+                               horizon: int = 1) -> Dict[str, np.ndarray]:
+    """Ensemble columns computed chunk by chunk in a process pool.
+
+    Workers receive flat NumPy arrays rather than ORM objects. Every chunk is
+    padded to the full batch width so row reductions sum in the same order
+    as a serial run, and chunks are merged back in row order, which keeps
+    the output identical to `forecaster.ensemble_forecast()`.
+    """
+    payloads = []
+    for offset in range(0, len(forecaster), chunk_size):
+        rows = slice(offset, offset + chunk_size)
+        mask = forecaster.mask[rows]
+        chunk_state = tuple(part[rows] for part in holt_state) if holt_state is not None else None
+        payloads.append((
+            forecaster.lengths[rows], forecaster.years[rows][mask], forecaster.values[rows][mask],
+            forecaster.fallback[rows], forecaster.periods, chunk_state,
+            weights[rows] if weights is not None else None, horizon,
+        ))
+    if len(payloads) <= 1:
+        return forecaster.ensemble_forecast(holt_state, weights, horizon)
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(payloads))) as pool:
+        parts = list(pool.map(_forecast_chunk, payloads))
+    return {column: np.concatenate([part[column] for part in parts]) for column in parts[0]}
+
+def _forecast_chunk(payload: Tuple) -> Dict[str, np.ndarray]:
+    """Process-pool entry point: ensemble columns for one chunk of flat series"""
+    lengths, periods, quantities, fallback, width, holt_state, weights, horizon = payload
+    forecaster = BatchForecaster.from_arrays(lengths, periods, quantities, fallback, width)
+    return forecaster.ensemble_forecast(holt_state, weights, horizon)
+
+_ensemble_weights = None
+_ensemble_weights_lock = threading.Lock()
+
+def get_ensemble_weights() -> Dict[str, Dict[str, float]]:
+    """Per-category ensemble weights from FORECAST_WEIGHTS_PATH, read once per process.
+
+    The file is written by the backtest_forecasts command; when it is
+    missing every category uses ENSEMBLE_WEIGHTS.
+    """
+    global _ensemble_weights
+    if _ensemble_weights is None:
+        with _ensemble_weights_lock:
+            if _ensemble_weights is None:
+                _ensemble_weights = read_ensemble_weights(getattr(settings, 'FORECAST_WEIGHTS_PATH', None))
+    return _ensemble_weights
+
+def reset_ensemble_weights():
+    """Forget the loaded weights so the next lookup re-reads the file"""
+    global _ensemble_weights
+    with _ensemble_weights_lock:
+        _ensemble_weights = None
+
+def read_ensemble_weights(path) -> Dict[str, Dict[str, float]]:
+    """Category weights from a weights file ({} when there is none)"""
+    if not path:
+        return {}
+    try:
+        with open(path) as handle:
+            categories = json.load(handle).get('categories', {})
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError, AttributeError) as e:
+        logger.error(f"Could not read ensemble weights from {path}: {str(e)}")
+        return {}
+    return {
+        category: {method: float(weights[method]) for method in ENSEMBLE_METHODS}
+        for category, weights in categories.items()
+        if all(method in weights for method in ENSEMBLE_METHODS)
+    }
+
+def series_fingerprint(periods, values) -> str:
+    """Stable hash of an ordered (period, value) series"""
+    digest = hashlib.sha256(np.ascontiguousarray(periods, dtype=float).tobytes())
+    digest.update(np.ascontiguousarray(values, dtype=float).tobytes())
+    return digest.hexdigest()
+
+def holt_advance(level: float, trend: float, new_values: List[float],
+                 alpha: float = HOLT_ALPHA, beta: float = HOLT_BETA) -> Tuple[float, float]:
+    """Fold new observations into a Holt state, one O(1) step each"""
+    for value in new_values:
+        new_level = alpha * value + (1 - alpha) * (level + trend)
+        trend = beta * (new_level - level) + (1 - beta) * trend
+        level = new_level
+    return level, trend
+
+def holt_replay(values: List[float], alpha: float = HOLT_ALPHA, beta: float = HOLT_BETA) -> Tuple[float, float]:
+    """Holt state after a full pass over a history of at least two values"""
+    return holt_advance(values[0], values[1] - values[0], values[1:], alpha, beta)
+
+def sync_holt_state(product, alpha: float = HOLT_ALPHA, beta: float = HOLT_BETA) -> Optional['HoltState']:
+    """Bring a product's stored Holt state in line with its demand history.
+
+    When the history only gained periods after the ones already folded in,
+    the state advances one step per new period; any rewrite of covered
+    periods (or a parameter change) triggers a full replay.
+    """
+    # Imported here so forecast pool workers can load this module without the app registry
+    from .models import HoltState
+
+    _, periods, values, _ = _parse_history(product.demand_forecast)
+    state = HoltState.objects.filter(product_id=product.pk).first()
+    if len(values) < 2:
+        if state is not None:
+            state.delete()
+        return None
+
+    appended = (
+        state is not None
+        and state.alpha == alpha and state.beta == beta
+        and state.observations <= len(values)
+        and state.history_hash == series_fingerprint(
+            periods[:state.observations], values[:state.observations]
+        )
+    )
+    if appended and state.observations == len(values):
+        return state
+
+    if appended:
+        level, trend = holt_advance(state.level, state.trend, values[state.observations:], alpha, beta)
+    else:
+        level, trend = holt_replay(values, alpha, beta)
+
+    state, _ = HoltState.objects.update_or_create(product_id=product.pk, defaults={
+        'level': level,
+        'trend': trend,
+        'alpha': alpha,
+        'beta': beta,
+        'observations': len(values),
+        'last_period': int(periods[-1]),
+        'history_hash': series_fingerprint(periods, values),
+    })
+    return state
+
+def load_holt_states(product_ids: List[int], forecaster: 'BatchForecaster',
+                     alpha: float = HOLT_ALPHA, beta: float = HOLT_BETA) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Stored Holt states aligned with a batch, as (level, trend, known) arrays.
+
+    A state only counts as known when it covers exactly the history loaded
+    in the batch, so stale rows fall back to a replay.
+    """
+    from .models import HoltState
+
+    n = len(forecaster)
+    level = np.zeros(n)
+    trend = np.zeros(n)
+    known = np.zeros(n, dtype=bool)
+    states = {}
+    for offset in range(0, len(product_ids), HOLT_STATE_QUERY_CHUNK):
+        chunk = product_ids[offset:offset + HOLT_STATE_QUERY_CHUNK]
+        for state in HoltState.objects.filter(product_id__in=chunk, alpha=alpha, beta=beta):
+            states[state.product_id] = state
+    for i, product_id in enumerate(product_ids):
+        state = states.get(product_id)
+        if state is None or state.observations != forecaster.lengths[i]:
+            continue
+        if state.history_hash != forecaster.fingerprints()[i]:
+            continue
+        level[i], trend[i], known[i] = state.level, state.trend, True
+    return level, trend, known
+
+def parse_history(historical_years) -> Dict:
+    """Stored history as a dict ({} when it cannot be parsed)"""
+    return _parse_history(historical_years)[0]
+
+def parse_series(historical_years) -> Tuple[List[float], List[float]]:
+    """Stored history as (periods, values) lists in period order"""
+    _, periods, values, _ = _parse_history(historical_years)
+    return periods, values
+
+def latest_demand_value(historical_years) -> float:
+    """Quantity of the latest integer period, the value DemandObservation keeps as latest; 0 without history"""
+    _, _, values, _ = _parse_history(historical_years)
+    return values[-1] if values else 0
+
+def _masked_median(values: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Row medians over the masked cells (NaN for rows without any)"""
+    counts = mask.sum(axis=1)
+    ordered = np.sort(np.where(mask, values, np.inf), axis=1)
+    rows = np.arange(len(values))
+    lower = ordered[rows, np.maximum((counts - 1) // 2, 0)]
+    upper = ordered[rows, np.minimum(counts // 2, max(values.shape[1] - 1, 0))]
+    with np.errstate(invalid='ignore'):
+        return np.where(counts > 0, (lower + upper) / 2, np.nan)
+
+def _parse_history(historical_years) -> Tuple[Dict, List[float], List[float], int]:
+    """Parse one stored history into (dict, sorted years, values, fallback).
+
+    Strings are literal-eval'd; anything that is not a dict is treated as an
+    empty history. Entries whose period is not an integer or whose value is
+    not a finite number are skipped, as the 0003 backfill does. The fallback, which
+    short histories forecast, is the value of the latest period, the same
+    as BatchForecaster.from_arrays takes from the demand table.
+    """
+    if isinstance(historical_years, str):
+        try:
+            historical_years = ast.literal_eval(historical_years)
+        except Exception:
+            return {}, [], [], 0
+
+    if not isinstance(historical_years, dict) or not historical_years:
+        return {}, [], [], 0
+
+    parsed = []
+    for year, value in historical_years.items():
+        try:
+            period, quantity = int(year), float(value)
+        except (TypeError, ValueError):
+            continue
+        if math.isfinite(quantity):
+            parsed.append((period, quantity))
+    if not parsed:
+        return historical_years, [], [], 0
+
+    ordered = sorted(parsed)
+    fallback = int(ordered[-1][1])
+    years = [float(year) for year, _ in ordered]
+    values = [value for _, value in ordered]
+    return historical_years, years, values, fallback
 
 # Backward compatibility function
 def simple_linear_forecast(historical_years):
@@ -174,4 +940,4 @@ def simple_linear_forecast(historical_years):
 def advanced_forecast(historical_years: Dict) -> Dict[str, int]:
     """Advanced forecasting with multiple algorithms"""
     forecaster = AdvancedDemandForecaster()
-    return forecaster.ensemble_forecast(historical_years)
+    return forecaster.forecast_catalog([historical_years])[0]['forecast']
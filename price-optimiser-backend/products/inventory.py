@@ -0,0 +1,72 @@
+from typing import Any, Dict, List, Optional
+from django.db.models import Case, Count, FloatField, Value, When
+from django.db.models.functions import Cast
+from django.db.models.lookups import GreaterThan
+from .models import Product
+from .features import latest_demand
+from .advanced_optimization import INVENTORY_STATUSES, InventoryAwareOptimizer
+
+def stock_ratio_expression():
+    """stock_available / latest demand period, NULL for products without positive demand"""
+    demand = latest_demand()
+    return Case(
+        When(GreaterThan(demand, 0.0), then=Cast('stock_available', FloatField()) / demand),
+        default=Value(None),
+        output_field=FloatField(),
+    )
+
+def inventory_status_expression(thresholds: Optional[Dict[str, float]] = None):
+    """get_inventory_status over the stored stock_ratio column"""
+    thresholds = thresholds or InventoryAwareOptimizer().stock_thresholds
+    return Case(
+        When(stock_ratio__isnull=True, then=Value('unknown')),
+        When(stock_ratio__lt=thresholds['low'], then=Value('low')),
+        When(stock_ratio__lt=thresholds['medium'], then=Value('medium')),
+        When(stock_ratio__lt=thresholds['high'], then=Value('adequate')),
+        default=Value('high'),
+    )
+
+def refresh_inventory_status(queryset=None) -> int:
+    """Recompute stock_ratio and inventory_status in the database.
+
+    Two UPDATE statements cover the whole queryset whatever its size: the
+    ratio from the latest demand subquery, then the status from the ratio.
+    Returns the number of products updated.
+    """
+    queryset = Product.objects.all() if queryset is None else queryset
+    updated = queryset.update(stock_ratio=stock_ratio_expression())
+    queryset.update(inventory_status=inventory_status_expression())
+    return updated
+
+def inventory_status_counts(queryset=None) -> Dict[str, int]:
+    """Products per inventory status from one GROUP BY, every status present"""
+    queryset = Product.objects.all() if queryset is None else queryset
+    counts = dict.fromkeys(INVENTORY_STATUSES, 0)
+    grouped = queryset.order_by().values('inventory_status').annotate(count=Count('id'))
+    counts.update(grouped.values_list('inventory_status', 'count'))
+    return counts
+
+def products_with_status(inventory_status: str, limit: int, queryset=None) -> List[Dict[str, Any]]:
+    """Up to `limit` products of one status, most urgent first, read through the status index.
+
+    Low stock comes by ascending stock ratio, high stock by descending
+    ratio, ties by id.
+    """
+    queryset = Product.objects.all() if queryset is None else queryset
+    ordering = ('-stock_ratio', 'id') if inventory_status == 'high' else ('stock_ratio', 'id')
+    rows = (
+        queryset.filter(inventory_status=inventory_status).order_by(*ordering)
+        .annotate(demand=latest_demand())
+        .values('id', 'name', 'category', 'stock_available', 'demand', 'stock_ratio')[:limit]
+    )
+    return [
+        {
+            'id': row['id'],
+            'name': row['name'],
+            'category': row['category'],
+            'stock': row['stock_available'],
+            'demand': row['demand'],
+            'stock_ratio': None if row['stock_ratio'] is None else round(row['stock_ratio'], 2),
+        }
+        for row in rows
+    ]
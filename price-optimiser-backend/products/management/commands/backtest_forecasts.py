@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from products.models import Product
+from products.backtesting import (
+    BACKTEST_METHODS, DEFAULT_ORIGINS, MIN_CATEGORY_SAMPLES, MIN_TRAIN_PERIODS,
+    learn_ensemble_weights, rolling_origin_backtest, save_ensemble_weights,
+)
+from products.demand_history import load_batch_forecaster
+from products.forecasts import AdvancedDemandForecaster, reset_ensemble_weights
+
+class Command(BaseCommand):
+    help = "Backtest the forecasting methods over rolling origins and learn per-category ensemble weights"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--origins', type=int, default=DEFAULT_ORIGINS, help='Number of rolling forecast origins')
+        parser.add_argument('--min-history', type=int, default=MIN_TRAIN_PERIODS,
+                            help='Observations a series needs before an origin is scored')
+        parser.add_argument('--min-samples', type=int, default=MIN_CATEGORY_SAMPLES,
+                            help='Scored forecasts a category needs to get its own weights')
+        parser.add_argument('--output', default=None, help='Weights file (defaults to FORECAST_WEIGHTS_PATH)')
+        parser.add_argument('--dry-run', action='store_true', help='Report metrics without writing weights')
+
+    def handle(self, *args, **kwargs):
+        rows = list(Product.objects.order_by('id').values_list('id', 'category'))
+        product_ids = [product_id for product_id, _ in rows]
+        categories = [category for _, category in rows]
+
+        batch = load_batch_forecaster(product_ids)
+        forecaster = AdvancedDemandForecaster()
+        report = rolling_origin_backtest(
+            batch, categories, kwargs['origins'], kwargs['min_history'], forecaster.weight_matrix(categories)
+        )
+
+        self.stdout.write(
+            f"Backtested {len(product_ids)} products over {report['origins']} origins "
+            f"({report['samples']} forecasts, {report['elapsed_seconds']}s)"
+        )
+        self.stdout.write(f"{'category':<20}{'method':<16}{'rmse':>12}{'mape %':>12}")
+        sections = [('(all)', report['overall'])] + sorted(report['categories'].items())
+        for category, metrics in sections:
+            for method in BACKTEST_METHODS:
+                rmse = metrics[method]['rmse']
+                mape = metrics[method]['mape']
+                self.stdout.write(
+                    f"{category:<20}{method:<16}"
+                    f"{'-' if rmse is None else f'{rmse:.2f}':>12}{'-' if mape is None else f'{mape:.2f}':>12}"
+                )
+
+        weights = learn_ensemble_weights(report, kwargs['min_samples'])
+        for category, category_weights in sorted(weights.items()):
+            self.stdout.write(f"{category}: {category_weights}")
+
+        if kwargs['dry_run']:
+            self.stdout.write(self.style.SUCCESS('✅ Backtest completed (dry run, weights not saved).'))
+            return
+
+        path = kwargs['output'] or settings.FORECAST_WEIGHTS_PATH
+        save_ensemble_weights(path, weights, report)
+        reset_ensemble_weights()
+        self.stdout.write(self.style.SUCCESS(f'✅ Saved ensemble weights for {len(weights)} categories to {path}.'))
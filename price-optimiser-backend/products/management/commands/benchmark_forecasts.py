@@ -0,0 +1,52 @@
+import time
+import numpy as np
+from django.core.management.base import BaseCommand
+from products.forecasts import BatchForecaster, parallel_ensemble_forecast
+
+class Command(BaseCommand):
+    help = "Benchmark serial vs process-pool ensemble forecasting on a synthetic catalog"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=200000, help='Number of synthetic products')
+        parser.add_argument('--periods', type=int, default=24, help='Maximum history length per product')
+        parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8], help='Worker counts to run')
+        parser.add_argument('--chunk-size', type=int, default=25000, help='Products per worker task')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed for the synthetic catalog')
+
+    def handle(self, *args, **kwargs):
+        n = kwargs['products']
+        chunk_size = kwargs['chunk_size']
+        rng = np.random.default_rng(kwargs['seed'])
+
+        lengths = rng.integers(1, kwargs['periods'] + 1, n)
+        offsets = np.repeat(np.cumsum(lengths) - lengths, lengths)
+        periods = 2000.0 + (np.arange(lengths.sum()) - offsets)
+        trend = np.repeat(rng.uniform(-5.0, 10.0, n), lengths)
+        base = np.repeat(rng.uniform(50.0, 500.0, n), lengths)
+        quantities = np.maximum(np.round(base + trend * (periods - 2000.0) + rng.normal(0, 20, lengths.sum())), 0)
+        forecaster = BatchForecaster.from_arrays(lengths, periods, quantities)
+
+        start = time.perf_counter()
+        reference = forecaster.ensemble_forecast()
+        serial_seconds = time.perf_counter() - start
+
+        self.stdout.write(f"Forecasting {n} products (chunk size={chunk_size})")
+        self.stdout.write(f"{'workers':<10}{'seconds':>10}{'speedup':>10}{'matches serial':>16}")
+        for workers in kwargs['workers']:
+            start = time.perf_counter()
+            if workers > 1:
+                columns = parallel_ensemble_forecast(forecaster, workers, chunk_size)
+            else:
+                columns = forecaster.ensemble_forecast()
+            elapsed = time.perf_counter() - start
+
+            matches = all(np.array_equal(columns[name], reference[name]) for name in reference)
+            self.stdout.write(f"{workers:<10}{elapsed:>10.4f}{serial_seconds / elapsed:>10.2f}{str(matches):>16}")
+
+        start = time.perf_counter()
+        flagged = forecaster.anomalies()
+        self.stdout.write(
+            f"Anomaly scan: {int(flagged.sum())} points flagged in {time.perf_counter() - start:.4f}s"
+        )
+
+        self.stdout.write(self.style.SUCCESS('✅ Forecast benchmark completed.'))
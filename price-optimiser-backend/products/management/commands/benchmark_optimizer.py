@@ -0,0 +1,53 @@
+import time
+import numpy as np
+from django.core.management.base import BaseCommand
+from products.optimization import optimize_prices
+
+class Command(BaseCommand):
+    help = "Benchmark the price optimizer solvers against the fixed grid on a synthetic catalog"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=100000, help='Number of synthetic products')
+        parser.add_argument('--steps', type=int, default=100, help='Grid size for the grid solver')
+        parser.add_argument('--tol', type=float, default=0.005, help='Golden-section tolerance in price units')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed for the synthetic catalog')
+
+    def handle(self, *args, **kwargs):
+        n = kwargs['products']
+        steps = kwargs['steps']
+        tol = kwargs['tol']
+        rng = np.random.default_rng(kwargs['seed'])
+
+        cost_prices = rng.uniform(1.0, 500.0, n)
+        current_prices = cost_prices * rng.uniform(1.05, 2.0, n)
+        elasticities = rng.uniform(-4.0, -0.3, n)
+
+        # The closed form is the exact optimum, so it serves as the reference
+        reference, reference_profit = optimize_prices(
+            cost_prices, current_prices, elasticities, solver='analytic'
+        )
+        width = np.max(cost_prices * 0.5)
+        golden_evaluations = 2 + int(np.ceil(np.log(tol / width) / np.log((np.sqrt(5) - 1) / 2)))
+
+        runs = [
+            ('grid', {'steps': steps}, steps),
+            ('golden', {'tol': tol}, golden_evaluations),
+            ('analytic', {}, 1),
+        ]
+
+        self.stdout.write(f"Optimizing {n} products (grid steps={steps}, tol={tol})")
+        self.stdout.write(f"{'solver':<10}{'seconds':>10}{'evals/product':>16}{'max price err':>16}{'max profit gap':>16}")
+        for solver, options, evaluations in runs:
+            start = time.perf_counter()
+            prices, profits = optimize_prices(
+                cost_prices, current_prices, elasticities, solver=solver, **options
+            )
+            elapsed = time.perf_counter() - start
+
+            price_error = np.nanmax(np.abs(prices - reference))
+            profit_gap = np.nanmax(reference_profit - profits)
+            self.stdout.write(
+                f"{solver:<10}{elapsed:>10.4f}{evaluations:>16}{price_error:>16.4f}{profit_gap:>16.4f}"
+            )
+
+        self.stdout.write(self.style.SUCCESS('✅ Optimizer benchmark completed.'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from products.models import Product
+from products.forecasts import sync_holt_state
+
+class Command(BaseCommand):
+    help = "Build or refresh the stored Holt smoothing state for every product"
+
+    def handle(self, *args, **kwargs):
+        synced = 0
+        for product in Product.objects.only('id', 'demand_forecast').iterator(chunk_size=2000):
+            if sync_holt_state(product) is not None:
+                synced += 1
+        self.stdout.write(self.style.SUCCESS(f'✅ Holt state synced for {synced} products.'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from products.elasticity import refresh_category_priors
+
+class Command(BaseCommand):
+    help = "Refit every product's elasticity and store the pooled category priors"
+
+    def handle(self, *args, **kwargs):
+        priors = refresh_category_priors()
+        estimated = sum(1 for prior in priors.values() if prior['source'] == 'estimated')
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Elasticity priors refreshed for {len(priors)} categories ({estimated} estimated).'
+        ))
@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from products.inventory import refresh_inventory_status
+
+class Command(BaseCommand):
+    help = "Recompute every product's stored stock ratio and inventory status"
+
+    def handle(self, *args, **kwargs):
+        updated = refresh_inventory_status()
+        self.stdout.write(self.style.SUCCESS(f'✅ Inventory status refreshed for {updated} products.'))
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand, CommandError
+from products.advanced_optimization import MLPriceOptimizer
+from products.model_store import (
+    DEFAULT_HOLDOUT_FRACTION, DEFAULT_HOLDOUT_SEED, MODEL_FORMAT, model_directory, read_manifest,
+    reset_pricing_model, save_pricing_model, train_pricing_model, training_fingerprint,
+)
+
+class Command(BaseCommand):
+    help = "Train the ML pricing model out-of-band and save it as the active version"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--holdout', type=float, default=DEFAULT_HOLDOUT_FRACTION,
+                            help='Fraction of products held out for the reported metrics')
+        parser.add_argument('--seed', type=int, default=DEFAULT_HOLDOUT_SEED, help='Random seed for the holdout split')
+        parser.add_argument('--output', default=None, help='Model directory (defaults to PRICING_MODEL_DIR)')
+        parser.add_argument('--force', action='store_true', help='Retrain even if the training data is unchanged')
+        parser.add_argument('--dry-run', action='store_true', help='Report metrics without saving a new version')
+
+    def handle(self, *args, **kwargs):
+        if not 0 <= kwargs['holdout'] < 1:
+            raise CommandError('--holdout must be in [0, 1)')
+
+        # Features come straight from the Product table, categories encoded with a fresh vocabulary
+        builder = MLPriceOptimizer()
+        X, y = builder.training_data()
+        fingerprint = training_fingerprint(X, y, builder.categories)
+
+        current = read_manifest(kwargs['output'])
+        unchanged = current and current['fingerprint'] == fingerprint and current.get('format') == MODEL_FORMAT
+        if unchanged and not kwargs['force']:
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ Training data unchanged, pricing model v{current['version']} stays active."
+            ))
+            return
+
+        try:
+            optimizer, metrics = train_pricing_model(X, y, kwargs['holdout'], kwargs['seed'], builder.categories)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            f"Trained on {metrics['samples']} products in {metrics['categories']} categories "
+            f"({metrics['holdout_samples']} held out)"
+        )
+        for split in ('train', 'holdout'):
+            if split in metrics:
+                self.stdout.write(f"{split:<10}mae={metrics[split]['mae']}  rmse={metrics[split]['rmse']}")
+
+        if kwargs['dry_run']:
+            self.stdout.write(self.style.SUCCESS('✅ Training completed (dry run, model not saved).'))
+            return
+
+        manifest = save_pricing_model(optimizer, fingerprint, metrics, kwargs['output'])
+        reset_pricing_model()
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Saved pricing model v{manifest['version']} to {model_directory(kwargs['output'])}."
+        ))
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.2 on 2026-10-16 22:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HoltState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('level', models.FloatField()),
+                ('trend', models.FloatField()),
+                ('alpha', models.FloatField()),
+                ('beta', models.FloatField()),
+                ('observations', models.PositiveIntegerField()),
+                ('last_period', models.IntegerField()),
+                ('history_hash', models.CharField(max_length=64)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='holt_state', to='products.product')),
+            ],
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.2 on 2026-10-16 22:30
+
+import ast
+import math
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_demand_observations(apps, schema_editor):
+    """Copy every product's demand_forecast blob into DemandObservation rows"""
+    Product = apps.get_model('products', 'Product')
+    DemandObservation = apps.get_model('products', 'DemandObservation')
+
+    batch = []
+    for product in Product.objects.only('id', 'demand_forecast').iterator(chunk_size=2000):
+        history = product.demand_forecast
+        if isinstance(history, str):
+            try:
+                history = ast.literal_eval(history)
+            except Exception:
+                continue
+        if not isinstance(history, dict):
+            continue
+
+        for period, quantity in history.items():
+            try:
+                period, quantity = int(period), float(quantity)
+            except (TypeError, ValueError):
+                continue
+            if math.isfinite(quantity):
+                batch.append(DemandObservation(product_id=product.id, period=period, quantity=quantity))
+        if len(batch) >= 5000:
+            DemandObservation.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+
+    if batch:
+        DemandObservation.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_holtstate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DemandObservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.IntegerField()),
+                ('quantity', models.FloatField()),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='demand_observations', to='products.product')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('product', 'period'), name='unique_demand_observation')],
+            },
+        ),
+        migrations.RunPython(backfill_demand_observations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.2 on 2026-10-16 22:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_demandobservation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceObservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.IntegerField()),
+                ('price', models.FloatField()),
+                ('quantity', models.FloatField()),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_observations', to='products.product')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('product', 'period'), name='unique_price_observation')],
+            },
+        ),
+    ]
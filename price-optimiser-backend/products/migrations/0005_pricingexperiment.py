@@ -0,0 +1,54 @@
+# Generated by Django 5.2.2 on 2026-10-16 23:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_priceobservation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExperimentArm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('exposures', models.PositiveBigIntegerField(default=0)),
+                ('purchases', models.PositiveBigIntegerField(default=0)),
+                ('revenue', models.FloatField(default=0.0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ExperimentEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(choices=[('exposure', 'Exposure'), ('purchase', 'Purchase')], max_length=10)),
+                ('revenue', models.FloatField(default=0.0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('arm', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='products.experimentarm')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PricingExperiment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('stopped', 'Stopped')], default='running', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('product', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='experiments', to='products.product')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='experimentarm',
+            name='experiment',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='arms', to='products.pricingexperiment'),
+        ),
+        migrations.AddConstraint(
+            model_name='experimentarm',
+            constraint=models.UniqueConstraint(fields=('experiment', 'name'), name='unique_experiment_arm'),
+        ),
+    ]
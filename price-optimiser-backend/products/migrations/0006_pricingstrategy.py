@@ -0,0 +1,46 @@
+# Generated by Django 5.2.2 on 2026-10-16 23:18
+
+from django.db import migrations, models
+
+# The strategies ABTestingSimulator used to hard-code
+INITIAL_STRATEGIES = [
+    ('penetration', 0.9, 'Low price to gain market share'),
+    ('skimming', 1.3, 'High price for premium positioning'),
+    ('competitive', 1.0, 'Match competitor pricing'),
+    ('cost_plus', 1.2, 'Cost plus 20% margin'),
+    ('value_based', 1.1, 'Price based on perceived value'),
+]
+
+
+def seed_strategies(apps, schema_editor):
+    PricingStrategy = apps.get_model('products', 'PricingStrategy')
+    PricingStrategy.objects.bulk_create([
+        PricingStrategy(name=name, price_factor=factor, description=description)
+        for name, factor, description in INITIAL_STRATEGIES
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_pricingexperiment'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PricingStrategy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('description', models.CharField(blank=True, max_length=255)),
+                ('base', models.CharField(choices=[('cost', 'Cost price'), ('current', 'Current price')], default='cost', max_length=10)),
+                ('price_factor', models.FloatField(default=1.0)),
+                ('min_margin', models.FloatField(blank=True, null=True)),
+                ('max_price_factor', models.FloatField(blank=True, null=True)),
+                ('rounding', models.CharField(choices=[('none', 'No rounding'), ('cents', 'Nearest cent'), ('whole', 'Nearest whole unit'), ('charm', 'Up to the next .99')], default='none', max_length=10)),
+                ('is_active', models.BooleanField(default=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(seed_strategies, migrations.RunPython.noop),
+    ]
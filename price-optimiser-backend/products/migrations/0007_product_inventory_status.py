@@ -0,0 +1,52 @@
+# Generated by Django 5.2.2 on 2026-10-16 23:23
+
+from django.db import migrations, models
+from django.db.models import Case, FloatField, OuterRef, Subquery, Value, When
+from django.db.models.functions import Cast, Coalesce
+from django.db.models.lookups import GreaterThan
+
+
+def backfill_inventory_status(apps, schema_editor):
+    """Compute the stock ratio and status of existing products in two UPDATEs"""
+    Product = apps.get_model('products', 'Product')
+    DemandObservation = apps.get_model('products', 'DemandObservation')
+
+    latest = DemandObservation.objects.filter(product=OuterRef('pk')).order_by('-period').values('quantity')[:1]
+    demand = Coalesce(Subquery(latest, output_field=FloatField()), Value(0.0))
+    Product.objects.update(stock_ratio=Case(
+        When(GreaterThan(demand, 0.0), then=Cast('stock_available', FloatField()) / demand),
+        default=Value(None),
+        output_field=FloatField(),
+    ))
+    Product.objects.update(inventory_status=Case(
+        When(stock_ratio__isnull=True, then=Value('unknown')),
+        When(stock_ratio__lt=0.2, then=Value('low')),
+        When(stock_ratio__lt=0.5, then=Value('medium')),
+        When(stock_ratio__lt=0.8, then=Value('adequate')),
+        default=Value('high'),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_pricingstrategy'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='inventory_status',
+            field=models.CharField(choices=[('low', 'Low'), ('medium', 'Medium'), ('adequate', 'Adequate'), ('high', 'High'), ('unknown', 'Unknown')], default='unknown', editable=False, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='stock_ratio',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['inventory_status', 'stock_ratio'], name='product_inventory_idx'),
+        ),
+        migrations.RunPython(backfill_inventory_status, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.2 on 2026-10-16 23:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_product_inventory_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryElasticityPrior',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(max_length=100, unique=True)),
+                ('elasticity', models.FloatField()),
+                ('variance', models.FloatField()),
+                ('products', models.PositiveIntegerField()),
+                ('source', models.CharField(max_length=10)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,166 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+import joblib
+import numpy as np
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Sequence, Tuple
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = 'active.json'
+
+# Bumped when saved models stop being loadable by this code; older versions are ignored
+MODEL_FORMAT = 2
+MODEL_FILE_TEMPLATE = 'pricing-model-v{version}.joblib'
+MIN_TRAINING_SAMPLES = 10
+DEFAULT_HOLDOUT_FRACTION = 0.2
+DEFAULT_HOLDOUT_SEED = 42
+
+def training_fingerprint(X: np.ndarray, y: np.ndarray, categories: Sequence[str] = ()) -> str:
+    """Stable hash of a training set and its category vocabulary, to tell which data a model was fitted on"""
+    digest = hashlib.sha256(np.ascontiguousarray(X, dtype=float).tobytes())
+    digest.update(np.ascontiguousarray(y, dtype=float).tobytes())
+    digest.update(json.dumps(list(categories)).encode('utf-8'))
+    return digest.hexdigest()
+
+def regression_metrics(actual: np.ndarray, predicted: np.ndarray) -> Dict[str, Optional[float]]:
+    """MAE and RMSE of predicted price ratios"""
+    if not len(actual):
+        return {'mae': None, 'rmse': None}
+    error = np.asarray(predicted, dtype=float) - np.asarray(actual, dtype=float)
+    return {'mae': round(float(np.mean(np.abs(error))), 6), 'rmse': round(float(np.sqrt(np.mean(error ** 2))), 6)}
+
+def train_pricing_model(X: np.ndarray, y: np.ndarray, holdout: float = DEFAULT_HOLDOUT_FRACTION,
+                        seed: int = DEFAULT_HOLDOUT_SEED, categories: Sequence[str] = ()) -> Tuple[Any, Dict[str, Any]]:
+    """Fit an MLPriceOptimizer and measure it.
+
+    The holdout metrics come from a fit on a seeded random split; the
+    returned optimizer is then refitted on every sample. `categories` is
+    the vocabulary X was encoded with and is saved along with the model.
+    """
+    from .advanced_optimization import MLPriceOptimizer
+
+    if len(X) < MIN_TRAINING_SAMPLES:
+        raise ValueError(f"Need at least {MIN_TRAINING_SAMPLES} training samples, got {len(X)}")
+    order = np.random.default_rng(seed).permutation(len(X))
+    held_out = int(len(X) * holdout)
+    test, train = order[:held_out], order[held_out:]
+
+    metrics = {'samples': int(len(X)), 'holdout_samples': held_out, 'categories': len(categories)}
+    if held_out:
+        probe = MLPriceOptimizer().fit(X[train], y[train])
+        metrics['holdout'] = regression_metrics(y[test], probe.predict_ratios(X[test]))
+
+    optimizer = MLPriceOptimizer()
+    optimizer.categories = tuple(categories)
+    optimizer.fit(X, y)
+    if not optimizer.is_trained:
+        raise ValueError("Pricing model failed to train")
+    metrics['train'] = regression_metrics(y, optimizer.predict_ratios(X))
+    return optimizer, metrics
+
+def model_directory(directory=None) -> str:
+    """Directory holding the model versions, PRICING_MODEL_DIR by default"""
+    return str(directory or settings.PRICING_MODEL_DIR)
+
+def read_manifest(directory=None) -> Optional[Dict[str, Any]]:
+    """The active model's manifest, or None when no model has been saved"""
+    path = os.path.join(model_directory(directory), MANIFEST_NAME)
+    try:
+        with open(path) as handle:
+            return json.load(handle)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.error(f"Could not read pricing model manifest {path}: {str(e)}")
+        return None
+
+def save_pricing_model(optimizer, fingerprint: str, metrics: Dict[str, Any], directory=None) -> Dict[str, Any]:
+    """Write a new model version and make it the active one.
+
+    Files are written under a temporary name and renamed into place, so a
+    worker never loads a half-written model or manifest.
+    """
+    directory = model_directory(directory)
+    os.makedirs(directory, exist_ok=True)
+    current = read_manifest(directory)
+    version = current['version'] + 1 if current else 1
+
+    manifest = {
+        'version': version,
+        'format': MODEL_FORMAT,
+        'file': MODEL_FILE_TEMPLATE.format(version=version),
+        'fingerprint': fingerprint,
+        'metrics': metrics,
+        'trained_at': datetime.now(timezone.utc).isoformat(),
+    }
+    model_path = os.path.join(directory, manifest['file'])
+    joblib.dump({'optimizer': optimizer, 'manifest': manifest}, model_path + '.tmp')
+    os.replace(model_path + '.tmp', model_path)
+
+    manifest_path = os.path.join(directory, MANIFEST_NAME)
+    with open(manifest_path + '.tmp', 'w') as handle:
+        json.dump(manifest, handle, indent=2, sort_keys=True)
+    os.replace(manifest_path + '.tmp', manifest_path)
+    return manifest
+
+def load_pricing_model(directory=None) -> Tuple[Any, Optional[Dict[str, Any]]]:
+    """The active optimizer and its manifest, (None, None) when there is none"""
+    directory = model_directory(directory)
+    manifest = read_manifest(directory)
+    if manifest is None:
+        return None, None
+    if manifest.get('format') != MODEL_FORMAT:
+        logger.error(f"Pricing model v{manifest.get('version')} has an outdated format, retrain it")
+        return None, None
+    try:
+        payload = joblib.load(os.path.join(directory, manifest['file']))
+    except Exception as e:
+        logger.error(f"Could not load pricing model v{manifest.get('version')}: {str(e)}")
+        return None, None
+    optimizer = payload['optimizer']
+    
+    # Serve with this process's thread budget rather than the trainer's
+    optimizer.model.set_params(n_jobs=getattr(settings, 'PRICING_MODEL_JOBS', 1))
+    return optimizer, manifest
+
+_pricing_model = None
+_pricing_model_stamp = None
+_pricing_model_lock = threading.Lock()
+
+def get_pricing_model() -> Tuple[Any, Optional[Dict[str, Any]]]:
+    """Active (optimizer, manifest), loaded once per process.
+
+    Only the manifest is stat'ed on later calls, so a worker switches to a
+    newly trained version without retraining or reloading otherwise.
+    """
+    global _pricing_model, _pricing_model_stamp
+    try:
+        stamp = os.stat(os.path.join(model_directory(), MANIFEST_NAME)).st_mtime_ns
+    except OSError:
+        stamp = None
+    if _pricing_model is None or stamp != _pricing_model_stamp:
+        with _pricing_model_lock:
+            if _pricing_model is None or stamp != _pricing_model_stamp:
+                _pricing_model = load_pricing_model()
+                _pricing_model_stamp = stamp
+                if _pricing_model[1] is not None:
+                    logger.info(f"Loaded pricing model v{_pricing_model[1]['version']}")
+    return _pricing_model
+
+def model_summary(manifest: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """What API responses report about the model that produced them"""
+    if manifest is None:
+        return None
+    return {'version': manifest['version'], 'trained_at': manifest['trained_at'], 'fingerprint': manifest['fingerprint']}
+
+def reset_pricing_model():
+    """Forget the loaded model so the next lookup reloads it"""
+    global _pricing_model, _pricing_model_stamp
+    with _pricing_model_lock:
+        _pricing_model = None
+        _pricing_model_stamp = None
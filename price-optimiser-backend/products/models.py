@@ -12,5 +12,147 @@ class Product(models.Model):
     demand_forecast = models.JSONField(default=dict)  # store historical/yearly forecasts
     optimized_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
 
+    # Materialized by inventory.refresh_inventory_status from stock and the latest demand period
+    INVENTORY_STATUS_CHOICES = [
+        ('low', 'Low'),
+        ('medium', 'Medium'),
+        ('adequate', 'Adequate'),
+        ('high', 'High'),
+        ('unknown', 'Unknown'),
+    ]
+    stock_ratio = models.FloatField(null=True, blank=True, editable=False)  # stock / latest demand, null without demand
+    inventory_status = models.CharField(max_length=10, choices=INVENTORY_STATUS_CHOICES, default='unknown',
+                                        editable=False)
+
+    class Meta:
+        # Serves GROUP BY inventory_status and per-status lists ordered by ratio
+        indexes = [
+            models.Index(fields=['inventory_status', 'stock_ratio'], name='product_inventory_idx')
+        ]
+
     def __str__(self):
         return f"{self.name} ({self.category})"
+
+class HoltState(models.Model):
+    """Holt level/trend smoothing state covering a product's demand history"""
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, related_name='holt_state')
+    level = models.FloatField()
+    trend = models.FloatField()
+    alpha = models.FloatField()
+    beta = models.FloatField()
+    observations = models.PositiveIntegerField()  # number of periods folded into the state
+    last_period = models.IntegerField()
+    history_hash = models.CharField(max_length=64)  # fingerprint of the covered periods
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Holt state for product {self.product_id} ({self.observations} periods)"
+
+class DemandObservation(models.Model):
+    """One period of a product's demand history, normalized out of demand_forecast"""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='demand_observations')
+    period = models.IntegerField()
+    quantity = models.FloatField()
+
+    class Meta:
+        # The composite unique index also serves ordered (product, period) scans
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'period'], name='unique_demand_observation')
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} @ {self.period}: {self.quantity}"
+
+class PriceObservation(models.Model):
+    """Average selling price and quantity sold of a product in one period"""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='price_observations')
+    period = models.IntegerField()
+    price = models.FloatField()
+    quantity = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'period'], name='unique_price_observation')
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} @ {self.period}: {self.quantity} at {self.price}"
+
+class CategoryElasticityPrior(models.Model):
+    """Pooled elasticity of a category, rebuilt by `manage.py refresh_elasticity_priors`"""
+    category = models.CharField(max_length=100, unique=True)
+    elasticity = models.FloatField()
+    variance = models.FloatField()
+    products = models.PositiveIntegerField()  # products with their own fit behind the estimate
+    source = models.CharField(max_length=10)  # 'estimated' or 'default'
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.category}: {self.elasticity} ({self.source})"
+
+class PricingExperiment(models.Model):
+    """A live price experiment splitting traffic between price arms"""
+    STATUS_CHOICES = [('running', 'Running'), ('stopped', 'Stopped')]
+
+    name = models.CharField(max_length=255, unique=True)
+    product = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True, blank=True,
+                                related_name='experiments')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='running')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
+
+class ExperimentArm(models.Model):
+    """One price tested in an experiment, with running totals of its events"""
+    experiment = models.ForeignKey(PricingExperiment, on_delete=models.CASCADE, related_name='arms')
+    name = models.CharField(max_length=100)
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+
+    # Sufficient statistics, incremented as events are ingested
+    exposures = models.PositiveBigIntegerField(default=0)
+    purchases = models.PositiveBigIntegerField(default=0)
+    revenue = models.FloatField(default=0.0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['experiment', 'name'], name='unique_experiment_arm')
+        ]
+
+    def __str__(self):
+        return f"{self.experiment_id}/{self.name} @ {self.price}"
+
+class ExperimentEvent(models.Model):
+    """Append-only log of exposures and purchases; the arm counters summarize it"""
+    EVENT_CHOICES = [('exposure', 'Exposure'), ('purchase', 'Purchase')]
+
+    arm = models.ForeignKey(ExperimentArm, on_delete=models.CASCADE, related_name='events')
+    event_type = models.CharField(max_length=10, choices=EVENT_CHOICES)
+    revenue = models.FloatField(default=0.0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.event_type} on arm {self.arm_id}"
+
+class PricingStrategy(models.Model):
+    """A pricing strategy evaluated by the strategy simulator, editable without a deploy"""
+    BASE_CHOICES = [('cost', 'Cost price'), ('current', 'Current price')]
+    ROUNDING_CHOICES = [
+        ('none', 'No rounding'),
+        ('cents', 'Nearest cent'),
+        ('whole', 'Nearest whole unit'),
+        ('charm', 'Up to the next .99'),
+    ]
+
+    name = models.CharField(max_length=100, unique=True)
+    description = models.CharField(max_length=255, blank=True)
+    base = models.CharField(max_length=10, choices=BASE_CHOICES, default='cost')
+    price_factor = models.FloatField(default=1.0)  # price = base price * factor
+    min_margin = models.FloatField(null=True, blank=True)  # floor: price >= cost * (1 + min_margin)
+    max_price_factor = models.FloatField(null=True, blank=True)  # cap: price <= current price * factor
+    rounding = models.CharField(max_length=10, choices=ROUNDING_CHOICES, default='none')
+    is_active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.base} x {self.price_factor})"
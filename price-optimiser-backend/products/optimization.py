@@ -1,5 +1,10 @@
 import numpy as np
 from decimal import Decimal
+from functools import lru_cache
+
+SOLVERS = ('grid', 'lookup', 'analytic', 'golden', 'auto')
+GOLDEN_RATIO = (np.sqrt(5.0) - 1.0) / 2.0
+NORMALIZED_CURVE_CACHE_SIZE = 4096
 
 def optimize_price(
     cost_price,
@@ -7,7 +12,9 @@ def optimize_price(
     demand_elasticity=-1.5,
     max_price_factor=1.5,
     base_demand=100.0,
-    steps=100
+    steps=100,
+    solver='grid',
+    tol=0.005
 ):
     cost_price = float(cost_price)
     if current_price is None:
@@ -15,6 +22,16 @@ def optimize_price(
     else:
         current_price = float(current_price)
 
+    if solver != 'grid':
+        prices, profits = optimize_prices(
+            [cost_price], current_price, demand_elasticity,
+            max_price_factor, base_demand, steps, solver=solver, tol=tol
+        )
+        if not np.isfinite(prices[0]):
+            raise ValueError("No finite optimum for the given inputs")
+        return (Decimal(prices[0]).quantize(Decimal("0.01")),
+                Decimal(profits[0]).quantize(Decimal("0.01")))
+
     prices  = np.linspace(cost_price, cost_price * max_price_factor, steps)
     demands = base_demand * (prices / current_price) ** demand_elasticity
     profits = (prices - cost_price) * demands
@@ -25,4 +42,190 @@ def optimize_price(
     best_price  = Decimal(prices[idx]).quantize(Decimal("0.01"))
     best_profit = Decimal(profits[idx]).quantize(Decimal("0.01"))
 
-    return best_price, best_profit
\ No newline at end of file
+    return best_price, best_profit
+
+def optimize_prices(
+    cost_prices,
+    current_prices=None,
+    elasticities=-1.5,
+    max_price_factor=1.5,
+    base_demand=100.0,
+    steps=100,
+    solver='grid',
+    tol=0.005
+):
+    """Vectorized optimize_price over a whole catalog.
+
+    Evaluates every product on its own candidate grid as a single
+    (products x steps) matrix. `current_prices` and `elasticities` may be
+    scalars or per-product arrays; a missing (None/NaN) current price falls
+    back to cost * 1.2 like the scalar version. Returns float arrays
+    (best_prices, best_profits), unrounded; rows without a finite optimum
+    come back as NaN.
+
+    `solver` selects how the optimum is found:
+      - 'grid': brute force over `steps` evenly spaced prices (default)
+      - 'lookup': the grid optimum solved once per (elasticity, price ratio,
+        bounds, steps) on a cost-normalized curve and scaled to each cost
+      - 'analytic': closed-form optimum of the constant-elasticity curve
+      - 'golden': bounded golden-section search down to `tol` (price units)
+      - 'auto': analytic, falling back to golden-section where it fails
+    """
+    if solver not in SOLVERS:
+        raise ValueError(f"Unknown solver '{solver}', expected one of {SOLVERS}")
+
+    cost_prices = np.asarray(cost_prices, dtype=float).ravel()
+    n = cost_prices.shape[0]
+    if n == 0:
+        return np.empty(0), np.empty(0)
+
+    if current_prices is None:
+        current_prices = cost_prices * 1.2
+    else:
+        current_prices = np.broadcast_to(
+            np.asarray(current_prices, dtype=float), (n,)
+        )
+        current_prices = np.where(
+            np.isnan(current_prices), cost_prices * 1.2, current_prices
+        )
+    elasticities = np.broadcast_to(np.asarray(elasticities, dtype=float), (n,))
+
+    if solver == 'grid':
+        return _grid_optimum(cost_prices, current_prices, elasticities,
+                             max_price_factor, base_demand, steps)
+    if solver == 'lookup':
+        return _lookup_optimum(cost_prices, current_prices, elasticities,
+                               max_price_factor, base_demand, steps)
+
+    upper = cost_prices * max_price_factor
+    if solver == 'golden':
+        prices = _golden_section_optimum(cost_prices, current_prices, elasticities,
+                                         upper, base_demand, tol)
+    else:
+        prices = _analytic_optimum(cost_prices, elasticities, upper)
+        if solver == 'auto':
+            failed = ~np.isfinite(prices)
+            if failed.any():
+                prices[failed] = _golden_section_optimum(
+                    cost_prices[failed], current_prices[failed], elasticities[failed],
+                    upper[failed], base_demand, tol
+                )
+
+    profits = _profit(prices, cost_prices, current_prices, elasticities, base_demand)
+    valid = np.isfinite(profits)
+    return np.where(valid, prices, np.nan), np.where(valid, profits, np.nan)
+
+def _profit(prices, cost_prices, current_prices, elasticities, base_demand):
+    """Profit of the constant-elasticity demand curve at the given prices"""
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        demands = base_demand * (prices / current_prices) ** elasticities
+        return (prices - cost_prices) * demands
+
+def _grid_optimum(cost_prices, current_prices, elasticities, max_price_factor, base_demand, steps):
+    """Argmax over a (products x steps) candidate price matrix"""
+    n = cost_prices.shape[0]
+
+    # linspace with array endpoints yields exactly the per-row scalar grids
+    prices = np.linspace(cost_prices, cost_prices * max_price_factor, steps, axis=1)
+    profits = _profit(prices, cost_prices[:, None], current_prices[:, None],
+                      elasticities[:, None], base_demand)
+
+    valid = ~np.isnan(profits)
+    idx = np.argmax(np.where(valid, profits, -np.inf), axis=1)
+    rows = np.arange(n)
+    has_optimum = valid.any(axis=1)
+
+    best_prices = np.where(has_optimum, prices[rows, idx], np.nan)
+    best_profits = np.where(has_optimum, profits[rows, idx], np.nan)
+    return best_prices, best_profits
+
+@lru_cache(maxsize=NORMALIZED_CURVE_CACHE_SIZE)
+def _normalized_grid_optimum(elasticity, max_price_factor, steps, price_ratio, base_demand):
+    """Best price multiplier and profit per unit of cost on the normalized grid.
+
+    With prices expressed as multiples m of cost, profit is
+    cost * (m - 1) * base_demand * (m / price_ratio) ** elasticity, so the
+    argmax does not depend on the absolute cost.
+    """
+    multipliers = np.linspace(1.0, max_price_factor, steps)
+    profits = _profit(multipliers, 1.0, price_ratio, elasticity, base_demand)
+    if np.all(np.isnan(profits)):
+        return np.nan, np.nan
+    idx = np.nanargmax(profits)
+    return float(multipliers[idx]), float(profits[idx])
+
+def normalized_curve_cache_info():
+    """Hit/miss statistics of the normalized profit-curve table"""
+    return _normalized_grid_optimum.cache_info()
+
+def _lookup_optimum(cost_prices, current_prices, elasticities, max_price_factor, base_demand, steps):
+    """Grid optimum via the memoized normalized-curve table"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratios = current_prices / cost_prices
+
+    # Solve each distinct (elasticity, ratio) pair once and scatter back
+    keys, inverse = np.unique(np.column_stack([elasticities, ratios]), axis=0, return_inverse=True)
+    table = np.array([
+        _normalized_grid_optimum(float(elasticity), float(max_price_factor), int(steps),
+                                 float(ratio), float(base_demand))
+        for elasticity, ratio in keys
+    ]).reshape(-1, 2)
+    inverse = inverse.ravel()
+
+    valid = cost_prices > 0
+    with np.errstate(invalid='ignore'):
+        best_prices = np.where(valid, cost_prices * table[inverse, 0], np.nan)
+        best_profits = np.where(valid, cost_prices * table[inverse, 1], np.nan)
+    return best_prices, best_profits
+
+def _analytic_optimum(cost_prices, elasticities, upper):
+    """Closed-form argmax of (p - c) * p**e on [c, upper].
+
+    The first-order condition gives p* = e * c / (1 + e), which is a maximum
+    only for elastic demand (e < -1). Otherwise profit rises monotonically
+    with price and the optimum sits on the upper bound.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        interior = elasticities * cost_prices / (1.0 + elasticities)
+    prices = np.where(elasticities < -1, np.clip(interior, cost_prices, upper), upper)
+    return np.where(cost_prices > 0, prices, np.nan)
+
+def _golden_section_optimum(cost_prices, current_prices, elasticities, upper, base_demand, tol):
+    """Bounded golden-section search, run in lockstep for every product.
+
+    Products without a positive cost have no bracket and get NaN, as the
+    other solvers return.
+    """
+    valid = cost_prices > 0
+    if not valid.any():
+        return np.full(cost_prices.shape, np.nan)
+    lo = np.where(valid, cost_prices, np.nan)
+    hi = np.where(valid, upper, np.nan)
+    width = np.nanmax(np.abs(hi - lo))
+    if not np.isfinite(width) or width <= tol:
+        return (lo + hi) / 2.0
+
+    def profit(prices):
+        result = _profit(prices, cost_prices, current_prices, elasticities, base_demand)
+        return np.where(np.isnan(result), -np.inf, result)
+
+    x1 = hi - GOLDEN_RATIO * (hi - lo)
+    x2 = lo + GOLDEN_RATIO * (hi - lo)
+    f1, f2 = profit(x1), profit(x2)
+
+    # Each iteration shrinks the bracket by the golden ratio
+    iterations = int(np.ceil(np.log(tol / width) / np.log(GOLDEN_RATIO)))
+    for _ in range(iterations):
+        move_up = f1 < f2
+        lo = np.where(move_up, x1, lo)
+        hi = np.where(move_up, hi, x2)
+        new_x = np.where(move_up, lo + GOLDEN_RATIO * (hi - lo), hi - GOLDEN_RATIO * (hi - lo))
+        new_f = profit(new_x)
+        x1, x2, f1, f2 = (
+            np.where(move_up, x2, new_x),
+            np.where(move_up, new_x, x1),
+            np.where(move_up, f2, new_f),
+            np.where(move_up, new_f, f1),
+        )
+
+    return (lo + hi) / 2.0
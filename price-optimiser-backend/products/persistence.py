@@ -0,0 +1,59 @@
+import time
+import logging
+from decimal import Decimal
+from typing import Dict, Iterable, Optional
+from django.conf import settings
+from django.db import transaction
+from .models import Product
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1000
+
+def get_chunk_size(chunk_size: Optional[int] = None) -> int:
+    """Resolve the bulk write chunk size (argument > settings > default)"""
+    if chunk_size is None:
+        chunk_size = getattr(settings, 'PRICING_BULK_UPDATE_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+    return max(int(chunk_size), 1)
+
+def bulk_update_optimized_prices(products: Iterable[Product], optimized_prices: Iterable[Decimal],
+                                 chunk_size: Optional[int] = None) -> Dict[str, float]:
+    """Persist optimized prices with chunked bulk_update.
+
+    Only rows whose optimized_price actually changes are written, only the
+    optimized_price column is sent, and every chunk commits in its own
+    transaction so the write lock is released between chunks.
+    """
+    chunk_size = get_chunk_size(chunk_size)
+    start = time.perf_counter()
+
+    changed = []
+    skipped = 0
+    for product, price in zip(products, optimized_prices):
+        if price is None or product.optimized_price == price:
+            skipped += 1
+            continue
+        product.optimized_price = price
+        changed.append(product)
+
+    chunks = 0
+    for offset in range(0, len(changed), chunk_size):
+        chunk = changed[offset:offset + chunk_size]
+        with transaction.atomic():
+            Product.objects.bulk_update(chunk, ['optimized_price'])
+        chunks += 1
+
+    elapsed = time.perf_counter() - start
+    stats = {
+        'rows_updated': len(changed),
+        'rows_skipped': skipped,
+        'chunks': chunks,
+        'chunk_size': chunk_size,
+        'elapsed_seconds': round(elapsed, 4),
+        'rows_per_second': round(len(changed) / elapsed, 1) if elapsed > 0 else 0.0,
+    }
+    logger.info(
+        f"Persisted {stats['rows_updated']} optimized prices in {chunks} chunks "
+        f"({stats['rows_per_second']} rows/sec, {skipped} unchanged)"
+    )
+    return stats
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from decimal import Decimal
 from .models import Product
+from .forecasts import latest_demand_value
 
 class ProductSerializer(serializers.ModelSerializer):
     profit_margin = serializers.SerializerMethodField()
@@ -80,10 +81,9 @@ class ProductListSerializer(serializers.ModelSerializer):
         return Decimal('0.00')
     
     def get_demand_forecast_value(self, obj):
-        """Get the latest demand forecast value"""
-        if hasattr(obj, 'demand_forecast') and obj.demand_forecast:
-            if isinstance(obj.demand_forecast, dict) and obj.demand_forecast:
-                # Return the latest forecast value
-                latest_year = max(obj.demand_forecast.keys())
-                return obj.demand_forecast[latest_year]
-        return 0
+        """Get the latest demand forecast value.
+
+        The latest period is the largest integer period, as in the demand
+        table, rather than the largest key as a string ('999' > '1000').
+        """
+        return latest_demand_value(obj.demand_forecast)
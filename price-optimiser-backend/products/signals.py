@@ -0,0 +1,58 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Product, PriceObservation, PricingStrategy
+from .cache import get_forecast_cache
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_product_forecasts(sender, instance, **kwargs):
+    """Drop cached forecasts a product populated when it changes or goes away"""
+    get_forecast_cache().invalidate_product(instance.pk)
+
+@receiver(post_save, sender=Product)
+def sync_product_holt_state(sender, instance, raw=False, **kwargs):
+    """Advance (or rebuild) the stored Holt state when the demand history changes"""
+    if raw:
+        return
+    from .forecasts import sync_holt_state
+    sync_holt_state(instance)
+
+@receiver(post_save, sender=Product)
+def sync_product_demand_observations(sender, instance, raw=False, **kwargs):
+    """Keep the normalized demand table in step with demand_forecast"""
+    if raw:
+        return
+    from .demand_history import sync_demand_observations
+    sync_demand_observations(instance)
+
+# Registered after the demand sync so the ratio sees the saved demand history
+@receiver(post_save, sender=Product)
+def refresh_product_inventory_status(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Recompute the stored inventory status when stock or demand may have changed"""
+    if raw:
+        return
+    if update_fields is not None and not {'stock_available', 'demand_forecast'} & set(update_fields):
+        return
+    from .inventory import refresh_inventory_status
+    refresh_inventory_status(Product.objects.filter(pk=instance.pk))
+
+@receiver(post_save, sender=PriceObservation)
+@receiver(post_delete, sender=PriceObservation)
+def invalidate_product_elasticity(sender, instance, **kwargs):
+    """A new or edited price observation makes the cached elasticity stale"""
+    from .elasticity import invalidate_elasticities
+    invalidate_elasticities([instance.product_id])
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_pooled_elasticity(sender, instance, **kwargs):
+    """The pooled estimate depends on the product's category"""
+    from .elasticity import invalidate_elasticities
+    invalidate_elasticities([instance.pk])
+
+@receiver(post_save, sender=PricingStrategy)
+@receiver(post_delete, sender=PricingStrategy)
+def invalidate_pricing_strategies(sender, instance, **kwargs):
+    """Recompile the strategy table after a strategy is edited, added or removed"""
+    from .strategies import invalidate_strategy_table
+    invalidate_strategy_table()
@@ -0,0 +1,164 @@
+import time
+import logging
+import threading
+import numpy as np
+from typing import Any, Dict, List, Optional, Tuple
+from django.conf import settings
+from django.db.models import Count, Max, Q, Sum
+from .models import PricingStrategy
+
+logger = logging.getLogger(__name__)
+
+ROUNDING_RULES = ('none', 'cents', 'whole', 'charm')
+
+# Used when the registry has no active strategies
+DEFAULT_STRATEGIES = [
+    {'name': 'penetration', 'price_factor': 0.9, 'description': 'Low price to gain market share'},
+    {'name': 'skimming', 'price_factor': 1.3, 'description': 'High price for premium positioning'},
+    {'name': 'competitive', 'price_factor': 1.0, 'description': 'Match competitor pricing'},
+    {'name': 'cost_plus', 'price_factor': 1.2, 'description': 'Cost plus 20% margin'},
+    {'name': 'value_based', 'price_factor': 1.1, 'description': 'Price based on perceived value'},
+]
+
+STRATEGY_FIELDS = ('name', 'description', 'base', 'price_factor', 'min_margin', 'max_price_factor', 'rounding')
+
+def _round_half_up(prices: np.ndarray, decimals: int = 0) -> np.ndarray:
+    scale = 10.0 ** decimals
+    return np.floor(prices * scale + 0.5) / scale
+
+def _ceil_cents(prices: np.ndarray) -> np.ndarray:
+    # The tolerance keeps float noise such as 10.990000000000002 on its cent
+    return np.ceil(prices * 100 - 1e-6) / 100
+
+def _round_charm(prices: np.ndarray) -> np.ndarray:
+    """Smallest price ending in .99 at or above each price"""
+    return np.ceil(_ceil_cents(prices) + 0.01 - 1e-9) - 0.01
+
+ROUNDERS = {
+    'cents': lambda prices: _round_half_up(prices, 2),
+    'whole': _round_half_up,
+    'charm': _round_charm,
+}
+
+# Upward variants, used where rounding to nearest would undercut the margin floor
+ROUNDERS_UP = {
+    'cents': _ceil_cents,
+    'whole': lambda prices: np.ceil(prices - 1e-9),
+    'charm': _round_charm,
+}
+
+class StrategyTable:
+    """Strategies compiled into parameter arrays, one entry per strategy.
+
+    `prices` evaluates every strategy for every product as one
+    (products x strategies) array: base price times factor, then the cap
+    on the current price, then the margin floor over cost (the floor wins
+    a conflict), then the rounding rule. Rounding is half-up, and rounds up
+    instead wherever rounding to nearest would drop below the floor.
+    """
+
+    def __init__(self, strategies: List[Dict[str, Any]]):
+        self.strategies = [
+            {
+                'name': strategy['name'],
+                'description': strategy.get('description', ''),
+                'base': strategy.get('base', 'cost'),
+                'price_factor': float(strategy['price_factor']),
+                'min_margin': strategy.get('min_margin'),
+                'max_price_factor': strategy.get('max_price_factor'),
+                'rounding': strategy.get('rounding', 'none'),
+            }
+            for strategy in strategies
+        ]
+        self.names = [strategy['name'] for strategy in self.strategies]
+        self.factors = np.array([strategy['price_factor'] for strategy in self.strategies], dtype=float)
+        self.on_cost = np.array([strategy['base'] == 'cost' for strategy in self.strategies], dtype=bool)
+        self.min_margins = np.array([
+            np.nan if strategy['min_margin'] is None else strategy['min_margin'] for strategy in self.strategies
+        ], dtype=float)
+        self.caps = np.array([
+            np.nan if strategy['max_price_factor'] is None else strategy['max_price_factor']
+            for strategy in self.strategies
+        ], dtype=float)
+        self.rounding = np.array([ROUNDING_RULES.index(strategy['rounding']) for strategy in self.strategies],
+                                 dtype=np.int64)
+
+    def __len__(self):
+        return len(self.names)
+
+    def prices(self, cost_prices: np.ndarray, current_prices: np.ndarray) -> np.ndarray:
+        """Price of every strategy for every product, (products x strategies)"""
+        cost = np.asarray(cost_prices, dtype=float)[:, None]
+        current = np.asarray(current_prices, dtype=float)[:, None]
+        prices = np.where(self.on_cost, cost, current) * self.factors
+
+        capped = ~np.isnan(self.caps)
+        if capped.any():
+            prices[:, capped] = np.minimum(prices[:, capped], current * self.caps[capped])
+        floored = ~np.isnan(self.min_margins)
+        floors = np.where(floored, cost * (1.0 + np.nan_to_num(self.min_margins)), -np.inf)
+        if floored.any():
+            prices[:, floored] = np.maximum(prices[:, floored], floors[:, floored])
+        for rule, rounder in ROUNDERS.items():
+            columns = self.rounding == ROUNDING_RULES.index(rule)
+            if columns.any():
+                rounded = rounder(prices[:, columns])
+                prices[:, columns] = np.where(rounded < floors[:, columns], ROUNDERS_UP[rule](prices[:, columns]),
+                                              rounded)
+        return prices
+
+def load_strategy_table() -> StrategyTable:
+    """Compile the active strategies, in creation order, from one query"""
+    rows = list(PricingStrategy.objects.filter(is_active=True).order_by('id').values(*STRATEGY_FIELDS))
+    if not rows:
+        logger.warning("No active pricing strategies, using the built-in defaults")
+        rows = DEFAULT_STRATEGIES
+    return StrategyTable(rows)
+
+def registry_stamp() -> Tuple[Any, ...]:
+    """Cheap fingerprint of the registry from one aggregate query.
+
+    Row count and last modification catch saves and deletes; the active
+    rows' count, id sum and factor sum also catch queryset.update() calls
+    that toggle is_active or change factors, which bypass auto_now. Other
+    bulk field updates are only picked up once a strategy is saved.
+    """
+    active = Q(is_active=True)
+    stamp = PricingStrategy.objects.aggregate(
+        count=Count('id'), updated=Max('updated_at'), active=Count('id', filter=active),
+        active_ids=Sum('id', filter=active), factors=Sum('price_factor', filter=active),
+    )
+    return stamp['count'], stamp['updated'], stamp['active'], stamp['active_ids'], stamp['factors']
+
+_strategy_table: Optional[StrategyTable] = None
+_strategy_stamp = None
+_strategy_checked_at = 0.0
+_strategy_lock = threading.Lock()
+
+def get_strategy_table() -> StrategyTable:
+    """Compiled strategies, loaded once per worker.
+
+    Saving or deleting a strategy drops this worker's copy at once. Other
+    workers, and bulk updates that skip the signal, compare registry_stamp
+    every STRATEGY_REGISTRY_TTL seconds and recompile only when it changed.
+    """
+    global _strategy_table, _strategy_stamp, _strategy_checked_at
+    ttl = getattr(settings, 'STRATEGY_REGISTRY_TTL', 30.0)
+    now = time.monotonic()
+    table = _strategy_table
+    if table is not None and now - _strategy_checked_at < ttl:
+        return table
+    with _strategy_lock:
+        stamp = registry_stamp()
+        if _strategy_table is None or stamp != _strategy_stamp:
+            _strategy_table = load_strategy_table()
+            _strategy_stamp = stamp
+        _strategy_checked_at = now
+        return _strategy_table
+
+def invalidate_strategy_table():
+    """Make this worker recompile the strategies on next use"""
+    global _strategy_table, _strategy_stamp
+    with _strategy_lock:
+        _strategy_table = None
+        _strategy_stamp = None
@@ -1,11 +1,12 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from rest_framework.test import APITestCase
 from rest_framework import status
 from decimal import Decimal
-from .models import Product
-from .forecasts import simple_linear_forecast
-from .optimization import optimize_price
+import numpy as np
+from .models import Product, HoltState
+from .forecasts import simple_linear_forecast, advanced_forecast, AdvancedDemandForecaster, BatchForecaster
+from .optimization import optimize_price, optimize_prices
 
 User = get_user_model()
 
@@ -65,6 +66,466 @@ class ForecastTest(TestCase):
         forecast = simple_linear_forecast({'2022': 100})
         self.assertEqual(forecast, 100)
 
+class BatchForecasterTest(TestCase):
+    def setUp(self):
+        self.histories = [
+            {'2020': 100, '2021': 120, '2022': 140},
+            {'2019': 80, '2021': 95, '2020': 60, '2022': 130, '2023': 110},
+            {'2018': 10.5, '2019': 7.25, '2020': 30.0, '2021': 12.0, '2022': 0, '2023': 41.5},
+            "{'2021': 50, '2022': 70}",
+            {'2022': 100},
+            {},
+            'not a dict',
+        ]
+
+    def test_batch_matches_reference_values(self):
+        """Test results against the pre-batch scalar implementation"""
+        # (linear, exponential, moving_average, seasonal, ensemble, confidence) from the
+        # original per-product AdvancedDemandForecaster, except the two seasonal values
+        # marked below: np.polyfit on raw years truncated them one unit low (133, 179)
+        reference = [
+            (160, 160, 120, 140, 147, 0.87),
+            (134, 63, 122, 134, 106, 0.71),  # seasonal was 133
+            (28, 15, 18, 28, 20, 0.73),
+            (90, 90, 70, 70, 82, 0.89),
+            (100, 100, 100, 100, 100, 0.95),
+            (0, 0, 0, 0, 0, 0.5),
+            (0, 0, 0, 0, 0, 0.5),
+            (180, 180, 150, 180, 172, 0.92),  # seasonal was 179
+        ]
+        histories = self.histories + [{'2020': 100, '2021': 120, '2022': 140, '2023': 160}]
+        results = BatchForecaster(histories).results()
+
+        self.assertEqual(len(results), len(histories))
+        columns = ('linear', 'exponential', 'moving_average', 'seasonal', 'ensemble', 'confidence')
+        for history, result, expected in zip(histories, results, reference):
+            self.assertEqual(tuple(result[column] for column in columns), expected, history)
+        self.assertEqual(AdvancedDemandForecaster().ensemble_forecast(histories[1]), results[1])
+
+    def test_exact_linear_trend(self):
+        """Test a perfectly linear history projects without rounding loss"""
+        result = BatchForecaster([{'2020': 100, '2021': 120, '2022': 140, '2023': 160}]).results()[0]
+        self.assertEqual(result['linear'], 180)
+        self.assertEqual(result['seasonal'], 180)
+
+    def test_short_and_invalid_histories_fall_back(self):
+        """Test short histories return their last value and invalid ones zero"""
+        results = BatchForecaster(self.histories).results()
+        self.assertEqual(results[4]['linear'], 100)
+        self.assertEqual(results[4]['ensemble'], 100)
+        self.assertEqual(results[5]['ensemble'], 0)
+        self.assertEqual(results[6]['ensemble'], 0)
+        self.assertEqual(results[5]['confidence'], 0.5)
+
+    def test_trend_statistics(self):
+        """Test growth rate and volatility for the whole batch"""
+        growth_rate, volatility = BatchForecaster(self.histories).trend_statistics()
+        self.assertAlmostEqual(growth_rate[0], 40.0)
+        self.assertAlmostEqual(volatility[0], np.std([100, 120, 140]) / 120 * 100)
+        self.assertEqual(growth_rate[4], 0)
+
+    def test_forecast_paths(self):
+        """Test multi-step paths start at the one-step forecasts and extend each method"""
+        batch = BatchForecaster(self.histories)
+        one_step = batch.ensemble_forecast()
+        paths = batch.ensemble_path(4)
+        for method in ('linear', 'exponential', 'moving_average', 'seasonal', 'ensemble'):
+            self.assertEqual(paths[method].shape, (len(self.histories), 4))
+            np.testing.assert_array_equal(paths[method][:, 0], one_step[method])
+
+        path = AdvancedDemandForecaster().forecast_path({'2020': 100, '2021': 120, '2022': 140, '2023': 160}, 3)
+        self.assertEqual(path['linear'], [180, 200, 220])
+        self.assertEqual(path['seasonal'], [180, 200, 220])
+        self.assertEqual(paths['ensemble'][4].tolist(), [100] * 4)
+
+    def test_parallel_mode_matches_serial(self):
+        """Test process-pool forecasting returns the serial results in order"""
+        from .cache import ForecastCache, LocalLRUCache
+        histories = self.histories * 5
+        serial = AdvancedDemandForecaster(workers=1).batch_ensemble_forecast(histories)
+        parallel = AdvancedDemandForecaster(
+            cache=ForecastCache(LocalLRUCache()), workers=2, chunk_size=4
+        )
+
+        self.assertEqual(parallel.batch_ensemble_forecast(histories), serial)
+        records = parallel.forecast_catalog(histories)
+        self.assertEqual([record['forecast'] for record in records], serial)
+
+class ForecastCacheTest(TestCase):
+    def setUp(self):
+        from .cache import get_forecast_cache
+        self.cache = get_forecast_cache()
+        self.cache.clear()
+        self.product = Product.objects.create(
+            name='Cached Product',
+            category='Electronics',
+            cost_price=Decimal('50.00'),
+            selling_price=Decimal('100.00'),
+            stock_available=100,
+            units_sold=50,
+            demand_forecast={'2022': 100, '2023': 120, '2024': 140}
+        )
+
+    def test_second_lookup_hits_cache(self):
+        """Test repeated forecasts are served from the cache"""
+        forecaster = AdvancedDemandForecaster()
+        first = forecaster.forecast_catalog([self.product.demand_forecast], [self.product.id])
+        second = forecaster.forecast_catalog([self.product.demand_forecast], [self.product.id])
+
+        self.assertEqual(first, second)
+        self.assertEqual(first[0]['forecast'], forecaster.ensemble_forecast(self.product.demand_forecast))
+        self.assertEqual(self.cache.stats()['misses'], 1)
+        self.assertEqual(self.cache.stats()['hits'], 1)
+
+    def test_product_save_invalidates_entries(self):
+        """Test saving a product evicts the forecasts it populated"""
+        forecaster = AdvancedDemandForecaster()
+        forecaster.forecast_catalog([self.product.demand_forecast], [self.product.id])
+        key = forecaster.cache_keys(BatchForecaster([self.product.demand_forecast]))[0]
+        self.assertIn(key, self.cache.backend.get_many([key]))
+
+        self.product.demand_forecast = {'2022': 100, '2023': 120, '2024': 90}
+        self.product.save()
+        self.assertNotIn(key, self.cache.backend.get_many([key]))
+
+    def test_key_order_sensitive(self):
+        """Test histories differing only in key order, and so in fallback, get different keys"""
+        self.assertNotEqual(self.cache.make_key({'2022': 10, '2021': 30}, window=3),
+                            self.cache.make_key({'2021': 30, '2022': 10}, window=3))
+        self.assertEqual(self.cache.make_key({'2021': 30}, window=3, alpha=0.3),
+                         self.cache.make_key({'2021': 30}, alpha=0.3, window=3))
+
+    def test_local_lru_eviction_and_timeout(self):
+        """Test the in-process backend evicts least recently used and expired entries"""
+        from .cache import LocalLRUCache
+        lru = LocalLRUCache(max_entries=2)
+        lru.set_many({'a': 1, 'b': 2})
+        lru.get_many(['a'])
+        lru.set_many({'c': 3})
+        self.assertEqual(lru.get_many(['a', 'b', 'c']), {'a': 1, 'c': 3})
+
+        lru.set_many({'d': 4}, timeout=0)
+        self.assertEqual(lru.get_many(['d']), {})
+
+class HoltStateTest(TestCase):
+    def setUp(self):
+        from .cache import get_forecast_cache
+        get_forecast_cache().clear()
+        self.product = Product.objects.create(
+            name='Smoothed Product',
+            category='Home',
+            cost_price=Decimal('20.00'),
+            selling_price=Decimal('35.00'),
+            stock_available=40,
+            units_sold=30,
+            demand_forecast={'2021': 80, '2022': 95, '2023': 90}
+        )
+
+    def test_state_created_on_save(self):
+        """Test saving a product stores the replayed Holt state"""
+        from .forecasts import holt_replay
+        state = HoltState.objects.get(product=self.product)
+        level, trend = holt_replay([80.0, 95.0, 90.0])
+        self.assertEqual((state.level, state.trend, state.observations), (level, trend, 3))
+
+    def test_appended_period_advances_state(self):
+        """Test appending a period matches a full replay exactly"""
+        from .forecasts import holt_replay
+        self.product.demand_forecast = {'2021': 80, '2022': 95, '2023': 90, '2024': 120}
+        self.product.save()
+
+        state = HoltState.objects.get(product=self.product)
+        self.assertEqual((state.level, state.trend), holt_replay([80.0, 95.0, 90.0, 120.0]))
+        self.assertEqual(state.observations, 4)
+        self.assertEqual(state.last_period, 2024)
+
+    def test_rewritten_history_replays(self):
+        """Test changing an already covered period rebuilds the state"""
+        from .forecasts import holt_replay
+        self.product.demand_forecast = {'2021': 50, '2022': 95, '2023': 90, '2024': 120}
+        self.product.save()
+
+        state = HoltState.objects.get(product=self.product)
+        self.assertEqual((state.level, state.trend), holt_replay([50.0, 95.0, 90.0, 120.0]))
+
+    def test_unparsable_entries_skipped(self):
+        """Test products with malformed history entries still save, using the valid periods"""
+        from .forecasts import holt_replay
+        for history in ({'Q1': 10}, {'2022': None}, {'2022': 'abc'}, {'2022': 'inf'}, {'2020': 'nan', '2021': 'Infinity'}):
+            product = Product.objects.create(
+                name=f'Malformed {history}', category='Home', cost_price=Decimal('20.00'),
+                selling_price=Decimal('35.00'), stock_available=40, units_sold=30, demand_forecast=history
+            )
+            self.assertFalse(HoltState.objects.filter(product=product).exists())
+
+        self.product.demand_forecast = {'2021': 80, 'Q1': 5, '2022': 95, '2023': None, '2024': 90, '2025': 'nan'}
+        self.product.save()
+        state = HoltState.objects.get(product=self.product)
+        self.assertEqual((state.level, state.trend), holt_replay([80.0, 95.0, 90.0]))
+        self.assertEqual(AdvancedDemandForecaster().ensemble_forecast(self.product.demand_forecast),
+                         AdvancedDemandForecaster().ensemble_forecast({'2021': 80, '2022': 95, '2024': 90}))
+
+    def test_forecast_uses_stored_state(self):
+        """Test the catalog forecast reads the stored state instead of replaying"""
+        forecaster = AdvancedDemandForecaster()
+        record = forecaster.forecast_catalog([self.product.demand_forecast], [self.product.id])[0]
+        self.assertEqual(record['forecast']['exponential'],
+                         forecaster.exponential_smoothing_forecast(self.product.demand_forecast))
+
+        HoltState.objects.filter(product=self.product).update(level=500.0, trend=10.0)
+        forecaster.forecast_cache.clear()
+        record = forecaster.forecast_catalog([self.product.demand_forecast], [self.product.id])[0]
+        self.assertEqual(record['forecast']['exponential'], 510)
+
+class DemandHistoryTest(TestCase):
+    def setUp(self):
+        from .cache import get_forecast_cache
+        get_forecast_cache().clear()
+        self.products = [
+            Product.objects.create(
+                name=f'History Product {i}',
+                category='Home',
+                cost_price=Decimal('20.00'),
+                selling_price=Decimal('35.00'),
+                stock_available=40,
+                units_sold=30,
+                demand_forecast=history
+            )
+            for i, history in enumerate([
+                {'2020': 80, '2021': 95, '2022': 90, '2023': 120},
+                {},
+                {'2022': 40, '2023': 55.5},
+            ])
+        ]
+
+    def test_save_mirrors_history(self):
+        """Test saving a product writes only the changed observations"""
+        from .models import DemandObservation
+        product = self.products[0]
+        product.demand_forecast = {'2021': 95, '2022': 100, '2023': 120, '2024': 130}
+        product.save()
+
+        rows = list(DemandObservation.objects.filter(product=product)
+                    .order_by('period').values_list('period', 'quantity'))
+        self.assertEqual(rows, [(2021, 95.0), (2022, 100.0), (2023, 120.0), (2024, 130.0)])
+
+    def test_loader_aligns_series_to_ids(self):
+        """Test the loader returns flat ordered arrays aligned to the requested ids"""
+        from .demand_history import load_demand_series
+        ids = [self.products[2].id, self.products[1].id, self.products[0].id]
+        lengths, periods, quantities = load_demand_series(ids)
+
+        self.assertEqual(lengths.tolist(), [2, 0, 4])
+        self.assertEqual(periods.tolist(), [2022, 2023, 2020, 2021, 2022, 2023])
+        self.assertEqual(quantities.tolist(), [40, 55.5, 80, 95, 90, 120])
+
+        lengths, periods, _ = load_demand_series(ids, start_period=2022)
+        self.assertEqual(lengths.tolist(), [2, 0, 2])
+
+    def test_loaded_batch_matches_json_histories(self):
+        """Test forecasts from the demand table equal those from the JSON blobs"""
+        from .demand_history import load_batch_forecaster
+        batch = load_batch_forecaster([product.id for product in self.products])
+        expected = BatchForecaster([product.demand_forecast for product in self.products])
+
+        self.assertEqual(batch.results(), expected.results())
+        self.assertEqual(batch.history(0), self.products[0].demand_forecast)
+        self.assertEqual(batch.history(2), self.products[2].demand_forecast)
+
+    def test_unordered_and_malformed_histories(self):
+        """Test both paths agree on unordered short histories and skip malformed entries"""
+        from .demand_history import load_batch_forecaster
+        from .models import DemandObservation
+        product = self.products[2]
+        product.demand_forecast = {'2023': 55, '2021': 40, 'Q1': 7, '2022': None}
+        product.save()
+        rows = list(DemandObservation.objects.filter(product=product).order_by('period').values_list('period', 'quantity'))
+        self.assertEqual(rows, [(2021, 40.0), (2023, 55.0)])
+
+        # The latest period, not the last key, is what a short history forecasts
+        batch = load_batch_forecaster([product.id])
+        expected = BatchForecaster([product.demand_forecast])
+        self.assertEqual(batch.results(), expected.results())
+        self.assertEqual(expected.results()[0]['moving_average'], 55)
+
+class ElasticityTest(TestCase):
+    def setUp(self):
+        from .cache import get_elasticity_cache
+        get_elasticity_cache().clear()
+        self.products = [
+            Product.objects.create(
+                name=f'Elastic Product {i}',
+                category='Fashion',
+                cost_price=Decimal('10.00'),
+                selling_price=Decimal('25.00'),
+                stock_available=20,
+                units_sold=15
+            )
+            for i in range(3)
+        ]
+        self.prices = [10.0, 12.0, 15.0, 18.0]
+
+    def observations(self, product, elasticity, periods=(2020, 2021, 2022, 2023)):
+        return [(product.id, period, price, 1000 * price ** elasticity) for period, price in zip(periods, self.prices)]
+
+    def test_grouped_fit_matches_per_product_regression(self):
+        """Test the stacked fit equals one least-squares line per product"""
+        from .elasticity import fit_elasticities
+        rng = np.random.default_rng(3)
+        lengths = np.array([5, 0, 2, 8, 3])
+        prices = rng.uniform(5, 50, lengths.sum())
+        quantities = rng.uniform(10, 500, lengths.sum())
+        slope, std_error, r_squared = fit_elasticities(lengths, prices, quantities)
+
+        start = 0
+        for i, length in enumerate(lengths.tolist()):
+            if length >= 3:
+                expected = np.polyfit(np.log(prices[start:start + length]), np.log(quantities[start:start + length]), 1)[0]
+                self.assertAlmostEqual(slope[i], expected)
+                self.assertTrue(0 <= r_squared[i] <= 1)
+            else:
+                self.assertTrue(np.isnan(slope[i]) and np.isnan(std_error[i]))
+            start += length
+
+        flat = fit_elasticities([3], [20.0, 20.0, 20.0], [5.0, 6.0, 7.0])[0]
+        self.assertTrue(np.isnan(flat[0]))
+
+    def test_estimates_are_cached_and_invalidated(self):
+        """Test estimates come from stored observations, are cached and refit on new data"""
+        from .elasticity import estimate_elasticities, record_price_observations, refresh_category_priors
+        record_price_observations(self.observations(self.products[0], -2.0) + self.observations(self.products[1], -0.7))
+        refresh_category_priors()
+        ids = [product.id for product in self.products]
+
+        estimates = estimate_elasticities(ids)
+        self.assertAlmostEqual(estimates[ids[0]]['elasticity'], -2.0)
+        self.assertAlmostEqual(estimates[ids[1]]['elasticity'], -0.7)
+        self.assertEqual(estimates[ids[2]]['source'], 'category')
+        self.assertEqual(estimates[ids[2]]['elasticity'], -1.35)
+        self.assertEqual(estimates[ids[2]]['shrinkage_weight'], 0)
+        with self.assertNumQueries(0):
+            self.assertEqual(estimate_elasticities(ids), estimates)
+
+        record_price_observations(self.observations(self.products[0], -1.2, (2024, 2025, 2026, 2027)))
+        refit = estimate_elasticities(ids)
+        self.assertNotEqual(refit[ids[0]]['elasticity'], -2.0)
+        self.assertEqual(refit[ids[0]]['observations'], 8)
+        self.assertEqual(refit[ids[1]], estimates[ids[1]])
+
+        # Single edits go through the model signal
+        from .models import PriceObservation
+        PriceObservation.objects.create(product=self.products[2], period=2020, price=10, quantity=100)
+        PriceObservation.objects.create(product=self.products[2], period=2021, price=20, quantity=50)
+        PriceObservation.objects.create(product=self.products[2], period=2022, price=40, quantity=25)
+        self.assertAlmostEqual(estimate_elasticities(ids)[ids[2]]['elasticity'], -1.0)
+
+    def test_sparse_products_shrink_towards_category(self):
+        """Test the closed-form priors and shrinkage weights"""
+        from .elasticity import category_priors, shrink_elasticities, DEFAULT_PRIOR_VARIANCE
+        slope = np.array([-1.0, -3.0, np.nan, -0.5])
+        std_error = np.array([0.5, 0.5, np.nan, 0.1])
+        priors = category_priors(['Home', 'Home', 'Home', 'Toys'], slope, std_error)
+        self.assertEqual(priors['Home']['elasticity'], -2.0)
+        self.assertEqual(priors['Home']['variance'], 1.75)
+        self.assertEqual(priors['Toys']['source'], 'default')
+        self.assertEqual(priors['Toys']['variance'], DEFAULT_PRIOR_VARIANCE)
+
+        mean = np.array([-2.0, -2.0, -2.0, -1.5])
+        variance = np.array([1.75, 1.75, 1.75, DEFAULT_PRIOR_VARIANCE])
+        pooled, weight = shrink_elasticities(slope, std_error, mean, variance)
+        np.testing.assert_allclose(weight, [0.875, 0.875, 0.0, 0.25 / 0.26])
+        np.testing.assert_allclose(pooled[:3], [-1.125, -2.875, -2.0])
+        self.assertTrue(-0.5 > pooled[3] > -1.5)
+
+    def test_requests_only_read_stored_priors(self):
+        """Test priors are refitted only by the refresh, and requests read the stored ones"""
+        from .cache import get_elasticity_cache
+        from .elasticity import get_category_priors, record_price_observations, refresh_category_priors
+        from .models import CategoryElasticityPrior
+        record_price_observations(self.observations(self.products[0], -2.0) + self.observations(self.products[1], -0.7))
+        self.assertEqual(get_category_priors(), {})
+
+        refresh_category_priors()
+        self.assertEqual(CategoryElasticityPrior.objects.get(category='Fashion').elasticity, -1.35)
+        get_elasticity_cache().clear()
+        with self.assertNumQueries(1):
+            self.assertEqual(get_category_priors()['Fashion']['source'], 'estimated')
+        with self.assertNumQueries(0):
+            get_category_priors()
+
+    def test_invalidation_reaches_other_workers(self):
+        """Test the default shared backend lets an observation evict the estimate every worker reads"""
+        from .cache import DjangoCacheBackend, get_elasticity_cache
+        from .elasticity import elasticity_key, estimate_elasticities, record_price_observations
+        self.assertIsInstance(get_elasticity_cache(), DjangoCacheBackend)
+        other_worker = DjangoCacheBackend('default', 600)
+        product = self.products[0]
+        self.assertEqual(estimate_elasticities([product.id], cache=other_worker)[product.id]['source'], 'default')
+        record_price_observations(self.observations(product, -0.8))
+        self.assertNotIn(elasticity_key(product.id), other_worker.get_many([elasticity_key(product.id)]))
+        self.assertAlmostEqual(estimate_elasticities([product.id], cache=other_worker)[product.id]['elasticity'], -0.8)
+
+    def test_heatmap_counts_in_sql_and_bins_products(self):
+        """Test the heatmap groups in one query and bins products by range"""
+        from .advanced_optimization import PriceElasticityAnalyzer
+        from .elasticity import record_price_observations, refresh_category_priors
+        Product.objects.create(name='Lamp', category='Home', cost_price=Decimal('5.00'),
+                               selling_price=Decimal('9.00'), stock_available=3, units_sold=2)
+        record_price_observations(
+            self.observations(self.products[0], -2.5) + self.observations(self.products[1], -1.2)
+            + self.observations(self.products[2], -0.75)
+        )
+        refresh_category_priors()
+        analyzer = PriceElasticityAnalyzer()
+        with self.assertNumQueries(1):
+            heatmap = analyzer.get_elasticity_heatmap()
+        self.assertEqual(heatmap['categories'], ['Fashion', 'Home'])
+        self.assertEqual([entry['product_count'] for entry in heatmap['data']], [3, 1])
+        self.assertEqual([entry['range_index'] for entry in heatmap['data']], [1, 1])
+
+        binned = analyzer.get_elasticity_heatmap(product_bins=True)
+        self.assertEqual(binned['data'][0]['product_bins'], [1, 1, 1, 0])
+        self.assertEqual(binned['data'][1]['product_bins'], [0, 1, 0, 0])
+
+    def test_analyzer_uses_estimates(self):
+        """Test the analyzer, heatmap and optimizer use the estimated elasticities"""
+        from .advanced_optimization import PriceElasticityAnalyzer, advanced_optimize_price
+        from .elasticity import record_price_observations, refresh_category_priors
+        record_price_observations(self.observations(self.products[0], -0.4) + self.observations(self.products[1], -0.6))
+        refresh_category_priors()
+        analyzer = PriceElasticityAnalyzer()
+        self.assertAlmostEqual(analyzer.calculate_elasticity(self.prices, [1000 * p ** -2.5 for p in self.prices]), -2.5)
+        self.assertEqual(analyzer.calculate_elasticity([10.0], [5.0]), -1.5)
+
+        heatmap = analyzer.get_elasticity_heatmap()
+        self.assertEqual(heatmap['categories'], ['Fashion'])
+        self.assertEqual(heatmap['data'][0]['elasticity'], -0.5)
+        self.assertEqual(heatmap['data'][0]['range_index'], 3)
+        self.assertEqual(heatmap['data'][0]['product_count'], 3)
+        self.assertEqual(heatmap['data'][0]['estimated_products'], 2)
+
+        result = advanced_optimize_price({'id': self.products[0].id, 'cost_price': 10, 'selling_price': 25})
+        self.assertAlmostEqual(result['elasticity'], -0.4)
+        self.assertEqual(result['elasticity_source'], 'estimated')
+
+    def test_batch_ab_testing_matches_single_product(self):
+        """Test batch ab_testing prices with the pooled estimates, like ab-testing/ does"""
+        from rest_framework.test import APIClient
+        from .elasticity import record_price_observations, refresh_category_priors
+        record_price_observations(self.observations(self.products[0], -0.4) + self.observations(self.products[1], -2.5))
+        refresh_category_priors()
+        Product.objects.update(demand_forecast={'2023': 100, '2024': 120})
+        client = APIClient()
+        client.force_authenticate(user=User.objects.create_user(username='elastic', password='testpass123',
+                                                                email='elastic@example.com', role='supplier'))
+        response = client.post('/api/products/batch-optimize/', {
+            'product_ids': [product.id for product in self.products], 'type': 'ab_testing'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for result in response.data['data']['results']:
+            single = client.post('/api/products/ab-testing/', {'product_id': result['product_id']}, format='json')
+            self.assertEqual(result['strategies'], single.data['data']['strategies'])
+
 class OptimizationTest(TestCase):
     def test_optimize_price(self):
         """Test the price optimization function"""
@@ -85,6 +546,811 @@ class OptimizationTest(TestCase):
         self.assertIsInstance(best_price, Decimal)
         self.assertIsInstance(best_profit, Decimal)
 
+    def test_optimize_prices_matches_scalar(self):
+        """Test the vectorized optimizer agrees with the scalar one row by row"""
+        costs = [10.0, 50.0, 123.45, 7.5]
+        currents = [None, 80.0, 150.0, None]
+        elasticities = [-1.5, -2.0, -0.8, -3.0]
+        best_prices, best_profits = optimize_prices(
+            costs,
+            [float('nan') if c is None else c for c in currents],
+            elasticities
+        )
+
+        for i, cost in enumerate(costs):
+            price, profit = optimize_price(cost, currents[i], elasticities[i])
+            self.assertEqual(Decimal(best_prices[i]).quantize(Decimal("0.01")), price)
+            self.assertEqual(Decimal(best_profits[i]).quantize(Decimal("0.01")), profit)
+
+    def test_optimize_prices_without_optimum(self):
+        """Test rows with no finite optimum come back as NaN"""
+        best_prices, best_profits = optimize_prices([0.0, 50.0])
+        self.assertTrue(np.isnan(best_prices[0]))
+        self.assertFalse(np.isnan(best_prices[1]))
+
+    def test_lookup_solver_matches_grid(self):
+        """Test the normalized-curve table reproduces the grid optimum"""
+        from .optimization import normalized_curve_cache_info
+        rng = np.random.default_rng(1)
+        costs = np.round(rng.uniform(1, 500, 500), 2)
+        elasticities = rng.choice([-0.8, -1.5, -2.5], 500)
+        grid_prices, grid_profits = optimize_prices(costs, None, elasticities)
+        prices, profits = optimize_prices(costs, None, elasticities, solver='lookup')
+
+        np.testing.assert_array_equal(np.round(prices, 2), np.round(grid_prices, 2))
+        np.testing.assert_allclose(profits, grid_profits, rtol=1e-9)
+        self.assertLessEqual(normalized_curve_cache_info().currsize, 4096)
+
+    def test_analytic_solver_beats_grid(self):
+        """Test the closed-form optimum is at least as good as the grid"""
+        costs = np.array([10.0, 50.0, 123.45])
+        elasticities = np.array([-1.5, -3.0, -0.8])
+        grid_prices, grid_profits = optimize_prices(costs, None, elasticities)
+        prices, profits = optimize_prices(costs, None, elasticities, solver='analytic')
+
+        self.assertTrue(np.all(profits >= grid_profits))
+        # e * c / (1 + e) = 30 lies above the 1.5x cap, so it is clipped
+        self.assertAlmostEqual(prices[0], 15.0)
+        self.assertAlmostEqual(prices[1], 75.0)
+        # Inelastic demand: profit rises with price up to the cap
+        self.assertAlmostEqual(prices[2], 123.45 * 1.5)
+
+    def test_golden_solver_within_tolerance(self):
+        """Test golden-section search lands within the requested tolerance"""
+        rng = np.random.default_rng(0)
+        costs = rng.uniform(1, 500, 200)
+        elasticities = rng.uniform(-4, -0.3, 200)
+        exact, _ = optimize_prices(costs, None, elasticities, solver='analytic')
+        approx, _ = optimize_prices(costs, None, elasticities, solver='golden', tol=0.01)
+        self.assertLessEqual(np.max(np.abs(exact - approx)), 0.01)
+
+    def test_solvers_agree_without_positive_cost(self):
+        """Test every non-grid solver returns NaN for products without a positive cost"""
+        costs = np.array([0.0, -5.0, 50.0])
+        current = np.array([10.0, 10.0, 60.0])
+        for solver in ('lookup', 'analytic', 'golden', 'auto'):
+            prices, profits = optimize_prices(costs, current, np.array([-0.5, -3.0, -3.0]), solver=solver)
+            self.assertTrue(np.isnan(prices[:2]).all() and np.isnan(profits[:2]).all(), solver)
+            self.assertAlmostEqual(prices[2], 75.0, places=1)
+
+    def test_optimize_price_solver_option(self):
+        """Test the scalar optimizer accepts a solver and rejects unknown ones"""
+        best_price, _ = optimize_price(Decimal('50.00'), demand_elasticity=-3.0, solver='auto')
+        self.assertEqual(best_price, Decimal('75.00'))
+        with self.assertRaises(ValueError):
+            optimize_price(Decimal('50.00'), solver='newton')
+
+    def test_vectorized_engines_match_scalar(self):
+        """Test the array inventory and strategy engines agree with the per-product ones"""
+        from .advanced_optimization import INVENTORY_STATUSES, InventoryAwareOptimizer, ABTestingSimulator
+        products = [
+            {'cost_price': '10.00', 'selling_price': '15.00', 'stock_available': 5, 'demand_forecast_value': 100},
+            {'cost_price': '40.00', 'selling_price': '44.00', 'stock_available': 30, 'demand_forecast_value': 100},
+            {'cost_price': '8.00', 'selling_price': '20.00', 'stock_available': 70, 'demand_forecast_value': 100},
+            {'cost_price': '8.00', 'selling_price': '20.00', 'stock_available': 500, 'demand_forecast_value': 0},
+        ]
+        elasticities = [-1.5, -0.4, -2.5, -1.0]
+
+        inventory = InventoryAwareOptimizer()
+        codes = inventory.inventory_status_codes([p['stock_available'] for p in products],
+                                                 [p['demand_forecast_value'] for p in products])
+        statuses = [INVENTORY_STATUSES[code] for code in codes]
+        self.assertEqual(statuses, [inventory.get_inventory_status(p) for p in products])
+        self.assertEqual(statuses, ['low', 'medium', 'adequate', 'unknown'])
+        np.testing.assert_allclose(inventory.adjust_prices_for_inventory(np.full(4, 100.0), codes),
+                                   [115.0, 105.0, 100.0, 100.0])
+
+        simulator = ABTestingSimulator()
+        batch = simulator.compare_strategies_batch(products, elasticities)
+        for product, elasticity, strategies in zip(products, elasticities, batch):
+            expected = [simulator.simulate_strategy(product, name, elasticity) for name in simulator.strategies]
+            expected.sort(key=lambda x: x['profit'], reverse=True)
+            self.assertEqual(strategies, expected)
+        self.assertEqual(simulator.compare_strategies_batch([{'cost_price': 0, 'selling_price': 10}], [-1.5]), [[]])
+
+    def test_strategy_grid_top_k(self):
+        """Test the 3D strategy grid matches the scalar simulation and top-k keeps the best"""
+        from .advanced_optimization import ABTestingSimulator
+        simulator = ABTestingSimulator()
+        products = [
+            {'cost_price': 10.0, 'selling_price': 15.0, 'demand_forecast_value': 100},
+            {'cost_price': 40.0, 'selling_price': 44.0, 'demand_forecast_value': 80},
+            {'cost_price': 0.0, 'selling_price': 20.0, 'demand_forecast_value': 50},
+        ]
+        elasticities = np.array([[-0.5, -1.5, -3.0], [-0.4, -1.0, -2.0], [-1.0, -1.0, -1.0]])
+        columns = [[p[key] for p in products] for key in ('cost_price', 'selling_price', 'demand_forecast_value')]
+        grid = simulator.simulate_grid(*columns, elasticities)
+
+        self.assertEqual(grid['profit'].shape, (3, len(simulator.strategies), 3))
+        self.assertEqual(grid['valid'].tolist(), [True, True, False])
+        for s_index, name in enumerate(simulator.strategies):
+            expected = simulator.simulate_strategy(products[0], name, -1.5)
+            self.assertEqual(round(float(grid['profit'][0, s_index, 1]), 2), expected['profit'])
+            self.assertEqual(round(float(grid['demand'][0, s_index, 1]), 0), expected['demand'])
+
+        top = simulator.top_strategies(grid['profit'][:2], 2)
+        full = np.argsort(-grid['profit'][:2], axis=1, kind='stable')[:, :2]
+        np.testing.assert_array_equal(top, full)
+
+        result = simulator.simulate_columns([7, 8, 9], *columns, elasticities, top_k=2)
+        self.assertEqual(result['product_ids'], [7, 8])
+        self.assertEqual(result['skipped'], [9])
+        self.assertEqual(np.array(result['price']).shape, (2, 2, 3))
+        best = result['strategy'][0][0][2]
+        self.assertEqual(result['profit'][0][0][2], round(float(grid['profit'][0, best, 2]), 2))
+
+class BacktestTest(TestCase):
+    def setUp(self):
+        from .cache import get_forecast_cache
+        get_forecast_cache().clear()
+        self.histories = [
+            {str(2010 + i): 100 + 10 * i for i in range(8)},
+            {str(2010 + i): 50 + 5 * i for i in range(6)},
+            {'2018': 10, '2019': 40, '2020': 15, '2021': 35, '2022': 20, '2023': 30},
+            {'2022': 5, '2023': 7},
+        ]
+        self.categories = ['Linear', 'Linear', 'Noisy', 'Noisy']
+
+    def test_holdout_matches_truncated_histories(self):
+        """Test each origin forecasts exactly what the truncated history would"""
+        forecaster = AdvancedDemandForecaster()
+        batch = BatchForecaster(self.histories)
+        for origin in (1, 3):
+            train, actual = batch.holdout(origin, [0, 2])
+            results = train.results()
+            for row, (i, result) in enumerate(zip([0, 2], results)):
+                periods = sorted(self.histories[i], key=int)
+                kept = {period: self.histories[i][period] for period in periods[:-origin]}
+                self.assertEqual(result, forecaster.ensemble_forecast(kept))
+                self.assertEqual(actual[row], self.histories[i][periods[-origin]])
+
+    def test_backtest_metrics_and_learned_weights(self):
+        """Test per-category errors and weights that favor the accurate methods"""
+        from .backtesting import rolling_origin_backtest, learn_ensemble_weights
+        report = rolling_origin_backtest(BatchForecaster(self.histories), self.categories, origins=3)
+
+        linear = report['categories']['Linear']
+        self.assertEqual(linear['samples'], 6)
+        self.assertEqual(linear['linear']['rmse'], 0.0)
+        self.assertEqual(linear['linear']['mape'], 0.0)
+        self.assertGreater(linear['moving_average']['rmse'], 0.0)
+        self.assertEqual(report['samples'], 6 + 3)
+
+        weights = learn_ensemble_weights(report, min_samples=5)
+        self.assertEqual(set(weights), {'Linear'})
+        self.assertAlmostEqual(sum(weights['Linear'].values()), 1.0, places=3)
+        self.assertGreater(weights['Linear']['linear'], weights['Linear']['moving_average'])
+
+    def test_forecaster_applies_category_weights(self):
+        """Test learned weights drive the ensemble only for their category"""
+        from .cache import ForecastCache, LocalLRUCache
+        only_linear = {'linear': 1.0, 'exponential': 0.0, 'moving_average': 0.0, 'seasonal': 0.0}
+        forecaster = AdvancedDemandForecaster(cache=ForecastCache(LocalLRUCache()),
+                                              category_weights={'Noisy': only_linear})
+        records = forecaster.forecast_catalog(self.histories, categories=self.categories)
+
+        self.assertEqual(records[2]['forecast']['ensemble'], records[2]['forecast']['linear'])
+        self.assertEqual(records[0]['forecast'], forecaster.ensemble_forecast(self.histories[0]))
+        self.assertNotEqual(forecaster.cache_keys(BatchForecaster(self.histories[2:3]), ['Noisy']),
+                            forecaster.cache_keys(BatchForecaster(self.histories[2:3])))
+
+    def test_weights_file_round_trip(self):
+        """Test saved weights are what a new process loads"""
+        import os
+        import tempfile
+        from .backtesting import rolling_origin_backtest, learn_ensemble_weights, save_ensemble_weights
+        from .forecasts import read_ensemble_weights
+        report = rolling_origin_backtest(BatchForecaster(self.histories), self.categories, origins=3)
+        weights = learn_ensemble_weights(report, min_samples=1)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'weights.json')
+            save_ensemble_weights(path, weights, report)
+            self.assertEqual(read_ensemble_weights(path), weights)
+            self.assertEqual(read_ensemble_weights(os.path.join(directory, 'missing.json')), {})
+
+class PredictionIntervalTest(TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.count = 2000
+        trend = rng.uniform(-5, 10, self.count)
+        base = rng.uniform(100, 500, self.count)
+        series = base[:, None] + trend[:, None] * np.arange(13) + rng.normal(0, 10, (self.count, 13))
+        self.histories = [{str(2010 + t): float(row[t]) for t in range(12)} for row in series]
+        self.actual = series[:, 12]
+        self.batch = BatchForecaster(self.histories)
+        self.center = self.batch.ensemble_forecast()['ensemble']
+
+    def test_intervals_cover_the_next_value(self):
+        """Test 90% intervals cover roughly 90% of the next observations"""
+        low, high = self.batch.prediction_intervals(self.center, (0.05, 0.95))
+        coverage = np.mean((self.actual >= low) & (self.actual <= high))
+        self.assertGreater(coverage, 0.8)
+        self.assertLess(coverage, 0.98)
+        self.assertTrue(np.all(low <= self.center) and np.all(high >= self.center))
+
+    def test_intervals_are_deterministic_and_batch_independent(self):
+        """Test seeding, block size and batch composition do not change a row's interval"""
+        low, high = self.batch.prediction_intervals(self.center)
+        blocked = self.batch.prediction_intervals(self.center, block_elements=1000)
+        np.testing.assert_array_equal(blocked[0], low)
+        np.testing.assert_array_equal(blocked[1], high)
+
+        gapped = {'2015': 10, '2017': 14, '2018': 15, '2021': 24}
+        batch = BatchForecaster([self.histories[3], gapped, {'2022': 5, '2023': 6}])
+        center = batch.ensemble_forecast()['ensemble']
+        mixed_low, mixed_high = batch.prediction_intervals(center)
+        self.assertEqual((mixed_low[0], mixed_high[0]), (low[3], high[3]))
+        alone = BatchForecaster([gapped]).prediction_intervals(center[1:2])
+        self.assertEqual((alone[0][0], alone[1][0]), (mixed_low[1], mixed_high[1]))
+        self.assertTrue(np.isnan(mixed_low[2]) and np.isnan(mixed_high[2]))
+
+    def test_forecast_records_include_intervals(self):
+        """Test cached forecast records carry the interval bounds"""
+        from .cache import ForecastCache, LocalLRUCache
+        forecaster = AdvancedDemandForecaster(cache=ForecastCache(LocalLRUCache()))
+        records = forecaster.forecast_catalog([self.histories[0], {'2023': 4}])
+        low, high = self.batch.prediction_intervals(self.center)
+        self.assertEqual((records[0]['interval_low'], records[0]['interval_high']), (low[0], high[0]))
+        self.assertIsNone(records[1]['interval_low'])
+
+class AnomalyDetectionTest(TestCase):
+    def setUp(self):
+        self.spiked = {'2018': 100, '2019': 110, '2020': 120, '2021': 500, '2022': 140, '2023': 150}
+        self.dropped = {'2018': 50, '2019': 52, '2020': 48, '2021': 51, '2022': 49, '2023': 5}
+        self.clean = {str(2015 + t): 200 + 5 * t + (3 if t % 2 else -3) for t in range(9)}
+        self.short = {'2021': 10, '2022': 900, '2023': 12}
+        self.batch = BatchForecaster([self.spiked, self.dropped, self.clean, self.short, {}])
+
+    def test_flags_outlying_periods(self):
+        """Test spikes and drops are flagged while clean and short histories are not"""
+        self.assertEqual(self.batch.anomaly_periods(), [[2021], [2023], [], [], []])
+        alone = BatchForecaster([self.dropped]).anomaly_periods()
+        self.assertEqual(alone, [[2023]])
+
+    def test_winsorized_clips_only_flagged_points(self):
+        """Test winsorizing pulls anomalies back to their limits and keeps everything else"""
+        clipped = self.batch.winsorized()
+        flagged = self.batch.anomalies()
+        np.testing.assert_array_equal(clipped.values[~flagged], self.batch.values[~flagged])
+        self.assertLess(clipped.values[0, -3], 500)
+        self.assertGreater(clipped.values[0, -3], 130)
+        low, high = self.batch.anomaly_bounds()
+        self.assertEqual(clipped.values[0, -3], high[0, -3])
+        self.assertEqual(clipped.values[1, -1], low[1, -1])
+
+    def test_forecast_records_carry_flags(self):
+        """Test records list anomalies and winsorizing is part of the cache key"""
+        from .cache import ForecastCache, LocalLRUCache
+        cache = ForecastCache(LocalLRUCache())
+        raw = AdvancedDemandForecaster(cache=cache)
+        records = raw.forecast_catalog([self.spiked, self.clean])
+        self.assertEqual([record['anomalies'] for record in records], [[2021], []])
+
+        with override_settings(FORECAST_WINSORIZE=True):
+            winsorized = AdvancedDemandForecaster(cache=cache)
+        clipped = winsorized.forecast_catalog([self.spiked, self.clean])
+        self.assertEqual(clipped[0]['anomalies'], [2021])
+        self.assertLess(clipped[0]['forecast']['ensemble'], records[0]['forecast']['ensemble'])
+        self.assertEqual(clipped[1]['forecast'], records[1]['forecast'])
+        self.assertEqual(cache.stats()['hits'], 0)
+
+class PersistenceTest(TestCase):
+    def setUp(self):
+        for i in range(5):
+            Product.objects.create(
+                name=f'Product {i}',
+                category='Electronics',
+                cost_price=Decimal('10.00'),
+                selling_price=Decimal('20.00'),
+                stock_available=10,
+                units_sold=5,
+                optimized_price=Decimal('15.00')
+            )
+
+    def test_bulk_update_writes_changed_rows_in_chunks(self):
+        """Test only changed prices are written, chunk by chunk"""
+        from .persistence import bulk_update_optimized_prices
+        products = list(Product.objects.order_by('id'))
+        prices = [Decimal('15.00'), Decimal('16.00'), Decimal('17.00'), None, Decimal('18.00')]
+
+        stats = bulk_update_optimized_prices(products, prices, chunk_size=2)
+
+        self.assertEqual(stats['rows_updated'], 3)
+        self.assertEqual(stats['rows_skipped'], 2)
+        self.assertEqual(stats['chunks'], 2)
+        self.assertIn('rows_per_second', stats)
+        saved = list(Product.objects.order_by('id').values_list('optimized_price', flat=True))
+        self.assertEqual(saved, [Decimal('15.00'), Decimal('16.00'), Decimal('17.00'),
+                                 Decimal('15.00'), Decimal('18.00')])
+
+class PricingModelStoreTest(TestCase):
+    def setUp(self):
+        import tempfile
+        from .model_store import reset_pricing_model
+        for i in range(12):
+            Product.objects.create(
+                name=f'Product {i}',
+                category='Electronics' if i % 2 else 'Books',
+                cost_price=Decimal(10 + i),
+                selling_price=Decimal(15 + 2 * i),
+                stock_available=10 * i,
+                units_sold=5 + i,
+                customer_rating=Decimal('4.0') if i % 3 else None,
+                demand_forecast={'2022': 40 + i, '2023': 50 + 3 * i} if i % 4 else {}
+            )
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.settings_override = override_settings(PRICING_MODEL_DIR=self.directory.name)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        reset_pricing_model()
+        self.addCleanup(reset_pricing_model)
+
+    def training_set(self):
+        from .advanced_optimization import MLPriceOptimizer
+        builder = MLPriceOptimizer()
+        X, y = builder.training_data()
+        self.categories = builder.categories
+        return X, y
+
+    def test_feature_matrix_matches_serialized_products(self):
+        """Test the database and serializer feature paths build the same float32 matrix"""
+        from .advanced_optimization import MLPriceOptimizer
+        from .features import FEATURE_COLUMNS, UNKNOWN_CATEGORY
+        from .serializers import ProductListSerializer
+        optimizer = MLPriceOptimizer()
+        with self.assertNumQueries(2):
+            X, y = optimizer.training_data()
+        self.assertEqual(optimizer.categories, ('Books', 'Electronics'))
+        self.assertEqual(X.dtype, np.float32)
+        self.assertEqual(X.shape, (12, len(FEATURE_COLUMNS)))
+
+        products = ProductListSerializer(Product.objects.order_by('id'), many=True).data
+        np.testing.assert_array_equal(X, optimizer.feature_matrix(products))
+        self.assertEqual(X[:, FEATURE_COLUMNS.index('category')].tolist(), [0.0, 1.0] * 6)
+        self.assertEqual(X[5, FEATURE_COLUMNS.index('demand_forecast_value')], 65.0)
+        self.assertEqual(X[4, FEATURE_COLUMNS.index('demand_forecast_value')], 0.0)
+        np.testing.assert_allclose(y, [(15 + 2 * i) / (10 + i) for i in range(12)], rtol=1e-6)
+
+        # Periods compare as integers on both paths, not as strings
+        product = Product.objects.get(name='Product 2')
+        product.demand_forecast = {'999': 10, '1000': 20}
+        product.save()
+        ids, X = optimizer.load_features(Product.objects.filter(pk=product.pk))
+        serialized = ProductListSerializer([product], many=True).data
+        self.assertEqual(serialized[0]['demand_forecast_value'], 20)
+        np.testing.assert_array_equal(X, optimizer.feature_matrix(serialized))
+
+        Product.objects.filter(name='Product 0').update(category='Garden')
+        ids, X = optimizer.load_features(Product.objects.filter(name__in=['Product 1', 'Product 0']))
+        self.assertEqual(ids.tolist(), sorted(ids.tolist()))
+        self.assertEqual(X[:, FEATURE_COLUMNS.index('category')].tolist(), [UNKNOWN_CATEGORY, 1.0])
+
+    def test_save_and_load_versions(self):
+        """Test saved models round-trip and each save becomes the next active version"""
+        from .model_store import train_pricing_model, training_fingerprint, save_pricing_model, load_pricing_model
+        X, y = self.training_set()
+        optimizer, metrics = train_pricing_model(X, y, holdout=0.25)
+        self.assertEqual(metrics['samples'], 12)
+        self.assertEqual(metrics['holdout_samples'], 3)
+        self.assertIsNotNone(metrics['holdout']['rmse'])
+
+        first = save_pricing_model(optimizer, training_fingerprint(X, y), metrics)
+        second = save_pricing_model(optimizer, training_fingerprint(X, y), metrics)
+        self.assertEqual((first['version'], second['version']), (1, 2))
+
+        loaded, manifest = load_pricing_model()
+        self.assertEqual(manifest['version'], 2)
+        self.assertTrue(loaded.is_trained)
+        np.testing.assert_allclose(loaded.predict_ratios(X), optimizer.predict_ratios(X))
+
+        with self.assertRaises(ValueError):
+            train_pricing_model(X[:5], y[:5])
+
+    def test_model_loaded_once_per_process(self):
+        """Test the active model is cached until a new version is saved"""
+        from .model_store import get_pricing_model, save_pricing_model, train_pricing_model
+        self.assertEqual(get_pricing_model(), (None, None))
+
+        X, y = self.training_set()
+        optimizer, metrics = train_pricing_model(X, y)
+        save_pricing_model(optimizer, 'first', metrics)
+        loaded, manifest = get_pricing_model()
+        self.assertEqual(manifest['version'], 1)
+        self.assertIs(get_pricing_model()[0], loaded)
+
+        save_pricing_model(optimizer, 'second', metrics)
+        reloaded, manifest = get_pricing_model()
+        self.assertEqual(manifest['fingerprint'], 'second')
+        self.assertIsNot(reloaded, loaded)
+
+    def test_train_command_skips_unchanged_data(self):
+        """Test the command saves a version and only retrains when the data changes"""
+        from io import StringIO
+        from django.core.management import call_command
+        from .model_store import read_manifest
+        call_command('train_pricing_model', stdout=StringIO())
+        self.assertEqual(read_manifest()['version'], 1)
+
+        out = StringIO()
+        call_command('train_pricing_model', stdout=out)
+        self.assertIn('unchanged', out.getvalue())
+        self.assertEqual(read_manifest()['version'], 1)
+
+        Product.objects.filter(name='Product 0').update(selling_price=Decimal('30.00'))
+        call_command('train_pricing_model', '--dry-run', stdout=StringIO())
+        self.assertEqual(read_manifest()['version'], 1)
+        call_command('train_pricing_model', stdout=StringIO())
+        self.assertEqual(read_manifest()['version'], 2)
+
+    def test_batch_inference_predicts_once(self):
+        """Test the batch pipeline scores every product with one predict call"""
+        from unittest import mock
+        from .advanced_optimization import advanced_optimize_prices, advanced_optimize_price
+        from .model_store import train_pricing_model
+        from .serializers import ProductListSerializer
+        X, y = self.training_set()
+        optimizer, _ = train_pricing_model(X, y, categories=self.categories)
+        products = ProductListSerializer(Product.objects.order_by('id'), many=True).data
+
+        with mock.patch.object(optimizer, 'predict_distribution', wraps=optimizer.predict_distribution) as predict:
+            results = advanced_optimize_prices(products, optimizer)
+        self.assertEqual(predict.call_count, 1)
+        self.assertEqual(len(results), len(products))
+
+        for product, result in zip(products, results):
+            ml_price, _ = optimizer.predict_optimal_price(product)
+            factor = {'low': 1.15, 'medium': 1.05, 'adequate': 1.0, 'high': 0.95, 'unknown': 1.0}
+            self.assertAlmostEqual(result['recommended_price'],
+                                   round(ml_price * factor[result['inventory_status']], 2))
+        single = advanced_optimize_price(products[3], optimizer)
+        for key in ('recommended_price', 'inventory_status', 'ab_testing_results', 'justification'):
+            self.assertEqual(single[key], results[3][key])
+        self.assertEqual(advanced_optimize_prices([], optimizer), [])
+
+    def test_products_without_prices_do_not_fail_batch(self):
+        """Test a product without a positive current price gets no strategies and no percentage change"""
+        from .advanced_optimization import advanced_optimize_prices
+        from .model_store import train_pricing_model
+        X, y = self.training_set()
+        optimizer, _ = train_pricing_model(X, y, categories=self.categories)
+        for ml_optimizer in (None, optimizer):
+            results = advanced_optimize_prices([{'cost_price': 5, 'selling_price': 0},
+                                                {'cost_price': 5, 'selling_price': 8}], ml_optimizer)
+            self.assertEqual(results[0]['ab_testing_results'], [])
+            self.assertIsNone(results[0]['justification']['price_change_percent'])
+            self.assertIn('no current price', results[0]['justification']['summary'])
+            self.assertIsNotNone(results[1]['justification']['price_change_percent'])
+
+    def test_confidence_from_tree_spread(self):
+        """Test confidences are deterministic and come from the trees' disagreement"""
+        from .advanced_optimization import MAX_ML_CONFIDENCE, MIN_ML_CONFIDENCE
+        from .model_store import train_pricing_model
+        X, y = self.training_set()
+        optimizer, _ = train_pricing_model(X, y, categories=self.categories)
+
+        mean, spread = optimizer.predict_distribution(X)
+        per_tree = np.array([tree.predict(optimizer.scaler.transform(X)) for tree in optimizer.model.estimators_])
+        np.testing.assert_allclose(mean, optimizer.model.predict(optimizer.scaler.transform(X)))
+        np.testing.assert_allclose(spread, per_tree.std(axis=0), atol=1e-9)
+
+        cost = X[:, 0].astype(float)
+        prices, confidences = optimizer.predict_optimal_prices(X, cost, X[:, 1])
+        again = optimizer.predict_optimal_prices(X, cost, X[:, 1])
+        np.testing.assert_array_equal(confidences, again[1])
+        np.testing.assert_allclose(confidences, np.clip(1 - spread / mean, MIN_ML_CONFIDENCE, MAX_ML_CONFIDENCE))
+
+        optimizer.model.set_params(n_jobs=2)
+        np.testing.assert_allclose(optimizer.predict_optimal_prices(X, cost, X[:, 1])[1], confidences)
+
+    def test_outdated_model_format_ignored(self):
+        """Test models saved in an older format are not served and get retrained"""
+        import json
+        import os
+        from io import StringIO
+        from django.core.management import call_command
+        from .model_store import MANIFEST_NAME, load_pricing_model, read_manifest
+        call_command('train_pricing_model', stdout=StringIO())
+        path = os.path.join(self.directory.name, MANIFEST_NAME)
+        manifest = read_manifest()
+        manifest.pop('format')
+        with open(path, 'w') as handle:
+            json.dump(manifest, handle)
+        self.assertEqual(load_pricing_model(), (None, None))
+
+        call_command('train_pricing_model', stdout=StringIO())
+        self.assertEqual(read_manifest()['version'], 2)
+        self.assertIsNotNone(load_pricing_model()[0])
+
+    def test_ml_optimize_reports_model_version(self):
+        """Test the ML endpoint uses the stored model and reports its version"""
+        from django.core.management import call_command
+        from io import StringIO
+        call_command('train_pricing_model', stdout=StringIO())
+        user = User.objects.create_user(username='modeluser', password='testpass123',
+                                        email='model@example.com', role='supplier')
+        from rest_framework.test import APIClient
+        client = APIClient()
+        client.force_authenticate(user=user)
+        product = Product.objects.first()
+        response = client.post('/api/products/ml-optimize/', {'product_id': product.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['model']['version'], 1)
+
+class ExperimentTest(APITestCase):
+    def setUp(self):
+        from .experiments import invalidate_sampler
+        self.user = User.objects.create_user(username='experimenter', password='testpass123',
+                                             email='exp@example.com', role='supplier')
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post('/api/products/experiments/', {
+            'name': 'Spring prices',
+            'arms': [{'name': 'low', 'price': 10}, {'name': 'high', 'price': 12.5}]
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.experiment = response.data['data']
+        self.arms = {arm['name']: arm['id'] for arm in self.experiment['arms']}
+        invalidate_sampler(self.experiment['id'])
+        self.addCleanup(invalidate_sampler, self.experiment['id'])
+
+    def events_url(self):
+        return f"/api/products/experiments/{self.experiment['id']}/events/"
+
+    def test_bulk_ingest_updates_counters(self):
+        """Test a batch of events is appended and folded into the arm counters"""
+        from .models import ExperimentArm, ExperimentEvent
+        events = ([{'arm': 'low', 'type': 'exposure'}] * 2000 + [{'arm': 'low', 'type': 'purchase'}] * 150
+                  + [{'arm': self.arms['high'], 'type': 'exposure'}] * 1000
+                  + [{'arm': 'high', 'type': 'purchase', 'revenue': 25.0}] * 40)
+        response = self.client.post(self.events_url(), {'events': events}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['data']['ingested'], len(events))
+        self.assertEqual(ExperimentEvent.objects.count(), len(events))
+
+        low = ExperimentArm.objects.get(pk=self.arms['low'])
+        high = ExperimentArm.objects.get(pk=self.arms['high'])
+        self.assertEqual((low.exposures, low.purchases, low.revenue), (2000, 150, 1500.0))
+        self.assertEqual((high.exposures, high.purchases, high.revenue), (1000, 40, 1000.0))
+
+        self.client.post(self.events_url(), {'events': [{'arm': 'low', 'type': 'exposure'}]}, format='json')
+        low.refresh_from_db()
+        self.assertEqual(low.exposures, 2001)
+
+        summary = self.client.get(f"/api/products/experiments/{self.experiment['id']}/").data['data']
+        self.assertEqual(summary['arms'][0]['conversion_rate'], round(150 / 2001, 4))
+        self.assertAlmostEqual(sum(arm['win_probability'] for arm in summary['arms']), 1.0)
+
+    def test_invalid_events_rejected(self):
+        """Test a batch with bad events is rejected whole, with the offending indices"""
+        from .models import ExperimentEvent
+        events = [{'arm': 'low', 'type': 'exposure'}, {'arm': 'missing', 'type': 'exposure'},
+                  {'arm': 'low', 'type': 'click'}, {'arm': 'low', 'type': 'purchase', 'revenue': -1}]
+        response = self.client.post(self.events_url(), {'events': events}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([detail['index'] for detail in response.data['details']], [1, 2, 3])
+        self.assertEqual(ExperimentEvent.objects.count(), 0)
+
+        response = self.client.post('/api/products/experiments/', {
+            'name': 'Spring prices', 'arms': [{'name': 'a', 'price': 1}, {'name': 'b', 'price': 2}]
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_create_validation(self):
+        """Test malformed experiments are rejected up front instead of failing in the database"""
+        from .models import PricingExperiment
+        arms = [{'name': 'low', 'price': 10}, {'name': 'high', 'price': 12.5}]
+        for body in ({'name': 'Bad product', 'product_id': 'abc', 'arms': arms},
+                     {'name': 'x' * 256, 'arms': arms},
+                     {'name': 'Huge price', 'arms': [{'name': 'low', 'price': 10}, {'name': 'high', 'price': 1e20}]},
+                     {'name': 'Long arm', 'arms': [{'name': 'a' * 101, 'price': 10}, {'name': 'b', 'price': 11}]}):
+            response = self.client.post('/api/products/experiments/', body, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(PricingExperiment.objects.count(), 1)
+
+    def test_stopped_experiment_rejects_events(self):
+        """Test events for a stopped experiment are refused and leave the counters alone"""
+        from .models import ExperimentEvent, PricingExperiment
+        PricingExperiment.objects.filter(pk=self.experiment['id']).update(status='stopped')
+        response = self.client.post(self.events_url(), {'events': [{'arm': 'low', 'type': 'exposure'}]},
+                                    format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(ExperimentEvent.objects.count(), 0)
+
+        response = self.client.post('/api/products/experiments/999999/events/',
+                                    {'events': [{'arm': 'low', 'type': 'exposure'}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_thompson_sampling_favours_best_revenue_arm(self):
+        """Test allocation concentrates on the arm with the best revenue per exposure"""
+        from .experiments import ThompsonSampler
+        sampler = ThompsonSampler([1, 2], ['low', 'high'], [10.0, 12.0], [1000, 1000], [100, 50], seed=0)
+        chosen = sampler.choose(2000)
+        self.assertGreater(np.mean(chosen == 0), 0.95)
+        probabilities = sampler.win_probabilities()
+        self.assertAlmostEqual(probabilities.sum(), 1.0)
+        self.assertGreater(probabilities[0], 0.95)
+
+        untested = ThompsonSampler([1, 2], ['low', 'high'], [10.0, 10.0], [0, 0], [0, 0], seed=0)
+        self.assertTrue(0.4 < np.mean(untested.choose(2000) == 0) < 0.6)
+
+    def test_assignment_uses_cached_counters(self):
+        """Test assignments reuse cached counters and stop with the experiment"""
+        from .experiments import get_sampler, invalidate_sampler
+        from .models import PricingExperiment
+        assign_url = f"/api/products/experiments/{self.experiment['id']}/assign/"
+        response = self.client.get(assign_url, {'count': 5})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        assignments = response.data['data']['assignments']
+        self.assertEqual(len(assignments), 5)
+        self.assertTrue(all(a['arm_id'] == self.arms[a['arm']] for a in assignments))
+
+        with self.assertNumQueries(0):
+            get_sampler(self.experiment['id'])
+        self.assertEqual(self.client.get(assign_url, {'count': 0}).status_code, status.HTTP_400_BAD_REQUEST)
+
+        PricingExperiment.objects.filter(pk=self.experiment['id']).update(status='stopped')
+        invalidate_sampler(self.experiment['id'])
+        self.assertEqual(self.client.get(assign_url).status_code, status.HTTP_404_NOT_FOUND)
+
+class StrategyRegistryTest(TestCase):
+    def setUp(self):
+        from .strategies import invalidate_strategy_table
+        invalidate_strategy_table()
+        self.addCleanup(invalidate_strategy_table)
+
+    def test_seeded_strategies(self):
+        """Test the migration seeds the former built-in strategies, in order"""
+        from .advanced_optimization import ABTestingSimulator
+        simulator = ABTestingSimulator()
+        self.assertEqual(list(simulator.strategies),
+                         ['penetration', 'skimming', 'competitive', 'cost_plus', 'value_based'])
+        result = simulator.simulate_strategy({'cost_price': 10, 'selling_price': 12}, 'skimming')
+        self.assertEqual(result['price'], 13.0)
+        self.assertEqual(result['description'], 'High price for premium positioning')
+
+    def test_caps_floors_and_rounding(self):
+        """Test compiled strategies apply the price cap, margin floor and rounding rule"""
+        from .strategies import StrategyTable
+        table = StrategyTable([
+            {'name': 'premium', 'price_factor': 2.0, 'max_price_factor': 1.1},
+            {'name': 'discount', 'base': 'current', 'price_factor': 0.5, 'min_margin': 0.1},
+            {'name': 'charm', 'base': 'current', 'price_factor': 1.0, 'rounding': 'charm'},
+            {'name': 'whole', 'price_factor': 1.26, 'rounding': 'whole'},
+        ])
+        prices = table.prices(np.array([10.0, 50.0]), np.array([15.0, 60.25]))
+        np.testing.assert_allclose(prices, [[16.5, 11.0, 15.99, 13.0], [66.275, 55.0, 60.99, 63.0]])
+
+        # Charm rounds up to the next .99, whole rounds halves up, and neither undercuts the margin floor
+        table = StrategyTable([
+            {'name': 'charm', 'base': 'current', 'price_factor': 1.0, 'rounding': 'charm'},
+            {'name': 'tight', 'base': 'current', 'price_factor': 0.5, 'min_margin': 0.0995, 'rounding': 'charm'},
+            {'name': 'whole', 'base': 'current', 'price_factor': 1.0, 'rounding': 'whole'},
+            {'name': 'floored', 'base': 'current', 'price_factor': 0.5, 'min_margin': 0.24, 'rounding': 'whole'},
+        ])
+        prices = table.prices(np.array([10.0, 10.0]), np.array([10.995, 12.5]))
+        np.testing.assert_allclose(prices, [[11.99, 11.99, 11.0, 13.0], [12.99, 11.99, 13.0, 13.0]])
+
+    def test_edits_recompile_table(self):
+        """Test saving a strategy invalidates the cache, which otherwise costs no query"""
+        from .models import PricingStrategy
+        from .strategies import get_strategy_table
+        self.assertEqual(len(get_strategy_table()), 5)
+        with self.assertNumQueries(0):
+            get_strategy_table()
+
+        PricingStrategy.objects.create(name='clearance', base='current', price_factor=0.7, min_margin=0.0)
+        self.assertEqual(get_strategy_table().names[-1], 'clearance')
+        strategy = PricingStrategy.objects.get(name='skimming')
+        strategy.is_active = False
+        strategy.save()
+        self.assertNotIn('skimming', get_strategy_table().names)
+
+        PricingStrategy.objects.all().delete()
+        self.assertEqual(len(get_strategy_table()), 5)
+
+    def test_bulk_updates_seen_after_ttl(self):
+        """Test queryset updates, which skip signals and auto_now, still change the registry stamp"""
+        from .models import PricingStrategy
+        from .strategies import get_strategy_table
+        with override_settings(STRATEGY_REGISTRY_TTL=0):
+            self.assertIn('skimming', get_strategy_table().names)
+            PricingStrategy.objects.filter(name='skimming').update(is_active=False)
+            self.assertNotIn('skimming', get_strategy_table().names)
+
+            PricingStrategy.objects.filter(name='penetration').update(price_factor=0.8)
+            table = get_strategy_table()
+            self.assertEqual(table.factors[table.names.index('penetration')], 0.8)
+
+    def test_many_strategies_simulated(self):
+        """Test the simulator evaluates a large registry in one pass"""
+        from .advanced_optimization import ABTestingSimulator
+        from .models import PricingStrategy
+        PricingStrategy.objects.bulk_create([
+            PricingStrategy(name=f"factor_{i}", price_factor=0.8 + i / 100, rounding='cents') for i in range(45)
+        ])
+        simulator = ABTestingSimulator()
+        self.assertEqual(len(simulator.strategies), 50)
+        result = simulator.simulate_columns([1, 2], np.array([10.0, 20.0]), np.array([12.0, 25.0]),
+                                            np.array([100.0, 50.0]), np.full((2, 3), -1.5), top_k=3)
+        self.assertEqual(len(result['strategies']), 50)
+        self.assertEqual(len(result['strategy'][0]), 3)
+
+class InventoryStatusTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='stockuser', password='testpass123',
+                                             email='stock@example.com', role='supplier')
+        self.client.force_authenticate(user=self.user)
+        # stock / latest demand: 0.1 low, 0.3 medium, 0.6 adequate, 2.0 high, no demand unknown
+        self.products = [
+            Product.objects.create(
+                name=f'Stock {stock}', category='Hardware', cost_price=Decimal('10.00'),
+                selling_price=Decimal('20.00'), stock_available=stock, units_sold=5,
+                demand_forecast=forecast
+            )
+            for stock, forecast in [(10, {'2023': 50, '2024': 100}), (30, {'2024': 100}), (60, {'2024': 100}),
+                                    (200, {'2024': 100}), (5, {})]
+        ]
+
+    def test_status_materialized_on_save(self):
+        """Test the stored status matches get_inventory_status and follows stock edits"""
+        from .advanced_optimization import InventoryAwareOptimizer
+        from .serializers import ProductListSerializer
+        optimizer = InventoryAwareOptimizer()
+        stored = list(Product.objects.order_by('id').values_list('inventory_status', flat=True))
+        expected = [optimizer.get_inventory_status(p) for p in ProductListSerializer(self.products, many=True).data]
+        self.assertEqual(stored, expected)
+        self.assertEqual(stored, ['low', 'medium', 'adequate', 'high', 'unknown'])
+
+        product = self.products[0]
+        product.stock_available = 90
+        product.save()
+        product.refresh_from_db()
+        self.assertEqual((product.inventory_status, product.stock_ratio), ('high', 0.9))
+
+    def test_bulk_refresh(self):
+        """Test the SQL refresh recomputes every product in two statements"""
+        from .inventory import refresh_inventory_status
+        Product.objects.update(stock_available=0, inventory_status='unknown', stock_ratio=None)
+        with self.assertNumQueries(2):
+            self.assertEqual(refresh_inventory_status(), 5)
+        from django.db.models import Count
+        counts = dict(Product.objects.values_list('inventory_status').annotate(n=Count('id')))
+        self.assertEqual(counts, {'low': 4, 'unknown': 1})
+
+    def test_inventory_analysis_grouped_and_filtered(self):
+        """Test the analysis endpoint counts by status and lists one status on request"""
+        response = self.client.get('/api/products/inventory-analysis/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.data['data']
+        self.assertEqual(data['total_products'], 5)
+        self.assertEqual(data['inventory_status'], {'low': 1, 'medium': 1, 'adequate': 1, 'high': 1, 'unknown': 1})
+        self.assertEqual(data['products_by_status']['low'][0]['stock_ratio'], 0.1)
+        self.assertEqual(data['products_by_status']['low'][0]['demand'], 100.0)
+
+        response = self.client.get('/api/products/inventory-analysis/', {'status': 'high', 'limit': 1})
+        self.assertEqual(list(response.data['data']['products_by_status']), ['high'])
+        self.assertEqual(response.data['data']['products_by_status']['high'][0]['id'], self.products[3].id)
+        for params in ({'status': 'empty'}, {'limit': 0}, {'limit': 'x'}):
+            response = self.client.get('/api/products/inventory-analysis/', params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        dashboard = self.client.get('/api/products/optimization-dashboard/').data['data']
+        self.assertEqual(dashboard['inventory_status'], data['inventory_status'])
+
+    def test_batch_inventory_uses_stored_status(self):
+        """Test batch inventory mode prices from the stored status"""
+        response = self.client.post('/api/products/batch-optimize/', {
+            'product_ids': [product.id for product in self.products], 'type': 'inventory'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['data']['results']
+        self.assertEqual([r['inventory_status'] for r in results], ['low', 'medium', 'adequate', 'high', 'unknown'])
+        self.assertEqual([r['recommended_price'] for r in results], [23.0, 21.0, 20.0, 19.0, 20.0])
+
+        response = self.client.post('/api/products/batch-optimize/', {'product_ids': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
 class ProductAPITest(APITestCase):
     def setUp(self):
         self.user = User.objects.create_user(
@@ -162,6 +1428,107 @@ class ProductAPITest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn('data', response.data)
 
+    def test_advanced_forecast(self):
+        """Test advanced forecast endpoint"""
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(f'/api/products/advanced-forecast/?product_id={self.product.id}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['data']), 1)
+        self.assertIn('forecast_summary', response.data['data'][0])
+        self.assertIn('interval_low', response.data['data'][0]['forecast_summary'])
+        self.assertIn('interval_high', response.data['data'][0]['forecast_summary'])
+        self.assertEqual(response.data['data'][0]['anomalies'], [])
+
+    def test_advanced_forecast_horizon(self):
+        """Test the advanced forecast endpoint returns multi-step paths"""
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(f'/api/products/advanced-forecast/?product_id={self.product.id}&horizon=3')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        path = response.data['data'][0]['forecast_path']
+        self.assertEqual(len(path['ensemble']), 3)
+        self.assertEqual(path['ensemble'][0], response.data['data'][0]['forecast_summary']['ensemble_forecast'])
+
+        response = self.client.get('/api/products/advanced-forecast/?horizon=0')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_batch_forecast(self):
+        """Test the stateless batch forecast endpoint"""
+        self.client.force_authenticate(user=self.user)
+        series = [
+            {'id': 'a', 'history': {'2020': 10, '2021': 20, '2022': 30, '2023': 40}},
+            {'id': 'b', 'history': {'2022': 7}, 'category': 'Electronics'},
+        ]
+        product_count = Product.objects.count()
+        response = self.client.post('/api/products/forecast/batch/', {'series': series, 'horizon': 2}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 2)
+        first, second = response.data['data']
+        self.assertEqual(first['id'], 'a')
+        self.assertEqual(first['forecast'], advanced_forecast(series[0]['history'])['ensemble'])
+        self.assertEqual(first['forecast_path']['ensemble'][0], first['forecast'])
+        self.assertEqual(second['forecast_methods']['linear'], 7)
+        self.assertEqual(Product.objects.count(), product_count)
+
+    def test_batch_forecast_validation(self):
+        """Test the batch forecast endpoint rejects malformed series"""
+        self.client.force_authenticate(user=self.user)
+        url = '/api/products/forecast/batch/'
+        response = self.client.post(url, {'series': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        series = [{'history': {'2020': 1}}, {'history': {'last year': 5}}, {'history': {'2020': 'x'}}]
+        response = self.client.post(url, {'series': series}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([error['index'] for error in response.data['details']], [1, 2])
+
+        response = self.client.post(url, {'series': series[:1], 'horizon': 99}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        series = [{'history': {'2020': 1}, 'category': ['x']}, {'history': {'2020': 1}, 'category': None},
+                  {'history': {'2020': 1e300, '2021': 2}}, {'history': {'2020': 1}, 'category': 'Home'}]
+        response = self.client.post(url, {'series': series}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([error['index'] for error in response.data['details']], [0, 2])
+
+    def test_elasticity_heatmap(self):
+        """Test the heatmap endpoint with per-product bins"""
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get('/api/products/elasticity-heatmap/?products=true')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        entry = response.data['data']['data'][0]
+        self.assertEqual((entry['category'], entry['product_count']), ('Electronics', 1))
+        self.assertEqual(sum(entry['product_bins']), 1)
+
+    def test_strategy_simulation(self):
+        """Test the columnar strategy simulation endpoint and its validation"""
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post('/api/products/ab-testing/simulate/',
+                                    {'product_ids': [self.product.id], 'scenarios': [1.0, 2.0], 'top_k': 2},
+                                    format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.data['data']
+        self.assertEqual(data['product_ids'], [self.product.id])
+        base = data['elasticity'][0][0]
+        self.assertAlmostEqual(data['elasticity'][0][1], 2 * base, places=2)
+        self.assertEqual(np.array(data['profit']).shape, (1, 2, 2))
+        self.assertTrue(all(0 <= index < len(data['strategies']) for index in np.ravel(data['strategy'])))
+
+        response = self.client.post('/api/products/ab-testing/simulate/',
+                                    {'product_ids': [self.product.id], 'scenarios': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post('/api/products/ab-testing/simulate/', {'product_ids': [999999]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        for product_ids in (['a'], [self.product.id, None], [True]):
+            response = self.client.post('/api/products/ab-testing/simulate/', {'product_ids': product_ids}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        for scenarios in ([1e308], [0], [-1.0], [1.0, 10.5]):
+            response = self.client.post('/api/products/ab-testing/simulate/',
+                                        {'product_ids': [self.product.id], 'scenarios': scenarios}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post('/api/products/ab-testing/simulate/',
+                                    {'product_ids': [self.product.id], 'scenarios': [10]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
     def test_pricing_optimization(self):
         """Test pricing optimization endpoint"""
         self.client.force_authenticate(user=self.user)
@@ -169,6 +1536,12 @@ class ProductAPITest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn('data', response.data)
 
+        for chunk_size in ('abc', '0'):
+            response = self.client.get('/api/products/optimize/', {'chunk_size': chunk_size})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get('/api/products/optimize/', {'chunk_size': '2'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
     def test_unauthorized_access(self):
         """Test unauthorized access to protected endpoints"""
         response = self.client.get('/api/products/')
@@ -1,15 +1,21 @@
 from django.urls import path
 from .views import (
     ProductListCreateView, ProductRetrieveUpdateDestroyView,
-    ProductSearchView, DemandForecastView, PricingOptimizationView, AdvancedForecastView
+    ProductSearchView, DemandForecastView, PricingOptimizationView, AdvancedForecastView,
+    BatchForecastView
 )
 from .advanced_views import (
     elasticity_heatmap_view,
     ml_optimize_price_view,
     ab_testing_simulator_view,
+    strategy_simulation_view,
     inventory_analysis_view,
     batch_optimization_view,
-    optimization_dashboard_view
+    optimization_dashboard_view,
+    create_experiment_view,
+    experiment_detail_view,
+    experiment_events_view,
+    experiment_assign_view
 )
 
 urlpatterns = [
@@ -17,6 +23,7 @@ urlpatterns = [
     path('<int:pk>/', ProductRetrieveUpdateDestroyView.as_view(), name='product_detail'),
     path('search/', ProductSearchView.as_view(), name='product_search'),
     path('forecast/', DemandForecastView.as_view(), name='demand_forecast'),
+    path('forecast/batch/', BatchForecastView.as_view(), name='batch_forecast'),
     path('advanced-forecast/', AdvancedForecastView.as_view(), name='advanced_forecast'),
     path('optimize/', PricingOptimizationView.as_view(), name='pricing_optimization'),
     
@@ -24,7 +31,14 @@ urlpatterns = [
     path('elasticity-heatmap/', elasticity_heatmap_view, name='elasticity_heatmap'),
     path('ml-optimize/', ml_optimize_price_view, name='ml_optimize_price'),
     path('ab-testing/', ab_testing_simulator_view, name='ab_testing_simulator'),
+    path('ab-testing/simulate/', strategy_simulation_view, name='strategy_simulation'),
     path('inventory-analysis/', inventory_analysis_view, name='inventory_analysis'),
     path('batch-optimize/', batch_optimization_view, name='batch_optimization'),
     path('optimization-dashboard/', optimization_dashboard_view, name='optimization_dashboard'),
+    
+    # Live price experiments
+    path('experiments/', create_experiment_view, name='create_experiment'),
+    path('experiments/<int:pk>/', experiment_detail_view, name='experiment_detail'),
+    path('experiments/<int:pk>/events/', experiment_events_view, name='experiment_events'),
+    path('experiments/<int:pk>/assign/', experiment_assign_view, name='experiment_assign'),
 ]
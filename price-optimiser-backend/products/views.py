@@ -2,14 +2,18 @@ from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.core.exceptions import ValidationError
-from django.db import transaction
+from django.conf import settings
+import math
 import logging
-import ast
 from .models import Product
 from .serializers import ProductSerializer, ProductListSerializer
 from .permissions import IsAdminOrReadOnly, IsSupplierOrAdmin
-from .forecasts import simple_linear_forecast, advanced_forecast
-from .optimization import optimize_price
+from .forecasts import AdvancedDemandForecaster, BatchForecaster, MAX_FORECAST_HORIZON, MAX_FORECAST_QUANTITY
+from .demand_history import load_batch_forecaster
+from .optimization import optimize_prices
+from .elasticity import estimate_elasticities
+from .persistence import bulk_update_optimized_prices
+from decimal import Decimal
 import numpy as np
 
 logger = logging.getLogger(__name__)
@@ -90,26 +94,25 @@ class DemandForecastView(generics.GenericAPIView):
 
     def get(self, request, *args, **kwargs):
         try:
-            products = Product.objects.all()
+            products = list(Product.objects.defer('demand_forecast', 'description'))
+            product_ids = [prod.id for prod in products]
             results = []
-            
-            for prod in products:
-                forecast_data = prod.demand_forecast
 
-                if isinstance(forecast_data, str):
-                    try:
-                        forecast_data = ast.literal_eval(forecast_data)
-                    except (ValueError, SyntaxError):
-                        forecast_data = {}
+            # Forecast the whole catalog from the demand table, reusing cached results
+            categories = [prod.category for prod in products]
+            forecaster = AdvancedDemandForecaster()
+            records = forecaster.forecast_batch(load_batch_forecaster(product_ids), product_ids, categories)
 
-                # Use advanced forecasting
-                advanced_forecast_result = advanced_forecast(forecast_data or {})
+            for prod, record in zip(products, records):
+                advanced_forecast_result = record['forecast']
                 results.append({
                     'product_id': prod.id,
                     'name': prod.name,
                     'stock_available': prod.stock_available,
                     'units_sold': prod.units_sold,
                     'forecast': advanced_forecast_result['ensemble'],
+                    'interval_low': record['interval_low'],
+                    'interval_high': record['interval_high'],
                     'forecast_breakdown': {
                         'linear': advanced_forecast_result['linear'],
                         'exponential': advanced_forecast_result['exponential'],
@@ -121,7 +124,10 @@ class DemandForecastView(generics.GenericAPIView):
                 
             return Response({
                 'success': True,
-                'data': results
+                'data': results,
+                'interval_quantiles': list(forecaster.interval_quantiles),
+                'winsorized': forecaster.winsorize,
+                'cache': forecaster.forecast_cache.stats()
             })
         except Exception as e:
             logger.error(f"Error generating demand forecast: {str(e)}")
@@ -138,6 +144,15 @@ class AdvancedForecastView(generics.GenericAPIView):
     def get(self, request, *args, **kwargs):
         try:
             product_id = request.query_params.get('product_id')
+            try:
+                horizon = int(request.query_params.get('horizon', 1))
+            except ValueError:
+                horizon = 0
+            if not 1 <= horizon <= MAX_FORECAST_HORIZON:
+                return Response({
+                    'success': False,
+                    'error': f'horizon must be an integer between 1 and {MAX_FORECAST_HORIZON}'
+                }, status=status.HTTP_400_BAD_REQUEST)
             
             if product_id:
                 try:
@@ -150,43 +165,23 @@ class AdvancedForecastView(generics.GenericAPIView):
                 
                 products = [product]
             else:
-                products = Product.objects.all()
+                products = list(Product.objects.defer('demand_forecast', 'description'))
             
             results = []
-            
-            for prod in products:
-                forecast_data = prod.demand_forecast
 
-                if isinstance(forecast_data, str):
-                    try:
-                        forecast_data = ast.literal_eval(forecast_data)
-                    except (ValueError, SyntaxError):
-                        forecast_data = {}
+            # Forecasts and trend statistics from the demand table, reusing cached results
+            product_ids = [prod.id for prod in products]
+            batch = load_batch_forecaster(product_ids)
+            forecaster = AdvancedDemandForecaster()
+            records = forecaster.forecast_batch(batch, product_ids, [prod.category for prod in products], horizon)
 
-                # Get detailed forecast analysis
-                advanced_forecast_result = advanced_forecast(forecast_data or {})
-                
-                # Calculate trend analysis
-                if forecast_data and len(forecast_data) >= 2:
-                    years = sorted([int(year) for year in forecast_data.keys()])
-                    values = [forecast_data[str(year)] for year in years]
-                    
-                    # Calculate growth rate
-                    if len(values) >= 2:
-                        growth_rate = ((values[-1] - values[0]) / values[0]) * 100 if values[0] > 0 else 0
-                    else:
-                        growth_rate = 0
-                    
-                    # Calculate volatility
-                    if len(values) >= 2:
-                        volatility = (np.std(values) / np.mean(values)) * 100 if np.mean(values) > 0 else 0
-                    else:
-                        volatility = 0
-                else:
-                    growth_rate = 0
-                    volatility = 0
-                
-                results.append({
+            for i, (prod, record) in enumerate(zip(products, records)):
+                forecast_data = batch.history(i)
+                advanced_forecast_result = record['forecast']
+                growth_rate = record['growth_rate']
+                volatility = record['volatility']
+
+                result = {
                     'product_id': prod.id,
                     'name': prod.name,
                     'category': prod.category,
@@ -195,9 +190,12 @@ class AdvancedForecastView(generics.GenericAPIView):
                     'forecast_summary': {
                         'ensemble_forecast': advanced_forecast_result['ensemble'],
                         'confidence': advanced_forecast_result['confidence'],
+                        'interval_low': record['interval_low'],
+                        'interval_high': record['interval_high'],
                         'growth_rate': round(growth_rate, 2),
                         'volatility': round(volatility, 2)
                     },
+                    'anomalies': record['anomalies'],
                     'forecast_methods': {
                         'linear_regression': {
                             'forecast': advanced_forecast_result['linear'],
@@ -219,11 +217,16 @@ class AdvancedForecastView(generics.GenericAPIView):
                     'recommendations': self._generate_forecast_recommendations(
                         advanced_forecast_result, growth_rate, volatility
                     )
-                })
+                }
+                if horizon > 1:
+                    result['forecast_path'] = record['path']
+                results.append(result)
                 
             return Response({
                 'success': True,
-                'data': results
+                'data': results,
+                'interval_quantiles': list(forecaster.interval_quantiles),
+                'cache': forecaster.forecast_cache.stats()
             })
         except Exception as e:
             logger.error(f"Error generating advanced forecast: {str(e)}")
@@ -283,34 +286,169 @@ class AdvancedForecastView(generics.GenericAPIView):
         
         return recommendations
 
+class BatchForecastView(generics.GenericAPIView):
+    """What-if forecasts for ad-hoc series posted in bulk; nothing is read from or written to the database"""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        series = request.data.get('series') if isinstance(request.data, dict) else None
+        max_series = getattr(settings, 'FORECAST_BATCH_MAX_SERIES', 10000)
+        max_periods = getattr(settings, 'FORECAST_BATCH_MAX_PERIODS', 120)
+        if not isinstance(series, list) or not series:
+            return Response({
+                'success': False,
+                'error': 'series must be a non-empty list'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if len(series) > max_series:
+            return Response({
+                'success': False,
+                'error': f'At most {max_series} series can be forecast per request'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        horizon = request.data.get('horizon', 1)
+        if isinstance(horizon, bool) or not isinstance(horizon, int) or not 1 <= horizon <= MAX_FORECAST_HORIZON:
+            return Response({
+                'success': False,
+                'error': f'horizon must be an integer between 1 and {MAX_FORECAST_HORIZON}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        ids, histories, categories, errors = [], [], [], []
+        for index, item in enumerate(series):
+            item = item if isinstance(item, dict) else {}
+            error = self._history_error(item.get('history'), max_periods)
+            if not error and not isinstance(item.get('category'), (str, type(None))):
+                error = 'category must be a string or null'
+            if error:
+                errors.append({'index': index, 'error': error})
+                continue
+            ids.append(item.get('id', index))
+            histories.append(item['history'])
+            categories.append(item.get('category'))
+        if errors:
+            return Response({
+                'success': False,
+                'error': 'Invalid series',
+                'details': errors[:100]
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            # One batched pass over every series, bypassing the forecast cache
+            forecaster = AdvancedDemandForecaster()
+            records = forecaster.forecast_records(BatchForecaster(histories), categories=categories, horizon=horizon)
+
+            results = []
+            for series_id, record in zip(ids, records):
+                result = {
+                    'id': series_id,
+                    'forecast': record['forecast']['ensemble'],
+                    'confidence': record['forecast']['confidence'],
+                    'forecast_methods': {
+                        method: record['forecast'][method]
+                        for method in ('linear', 'exponential', 'moving_average', 'seasonal')
+                    },
+                    'interval_low': record['interval_low'],
+                    'interval_high': record['interval_high'],
+                    'growth_rate': round(record['growth_rate'], 2),
+                    'volatility': round(record['volatility'], 2),
+                    'anomalies': record['anomalies']
+                }
+                if horizon > 1:
+                    result['forecast_path'] = record['path']
+                results.append(result)
+
+            return Response({
+                'success': True,
+                'data': results,
+                'count': len(results),
+                'interval_quantiles': list(forecaster.interval_quantiles),
+                'winsorized': forecaster.winsorize
+            })
+        except Exception as e:
+            logger.error(f"Error generating batch forecast: {str(e)}")
+            return Response({
+                'success': False,
+                'error': 'Failed to generate batch forecast'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @staticmethod
+    def _history_error(history, max_periods):
+        """Why a posted history cannot be forecast, or None if it is valid"""
+        if not isinstance(history, dict) or not history:
+            return 'history must be a non-empty object mapping periods to quantities'
+        # Every series is padded to the longest one, so cap the width of the batch
+        if len(history) > max_periods:
+            return f'history has more than {max_periods} periods'
+        for period, quantity in history.items():
+            try:
+                int(period)
+            except (TypeError, ValueError):
+                return f'period {period!r} is not an integer'
+            if isinstance(quantity, bool) or not isinstance(quantity, (int, float)) or not math.isfinite(quantity):
+                return f'quantity for period {period} must be a finite number'
+            if abs(quantity) > MAX_FORECAST_QUANTITY:
+                return f'quantity for period {period} must be at most {MAX_FORECAST_QUANTITY:g} in absolute value'
+        return None
+
 class PricingOptimizationView(generics.GenericAPIView):
     serializer_class = ProductListSerializer
     permission_classes = [IsAuthenticated]
 
     def get(self, request, *args, **kwargs):
+        chunk_size = request.query_params.get('chunk_size')
+        if chunk_size is not None:
+            try:
+                chunk_size = int(chunk_size)
+            except ValueError:
+                chunk_size = 0
+            if chunk_size < 1:
+                return Response({
+                    'success': False,
+                    'error': 'chunk_size must be a positive integer'
+                }, status=status.HTTP_400_BAD_REQUEST)
         try:
             results = []
-            
-            with transaction.atomic():
-                for prod in Product.objects.all():
-                    best_price, best_profit = optimize_price(prod.cost_price)
-
-                    # Update the product with optimized price
-                    prod.optimized_price = best_price
-                    prod.save()
-
-                    results.append({
-                        'product_id': prod.id,
-                        'name': prod.name,
-                        'optimized_price': float(best_price),
-                        'optimized_profit': float(best_profit),
-                        'current_price': float(prod.selling_price),
-                        'price_change': float(best_price - prod.selling_price),
-                    })
+            products = list(Product.objects.only(
+                'id', 'name', 'category', 'cost_price', 'selling_price', 'optimized_price'
+            ))
+
+            # Category-pooled elasticities, rounded so the lookup table stays small
+            estimates = estimate_elasticities([prod.id for prod in products])
+            elasticities = np.round([estimates[prod.id]['elasticity'] for prod in products], 2)
+
+            # Solve the whole catalog in one vectorized pass; products sharing
+            # elasticity and bounds reuse one memoized normalized-curve solution
+            cost_prices = np.array([float(prod.cost_price) for prod in products])
+            best_prices, best_profits = optimize_prices(cost_prices, elasticities=elasticities, solver='lookup')
+
+            optimized = []
+            for prod, price, profit in zip(products, best_prices, best_profits):
+                if not np.isfinite(price):
+                    optimized.append(None)
+                    continue
+                best_price = Decimal(price).quantize(Decimal("0.01"))
+                best_profit = Decimal(profit).quantize(Decimal("0.01"))
+                optimized.append(best_price)
+
+                results.append({
+                    'product_id': prod.id,
+                    'name': prod.name,
+                    'optimized_price': float(best_price),
+                    'optimized_profit': float(best_profit),
+                    'current_price': float(prod.selling_price),
+                    'price_change': float(best_price - prod.selling_price),
+                    'elasticity': estimates[prod.id]['elasticity'],
+                    'elasticity_shrinkage_weight': estimates[prod.id]['shrinkage_weight'],
+                })
+
+            # Write only changed prices, committing chunk by chunk
+            persistence_stats = bulk_update_optimized_prices(
+                products, optimized, chunk_size=chunk_size
+            )
 
             return Response({
                 'success': True,
-                'data': results
+                'data': results,
+                'persistence': persistence_stats
             })
         except Exception as e:
             logger.error(f"Error optimizing pricing: {str(e)}")